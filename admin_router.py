@@ -0,0 +1,22 @@
+# admin_router.py
+from fastapi import APIRouter, Depends
+
+import app_models
+from core_utils import get_current_active_superuser, get_pool_metrics
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Administração"],
+    responses={
+        401: {"description": "Não autenticado"},
+        403: {"description": "Acesso restrito a administradores"}
+    },
+)
+
+@router.get("/db-pool",
+            summary="Métricas do pool de conexões do worker",
+            description="Conexões em uso, overflow e tempo de espera por conexão do worker que atendeu a requisição (campo 'pid').")
+def read_db_pool_metrics(
+    current_user: app_models.User = Depends(get_current_active_superuser)
+):
+    return get_pool_metrics()
@@ -81,7 +81,10 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            # Uma transação por revisão: os backfills em autocommit_block (ex.: 814270cb6c8f) só
+            # gravam revisões anteriores completas
+            transaction_per_migration=True
         )
 
         with context.begin_transaction():
@@ -0,0 +1,57 @@
+"""backfill chave ordenacao pagamentos
+
+Revision ID: 253b14068c13
+Revises: e41a7c9d2f58
+Create Date: 2026-10-17 23:05:12.408317
+
+Não transacional: cada lote do UPDATE é gravado (autocommit) ao terminar. Se a migração
+for interrompida, os lotes já gravados permanecem e a revisão pode ser reexecutada: só
+pagamentos ainda sem chave_ordenacao são atualizados.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '253b14068c13'
+down_revision: Union[str, None] = 'e41a7c9d2f58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Pagamentos recalculados por transação no backfill
+TAMANHO_LOTE_BACKFILL = 10000
+
+
+def _chave_ordenacao_sql(dialeto: str) -> str:
+    # Mesma chave de app_models.chave_ordenacao_pagamento, em SQL
+    if dialeto == 'postgresql':
+        vencimento, pagamento = "to_char(data_vencimento, 'YYYYMMDD')", "to_char(data_pagamento, 'YYYYMMDD')"
+    else:
+        vencimento, pagamento = "strftime('%Y%m%d', data_vencimento)", "strftime('%Y%m%d', data_pagamento)"
+    return (
+        "CASE "
+        f"WHEN status_pagamento IN ('Pendente', 'Atrasado') THEN '1' || COALESCE({vencimento}, '00000000') "
+        "WHEN status_pagamento = 'Pago' THEN "
+        f"'2' || COALESCE(CAST(99999999 - CAST({pagamento} AS INTEGER) AS VARCHAR(8)), '99999999') "
+        "ELSE '300000000' END"
+    )
+
+
+def upgrade() -> None:
+    # Backfill por faixas de PK, com commit por lote: transações curtas, sem travar a tabela inteira
+    bind = op.get_bind()
+    chave = _chave_ordenacao_sql(bind.dialect.name)
+    maior_id = bind.execute(sa.text("SELECT MAX(id_pagamento) FROM pagamentos")).scalar() or 0
+    with op.get_context().autocommit_block():
+        for inicio in range(0, maior_id, TAMANHO_LOTE_BACKFILL):
+            bind.execute(sa.text(
+                f"UPDATE pagamentos SET chave_ordenacao = {chave} "
+                "WHERE id_pagamento > :inicio AND id_pagamento <= :fim AND chave_ordenacao IS NULL"
+            ), {"inicio": inicio, "fim": inicio + TAMANHO_LOTE_BACKFILL})
+
+
+def downgrade() -> None:
+    pass # Os valores saem junto com a coluna no downgrade de e41a7c9d2f58
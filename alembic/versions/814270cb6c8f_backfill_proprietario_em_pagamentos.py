@@ -0,0 +1,42 @@
+"""backfill proprietario em pagamentos
+
+Revision ID: 814270cb6c8f
+Revises: b5e8c3f17a92
+Create Date: 2026-10-17 22:18:41.126530
+
+Não transacional: cada lote do UPDATE é gravado (autocommit) ao terminar. Se a migração
+for interrompida, os lotes já gravados permanecem e a revisão pode ser reexecutada: só
+pagamentos ainda sem id_proprietario_user são atualizados.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '814270cb6c8f'
+down_revision: Union[str, None] = 'b5e8c3f17a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Pagamentos copiados do contrato por transação no backfill
+TAMANHO_LOTE_BACKFILL = 10000
+
+
+def upgrade() -> None:
+    # Backfill por faixas de PK, com commit por lote: transações curtas, sem travar a tabela inteira
+    bind = op.get_bind()
+    maior_id = bind.execute(sa.text("SELECT MAX(id_pagamento) FROM pagamentos")).scalar() or 0
+    with op.get_context().autocommit_block():
+        for inicio in range(0, maior_id, TAMANHO_LOTE_BACKFILL):
+            bind.execute(sa.text(
+                "UPDATE pagamentos SET id_proprietario_user = ("
+                "SELECT c.id_proprietario_user FROM contratos_servico c WHERE c.id_contrato = pagamentos.id_contrato"
+                ") WHERE id_pagamento > :inicio AND id_pagamento <= :fim AND id_proprietario_user IS NULL"
+            ), {"inicio": inicio, "fim": inicio + TAMANHO_LOTE_BACKFILL})
+
+
+def downgrade() -> None:
+    pass # Os valores saem junto com a coluna no downgrade de b5e8c3f17a92
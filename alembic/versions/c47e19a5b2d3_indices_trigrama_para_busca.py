@@ -0,0 +1,42 @@
+"""indices trigrama para busca
+
+Revision ID: c47e19a5b2d3
+Revises: 8d41e7b20c6f
+Create Date: 2026-10-17 15:41:08.532917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c47e19a5b2d3'
+down_revision: Union[str, None] = '8d41e7b20c6f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (índice, tabela, coluna) - GIN com gin_trgm_ops, usados por busca_crud no PostgreSQL
+INDICES_TRIGRAMA = [
+    ('ix_alunos_nome_trgm', 'alunos', 'nome_completo_aluno'),
+    ('ix_escolas_nome_trgm', 'escolas', 'nome_escola'),
+    ('ix_responsaveis_nome_trgm', 'responsaveis', 'nome_completo'),
+    ('ix_vans_placa_trgm', 'vans', 'placa'),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for nome, tabela, coluna in INDICES_TRIGRAMA:
+        op.create_index(nome, tabela, [coluna], unique=False, postgresql_using='gin', postgresql_ops={coluna: 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for nome, tabela, _ in reversed(INDICES_TRIGRAMA):
+        op.drop_index(nome, table_name=tabela, postgresql_using='gin')
+    # A extensão pg_trgm é mantida: pode estar em uso por outros objetos do banco
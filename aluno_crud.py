@@ -1,9 +1,13 @@
 # aluno_crud.py
+from sqlalchemy import RowMapping, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional, Union # <-- ADICIONE Union AQUI
+from typing import Any, Iterator, List, Optional, Sequence, Union # <-- ADICIONE Union AQUI
 
 import app_models
 import schemas
+from fieldsets import aplicar_campos
+from pagination import Ordenacao, SEM_ORDENACAO, paginar_ordenado
 import escola_crud # Para validar a escola
 import responsavel_crud # Para validar o responsável
 
@@ -42,8 +46,76 @@ def create_aluno(
     db.refresh(db_aluno)
     return db_aluno
 
-def get_alunos_por_proprietario(db: Session, proprietario_id: int, skip: int = 0, limit: int = 100) -> List[app_models.Aluno]:
-    return db.query(app_models.Aluno).filter(app_models.Aluno.id_proprietario_user == proprietario_id).offset(skip).limit(limit).all()
+def create_alunos_em_lote(
+    db: Session, alunos_in: List[schemas.AlunoCreate], proprietario_id: int
+) -> List[Union[int, str]]:
+    """Cria vários alunos em uma transação. Retorna, por item, o id criado ou o código de erro.
+
+    Escolas e responsáveis referenciados são validados com um SELECT ... IN por tipo,
+    em vez de duas ou três consultas por aluno como em `create_aluno`.
+    """
+    ids_escolas = {aluno_in.id_escola for aluno_in in alunos_in}
+    ids_responsaveis = {aluno_in.id_responsavel_principal for aluno_in in alunos_in} | {
+        aluno_in.id_responsavel_secundario for aluno_in in alunos_in if aluno_in.id_responsavel_secundario
+    }
+    escolas_validas = set(db.scalars(
+        select(app_models.Escola.id_escola).where(
+            app_models.Escola.id_proprietario_user == proprietario_id,
+            app_models.Escola.id_escola.in_(ids_escolas)
+        )
+    ))
+    responsaveis_validos = set(db.scalars(
+        select(app_models.Responsavel.id_responsavel).where(
+            app_models.Responsavel.id_proprietario_user == proprietario_id,
+            app_models.Responsavel.id_responsavel.in_(ids_responsaveis)
+        )
+    ))
+
+    resultados: List[Union[app_models.Aluno, str]] = []
+    for aluno_in in alunos_in:
+        if aluno_in.id_escola not in escolas_validas:
+            resultados.append("ERRO_ESCOLA_INVALIDA")
+        elif aluno_in.id_responsavel_principal not in responsaveis_validos:
+            resultados.append("ERRO_RESPONSAVEL_PRINCIPAL_INVALIDO")
+        elif aluno_in.id_responsavel_secundario and aluno_in.id_responsavel_secundario not in responsaveis_validos:
+            resultados.append("ERRO_RESPONSAVEL_SECUNDARIO_INVALIDO")
+        else:
+            resultados.append(app_models.Aluno(**aluno_in.model_dump(), id_proprietario_user=proprietario_id))
+
+    novos = [resultado for resultado in resultados if isinstance(resultado, app_models.Aluno)]
+    if not novos:
+        return [resultado for resultado in resultados if isinstance(resultado, str)] # Só códigos de erro
+    db.add_all(novos)
+    db.flush() # INSERT em lote; os ids são lidos aqui para não recarregar cada objeto após o commit
+    ids = [resultado if isinstance(resultado, str) else resultado.id_aluno for resultado in resultados]
+    db.commit()
+    return ids
+
+# Campos aceitos em `?sort=` (todos NOT NULL, ver pagination.paginar_ordenado)
+CAMPOS_ORDENACAO_ALUNOS = ("id_aluno", "nome_completo_aluno", "data_nascimento")
+
+def get_alunos_por_proprietario(
+    db: Session, proprietario_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+    campos: Optional[List[str]] = None,
+    id_escola: Optional[int] = None, status_aluno: Optional[str] = None, periodo_escolar: Optional[str] = None,
+    ordenacao: Ordenacao = SEM_ORDENACAO, after_valor: Any = None
+) -> List[app_models.Aluno]:
+    query = db.query(app_models.Aluno).filter(app_models.Aluno.id_proprietario_user == proprietario_id)
+    if id_escola is not None:
+        query = query.filter(app_models.Aluno.id_escola == id_escola)
+    if status_aluno is not None:
+        query = query.filter(app_models.Aluno.status_aluno == status_aluno)
+    if periodo_escolar is not None:
+        query = query.filter(app_models.Aluno.periodo_escolar == periodo_escolar)
+    if campos and ordenacao.campo and ordenacao.campo not in campos:
+        campos = campos + [ordenacao.campo] # O valor do último item vai para o cursor
+    query = aplicar_campos(query, app_models.Aluno, campos)
+    apos = (after_valor, after_id) if after_id is not None else None
+    return paginar_ordenado(query, app_models.Aluno, app_models.Aluno.id_aluno, ordenacao, skip=skip, limit=limit, apos=apos).all()
+
+async def get_alunos_por_proprietario_async(db: AsyncSession, proprietario_id: int, **opcoes: Any) -> List[app_models.Aluno]:
+    """Variante para AsyncSession (GET /alunos/): a mesma consulta e os mesmos parâmetros, via run_sync."""
+    return await db.run_sync(get_alunos_por_proprietario, proprietario_id=proprietario_id, **opcoes)
 
 def get_aluno_por_id_e_proprietario(db: Session, aluno_id: int, proprietario_id: int) -> Optional[app_models.Aluno]:
     return db.query(app_models.Aluno).filter(
@@ -89,4 +161,14 @@ def delete_aluno(db: Session, aluno_id: int, proprietario_id: int) -> Optional[a
         return None
     db.delete(db_aluno)
     db.commit()
-    return db_aluno
\ No newline at end of file
+    return db_aluno
+
+def iter_alunos_para_exportacao(
+    db: Session, proprietario_id: int, colunas: List[str], tamanho_lote: int = 500
+) -> Iterator[Sequence[RowMapping]]:
+    """Lê os alunos do proprietário em lotes por cursor no servidor (yield_per), sem montar objetos ORM."""
+    stmt = select(*(getattr(app_models.Aluno, coluna) for coluna in colunas))\
+        .where(app_models.Aluno.id_proprietario_user == proprietario_id)\
+        .order_by(app_models.Aluno.id_aluno)\
+        .execution_options(yield_per=tamanho_lote)
+    yield from db.execute(stmt).mappings().partitions()
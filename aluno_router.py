@@ -1,12 +1,16 @@
 # aluno_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import schemas
 import aluno_crud
 import app_models
-from core_utils import get_db, get_current_active_user
+from core_utils import get_async_read_db, get_db, get_read_db, get_current_active_user, settings
+from entity_versions import etag_condicional
+from fieldsets import parse_fields, resposta_com_campos
+from pagination import decode_cursor_ordenado, parse_sort, set_next_cursor
 
 router = APIRouter(
     prefix="/alunos",
@@ -42,19 +46,60 @@ def create_novo_aluno(
         raise HTTPException(status_code=400, detail="Não foi possível criar o aluno por um motivo não especificado.")
     return created_aluno
 
-@router.get("/", response_model=List[schemas.Aluno])
-def read_meus_alunos(
-    skip: int = 0, limit: int = 100,
+MENSAGENS_ERRO_LOTE = {
+    "ERRO_ESCOLA_INVALIDA": "Escola fornecida é inválida ou não pertence a você.",
+    "ERRO_RESPONSAVEL_PRINCIPAL_INVALIDO": "Responsável principal fornecido é inválido ou não pertence a você.",
+    "ERRO_RESPONSAVEL_SECUNDARIO_INVALIDO": "Responsável secundário fornecido é inválido ou não pertence a você.",
+}
+
+@router.post("/bulk", response_model=schemas.ResultadoLote)
+def create_alunos_em_lote(
+    alunos_in: List[schemas.AlunoCreate],
     db: Session = Depends(get_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
-    alunos = aluno_crud.get_alunos_por_proprietario(db, proprietario_id=current_user.id_user, skip=skip, limit=limit)
-    return alunos
+    """
+    Cria vários alunos em uma única transação. Itens com escola ou responsável inválidos são
+    rejeitados individualmente (ver `resultados`), sem impedir a criação dos demais.
+    """
+    if not alunos_in:
+        raise HTTPException(status_code=400, detail="Envie ao menos um aluno.")
+    if len(alunos_in) > settings.BULK_MAX_ITENS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {settings.BULK_MAX_ITENS} alunos por requisição.")
+
+    resultados = aluno_crud.create_alunos_em_lote(db, alunos_in=alunos_in, proprietario_id=current_user.id_user)
+    itens = [
+        schemas.ResultadoLoteItem(indice=indice, erro=MENSAGENS_ERRO_LOTE.get(resultado, resultado))
+        if isinstance(resultado, str) else schemas.ResultadoLoteItem(indice=indice, id=resultado)
+        for indice, resultado in enumerate(resultados)
+    ]
+    criados = sum(1 for item in itens if item.id is not None)
+    return schemas.ResultadoLote(criados=criados, rejeitados=len(itens) - criados, resultados=itens)
+
+@router.get("/", response_model=List[schemas.Aluno], dependencies=[Depends(etag_condicional("alunos", assincrono=True))])
+async def read_meus_alunos(
+    request: Request, response: Response,
+    skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[str] = None,
+    id_escola: Optional[int] = None, status_aluno: Optional[str] = None, periodo_escolar: Optional[str] = None,
+    sort: Optional[str] = Query(None, description="Campo de ordenação (prefixo '-' para decrescente): " + ", ".join(aluno_crud.CAMPOS_ORDENACAO_ALUNOS)),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: app_models.User = Depends(get_current_active_user)
+):
+    campos = parse_fields(fields, schemas.Aluno, "id_aluno")
+    ordenacao = parse_sort(sort, aluno_crud.CAMPOS_ORDENACAO_ALUNOS)
+    after_valor, after_id = decode_cursor_ordenado(cursor, ordenacao, app_models.Aluno) or (None, None)
+    alunos = await aluno_crud.get_alunos_por_proprietario_async(
+        db, proprietario_id=current_user.id_user, skip=skip, limit=limit, after_id=after_id, campos=campos,
+        id_escola=id_escola, status_aluno=status_aluno, periodo_escolar=periodo_escolar,
+        ordenacao=ordenacao, after_valor=after_valor
+    )
+    set_next_cursor(request, response, alunos, "id_aluno", limit, ordenacao)
+    return resposta_com_campos(alunos, schemas.Aluno, campos, response)
 
-@router.get("/{aluno_id}", response_model=schemas.Aluno)
+@router.get("/{aluno_id}", response_model=schemas.Aluno, dependencies=[Depends(etag_condicional("alunos"))])
 def read_meu_aluno_especifico(
     aluno_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
     aluno = aluno_crud.get_aluno_por_id_e_proprietario(db, aluno_id=aluno_id, proprietario_id=current_user.id_user)
@@ -1,5 +1,6 @@
 # app_models/__init__.py
 from .all_models import (
     Base, User, Responsavel, Escola, Motorista, Van, Aluno,
-    Rota, AlunosPorRota, ContratoServico, Pagamento
+    Rota, AlunosPorRota, ContratoServico, Pagamento, VersaoEntidade, ResumoFinanceiroMensal,
+    ExecucaoTarefa, chave_ordenacao_pagamento
 )
\ No newline at end of file
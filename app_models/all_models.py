@@ -1,14 +1,24 @@
 # app_models/all_models.py
 from sqlalchemy import (
     create_engine, Column, Integer, String, Date, ForeignKey, Text,
-    DateTime, Numeric, Boolean, Time, UniqueConstraint
+    DateTime, Numeric, Boolean, Time, UniqueConstraint, Index, DDL, event, and_, case, or_, text
 )
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 import datetime
 
 Base = declarative_base()
 
+# Busca textual (busca_crud): os índices GIN de trigramas só existem no PostgreSQL
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+
+
+def _indice_trigrama(nome: str, coluna: str) -> Index:
+    return Index(
+        nome, coluna, postgresql_using='gin', postgresql_ops={coluna: 'gin_trgm_ops'}
+    ).ddl_if(dialect='postgresql')
+
 class User(Base):
     __tablename__ = "users"
     id_user = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -53,6 +63,8 @@ class Responsavel(Base):
     __table_args__ = (
         UniqueConstraint('id_proprietario_user', 'cpf', name='uq_proprietario_responsavel_cpf'),
         UniqueConstraint('id_proprietario_user', 'email', name='uq_proprietario_responsavel_email'),
+        Index('ix_responsaveis_proprietario_id', 'id_proprietario_user', 'id_responsavel'), # Paginação por cursor
+        _indice_trigrama('ix_responsaveis_nome_trgm', 'nome_completo'), # Busca textual
     )
 
 
@@ -76,6 +88,8 @@ class Escola(Base):
     __table_args__ = (
         UniqueConstraint('id_proprietario_user', 'nome_escola', name='uq_proprietario_nome_escola'),
         UniqueConstraint('id_proprietario_user', 'cnpj', name='uq_proprietario_cnpj_escola'),
+        Index('ix_escolas_proprietario_id', 'id_proprietario_user', 'id_escola'), # Paginação por cursor
+        _indice_trigrama('ix_escolas_nome_trgm', 'nome_escola'), # Busca textual
     )
 
 
@@ -102,6 +116,7 @@ class Motorista(Base):
         UniqueConstraint('id_proprietario_user', 'cpf', name='uq_proprietario_motorista_cpf'),
         UniqueConstraint('id_proprietario_user', 'cnh_numero', name='uq_proprietario_motorista_cnh'),
         UniqueConstraint('id_proprietario_user', 'email', name='uq_proprietario_motorista_email'),
+        Index('ix_motoristas_proprietario_id', 'id_proprietario_user', 'id_motorista'), # Paginação por cursor
     )
 
 class Van(Base):
@@ -126,6 +141,12 @@ class Van(Base):
 
     __table_args__ = (
         UniqueConstraint('id_proprietario_user', 'placa', name='uq_proprietario_van_placa'),
+        Index('ix_vans_proprietario_id', 'id_proprietario_user', 'id_van'), # Paginação por cursor
+        _indice_trigrama('ix_vans_placa_trgm', 'placa'), # Busca textual
+        Index('ix_vans_proprietario_status', 'id_proprietario_user', 'status_van', 'id_van'), # Filtro ?status_van=
+        # Ordenação da listagem (?sort=placa / ?sort=ano_fabricacao), desempate pela PK
+        Index('ix_vans_proprietario_placa', 'id_proprietario_user', 'placa', 'id_van'),
+        Index('ix_vans_proprietario_ano', 'id_proprietario_user', 'ano_fabricacao', 'id_van'),
     )
 
 
@@ -156,6 +177,16 @@ class Aluno(Base):
     contratos = relationship("ContratoServico", back_populates="aluno", cascade="all, delete-orphan")
     associacoes_rota = relationship("AlunosPorRota", back_populates="aluno", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index('ix_alunos_proprietario_id', 'id_proprietario_user', 'id_aluno'), # Paginação por cursor
+        _indice_trigrama('ix_alunos_nome_trgm', 'nome_completo_aluno'), # Busca textual
+        # Filtros e ordenação da listagem (?id_escola=&status_aluno=&periodo_escolar=&sort=)
+        Index('ix_alunos_proprietario_escola_status', 'id_proprietario_user', 'id_escola', 'status_aluno'),
+        Index('ix_alunos_proprietario_status_periodo', 'id_proprietario_user', 'status_aluno', 'periodo_escolar'),
+        Index('ix_alunos_proprietario_nome', 'id_proprietario_user', 'nome_completo_aluno', 'id_aluno'),
+        Index('ix_alunos_proprietario_nascimento', 'id_proprietario_user', 'data_nascimento', 'id_aluno'),
+    )
+
 
 class Rota(Base):
     __tablename__ = "rotas"
@@ -184,6 +215,11 @@ class Rota(Base):
 
     __table_args__ = (
         UniqueConstraint('id_proprietario_user', 'nome_rota', name='uq_proprietario_nome_rota'),
+        Index('ix_rotas_proprietario_id', 'id_proprietario_user', 'id_rota'), # Paginação por cursor
+        # Filtros da listagem (?ativa=&id_escola_atendida=)
+        Index('ix_rotas_proprietario_escola_ativa', 'id_proprietario_user', 'id_escola_atendida', 'ativa'),
+        Index('ix_rotas_proprietario_ativa', 'id_proprietario_user', 'ativa', 'id_rota'),
+        Index('ix_rotas_proprietario_nome', 'id_proprietario_user', 'nome_rota', 'id_rota'), # Ordenação ?sort=nome_rota
     )
 
 
@@ -230,11 +266,16 @@ class ContratoServico(Base):
     responsavel_financeiro = relationship("Responsavel", back_populates="contratos_financeiros")
     pagamentos = relationship("Pagamento", back_populates="contrato", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index('ix_contratos_servico_proprietario_id', 'id_proprietario_user', 'id_contrato'), # Paginação por cursor
+    )
+
 
 class Pagamento(Base):
     __tablename__ = "pagamentos"
     id_pagamento = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    # id_proprietario_user é implícito através do ContratoServico
+    # Cópia do proprietário do contrato: consultas por tenant não precisam do join com contratos_servico
+    id_proprietario_user = Column(Integer, ForeignKey("users.id_user", ondelete="CASCADE"), nullable=False)
     
     id_contrato = Column(Integer, ForeignKey("contratos_servico.id_contrato"), nullable=False)
     
@@ -253,5 +294,116 @@ class Pagamento(Base):
     observacoes_pagamento = Column(Text)
     data_geracao = Column(DateTime(timezone=True), server_default=func.now())
     data_baixa = Column(DateTime(timezone=True))
+    # Ordem da listagem por contrato já calculada (chave_ordenacao_pagamento), mantida a cada escrita
+    chave_ordenacao = Column(String(9), nullable=False)
+
+    contrato = relationship("ContratoServico", back_populates="pagamentos")
 
-    contrato = relationship("ContratoServico", back_populates="pagamentos")
\ No newline at end of file
+    __table_args__ = (
+        # Listagem por contrato e busca por mês na sincronização do contrato; um pagamento por mês
+        Index('ix_pagamentos_contrato_mes', 'id_contrato', 'mes_referencia', unique=True),
+        Index('ix_pagamentos_status_vencimento', 'status_pagamento', 'data_vencimento'), # Atrasados por status
+        Index('ix_pagamentos_transacao_gateway', 'id_transacao_gateway'), # Conciliação bancária (conciliacao.py)
+        # Listagem paginada por contrato lida na ordem do índice, sem ordenar os pagamentos do contrato
+        Index('ix_pagamentos_contrato_ordenacao', 'id_contrato', 'chave_ordenacao', 'id_pagamento'),
+        # Consultas por tenant (atrasados, resumo, exportação) sem o join com contratos_servico
+        Index('ix_pagamentos_proprietario_status_vencimento', 'id_proprietario_user', 'status_pagamento', 'data_vencimento'),
+        # Pendentes por vencimento: atrasados calculados na leitura e a tarefa de atrasados
+        Index(
+            'ix_pagamentos_pendentes_vencimento', 'data_vencimento',
+            postgresql_where=text("status_pagamento = 'Pendente'"), sqlite_where=text("status_pagamento = 'Pendente'")
+        ),
+    )
+
+    # Colunas que `?fields=` precisa carregar para os campos calculados (fieldsets.aplicar_campos)
+    colunas_dos_campos_calculados = {"status_efetivo": ("status_pagamento", "data_vencimento")}
+
+    # O status 'Atrasado' é derivado na leitura: um pagamento 'Pendente' vencido já é atrasado,
+    # mesmo que a tarefa de atrasados (que grava o status) ainda não tenha rodado.
+    @hybrid_property
+    def status_efetivo(self) -> str:
+        if self.status_pagamento == 'Pendente' and self.data_vencimento < datetime.date.today():
+            return 'Atrasado'
+        return self.status_pagamento
+
+    @status_efetivo.inplace.expression
+    @classmethod
+    def _status_efetivo_expression(cls):
+        return case(
+            (and_(cls.status_pagamento == 'Pendente', cls.data_vencimento < datetime.date.today()), 'Atrasado'),
+            else_=cls.status_pagamento,
+        )
+
+    @hybrid_property
+    def esta_atrasado(self) -> bool:
+        return self.status_efetivo == 'Atrasado'
+
+    @esta_atrasado.inplace.expression
+    @classmethod
+    def _esta_atrasado_expression(cls):
+        # Mesmo critério de status_efetivo, escrito como OR para usar ix_pagamentos_pendentes_vencimento
+        return or_(
+            cls.status_pagamento == 'Atrasado',
+            and_(cls.status_pagamento == 'Pendente', cls.data_vencimento < datetime.date.today()),
+        )
+
+
+def chave_ordenacao_pagamento(status_pagamento, data_vencimento, data_pagamento) -> str:
+    """Chave textual da ordem da listagem: não pagos por vencimento, depois pagos do mais recente
+    ao mais antigo, depois os demais status. Empates são resolvidos por id_pagamento."""
+    if status_pagamento in ('Pendente', 'Atrasado'):
+        return '1' + (data_vencimento.strftime('%Y%m%d') if data_vencimento else '00000000')
+    if status_pagamento == 'Pago':
+        if data_pagamento is None:
+            return '299999999' # Pagos sem data ficam no fim do grupo
+        # Data invertida: a ordem crescente da chave é a ordem decrescente da data
+        return '2' + f"{99999999 - int(data_pagamento.strftime('%Y%m%d')):08d}"
+    return '300000000'
+
+
+@event.listens_for(Pagamento, "before_insert")
+@event.listens_for(Pagamento, "before_update")
+def _atualizar_chave_ordenacao(mapper, connection, pagamento: Pagamento) -> None:
+    pagamento.chave_ordenacao = chave_ordenacao_pagamento(
+        pagamento.status_pagamento, pagamento.data_vencimento, pagamento.data_pagamento
+    )
+
+
+class VersaoEntidade(Base):
+    # Contador de alterações por proprietário e tipo de entidade ('alunos', 'rotas', 'pagamentos'...).
+    # Incrementado na mesma transação de cada escrita; usado para gerar ETags das listagens.
+    __tablename__ = "versoes_entidades"
+    id_proprietario_user = Column(Integer, ForeignKey("users.id_user", ondelete="CASCADE"), primary_key=True)
+    entidade = Column(String(50), primary_key=True)
+    versao = Column(Integer, nullable=False, default=0)
+
+
+class ResumoFinanceiroMensal(Base):
+    # Totais de pagamentos por proprietário, mês de referência e status gravado.
+    # Mantido incrementalmente na mesma transação das escritas (resumo_financeiro.py).
+    __tablename__ = "resumos_financeiros_mensais"
+    id_proprietario_user = Column(Integer, ForeignKey("users.id_user", ondelete="CASCADE"), primary_key=True)
+    mes_referencia = Column(String(7), primary_key=True) # 'AAAA-MM'
+    status_pagamento = Column(String(50), primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
+    valor_nominal_total = Column(Numeric(12,2), nullable=False, default=0)
+    valor_pago_total = Column(Numeric(12,2), nullable=False, default=0)
+
+
+class ExecucaoTarefa(Base):
+    # Histórico das tarefas agendadas (task_router): uma linha por execução, atualizada a cada lote
+    __tablename__ = "execucoes_tarefas"
+    id_execucao = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    tarefa = Column(String(100), nullable=False) # Ex: 'pagamentos_atrasados'
+    status_execucao = Column(String(20), nullable=False, default='Executando') # Executando, Concluída, Falhou
+    iniciada_em = Column(DateTime(timezone=True), nullable=False)
+    finalizada_em = Column(DateTime(timezone=True))
+    duracao_ms = Column(Integer)
+    lotes_processados = Column(Integer, nullable=False, default=0)
+    registros_atualizados = Column(Integer, nullable=False, default=0)
+    ultimo_id_processado = Column(Integer) # Até onde a execução chegou (diagnóstico)
+    erro = Column(Text)
+
+    __table_args__ = (
+        Index('ix_execucoes_tarefas_tarefa_id', 'tarefa', 'id_execucao'), # Histórico por tarefa, mais recentes primeiro
+    )
@@ -7,7 +7,7 @@ from datetime import timedelta
 import schemas # Importa o schemas.py
 import user_crud # Importa o user_crud.py
 import app_models # Importa o pacote app_models
-from core_utils import get_db, verify_password, create_access_token, settings # Importa de core_utils.py
+from core_utils import get_db, verify_password_async, create_access_token, settings # Importa de core_utils.py
 
 router = APIRouter(
     tags=["Autenticação"]
@@ -19,7 +19,9 @@ async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends() # username aqui é o email
 ):
     user = user_crud.get_user_by_email(db, email=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # Devolve a conexão ao pool antes de aguardar o bcrypt; o usuário continua legível (desanexado)
+    db.close()
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
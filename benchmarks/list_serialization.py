@@ -0,0 +1,165 @@
+# benchmarks/list_serialization.py
+"""
+Benchmark da serialização de listagens: caminho rápido (fast_json) x caminho padrão do FastAPI.
+
+Caminho padrão: response_model=List[schema] valida os objetos ORM item a item, gera dicts
+e o JSONResponse codifica com o `json` da stdlib. Caminho rápido: TypeAdapter(List[schema])
+valida a página inteira e serializa direto para bytes no pydantic-core.
+
+Mede só a serialização (objetos ORM já carregados em memória) e, com --http, a requisição
+completa GET /alunos/?limit=N contra um SQLite temporário.
+
+Uso:
+    python benchmarks/list_serialization.py                     # 500 alunos e 500 pagamentos
+    python benchmarks/list_serialization.py --linhas 2000 --repeticoes 50
+    python benchmarks/list_serialization.py --http
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from typing import Callable, List
+
+project_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_dir)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=500, help="Itens por página")
+    parser.add_argument("--repeticoes", type=int, default=30, help="Repetições de cada medição")
+    parser.add_argument("--http", action="store_true", help="Mede também GET /alunos/ completo (SQLite temporário)")
+    return parser.parse_args()
+
+
+def _medir(funcao: Callable[[], object], repeticoes: int) -> float:
+    funcao() # Aquecimento
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def _alunos(n: int) -> List:
+    import app_models
+    agora = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        app_models.Aluno(
+            id_aluno=i, id_proprietario_user=1, nome_completo_aluno=f"Aluno Benchmark {i}", data_nascimento=datetime.date(2016, 1, 1),
+            id_responsavel_principal=1, id_responsavel_secundario=None, id_escola=1,
+            endereco_embarque_predeterminado=f"Rua {i}, 100 - Centro", turma_serie="3º ano", periodo_escolar="Manhã",
+            observacoes_medicas=None, foto_aluno_url=None, status_aluno="Ativo", data_cadastro=agora,
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def _pagamentos(n: int) -> List:
+    import app_models
+    agora = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        app_models.Pagamento(
+            id_pagamento=i, id_contrato=1, mes_referencia="2026-10", ano_referencia=2026, data_vencimento=datetime.date(2026, 10, 10),
+            valor_nominal=Decimal("250.75"), valor_desconto=Decimal("0.00"), valor_acrescimo=Decimal("0.00"), valor_pago=None,
+            data_pagamento=None, metodo_pagamento=None, status_pagamento="Pendente", id_transacao_gateway=None,
+            link_boleto_comprovante=None, observacoes_pagamento=None, data_geracao=agora, data_baixa=None,
+        )
+        for i in range(1, n + 1)
+    ]
+
+
+def benchmark_serializacao(args) -> None:
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+
+    import fast_json
+    import schemas
+
+    for nome, schema, itens in (("alunos", schemas.Aluno, _alunos(args.linhas)), ("pagamentos", schemas.Pagamento, _pagamentos(args.linhas))):
+        field = create_model_field(name="Response", type_=List[schema], mode="serialization")
+
+        def caminho_padrao():
+            conteudo = asyncio.run(serialize_response(field=field, response_content=itens))
+            return JSONResponse(conteudo).body
+
+        def caminho_rapido():
+            return fast_json.serializar_lista(itens, schema)
+
+        padrao = _medir(caminho_padrao, args.repeticoes)
+        rapido = _medir(caminho_rapido, args.repeticoes)
+        print(
+            f"{nome} ({args.linhas} itens): padrão {padrao * 1000:.2f} ms | rápido {rapido * 1000:.2f} ms "
+            f"| {padrao / rapido:.1f}x"
+        )
+
+
+async def benchmark_http(args) -> None:
+    import httpx
+    import core_utils
+    import fieldsets
+    from app_models import Base
+    from main import app
+
+    Base.metadata.create_all(bind=core_utils.engine)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        email, password = "bench_lista@example.com", "bench_password"
+        await client.post("/users/register", json={"email": email, "password": password})
+        token = (await client.post("/token", data={"username": email, "password": password})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        escola = (await client.post("/escolas/", headers=headers, json={"nome_escola": "Escola Bench", "endereco_completo": "Rua Bench"})).json()
+        responsavel = (await client.post("/responsaveis/", headers=headers, json={
+            "nome_completo": "Responsável Bench", "cpf": "12345678901", "email": "resp_bench@example.com",
+            "telefone_principal": "4899999999", "endereco_completo": "Rua Bench"
+        })).json()
+        for inicio in range(0, args.linhas, 1000):
+            lote = [{
+                "nome_completo_aluno": f"Aluno Bench {i}", "data_nascimento": "2016-01-01",
+                "id_responsavel_principal": responsavel["id_responsavel"], "id_escola": escola["id_escola"],
+                "endereco_embarque_predeterminado": f"Rua {i}", "periodo_escolar": "Manhã"
+            } for i in range(inicio, min(inicio + 1000, args.linhas))]
+            await client.post("/alunos/bulk", headers=headers, json=lote)
+
+        url = f"/alunos/?limit={args.linhas}"
+
+        async def medir() -> float:
+            await client.get(url, headers=headers)
+            tempos = []
+            for _ in range(args.repeticoes):
+                inicio = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                tempos.append(time.perf_counter() - inicio)
+                assert response.status_code == 200, response.text
+            return statistics.median(tempos)
+
+        rapido = await medir()
+        # Caminho antigo: devolve os objetos ORM para o response_model do endpoint validar
+        original = fieldsets.resposta_lista
+        fieldsets.resposta_lista = lambda itens, schema, response: itens
+        try:
+            padrao = await medir()
+        finally:
+            fieldsets.resposta_lista = original
+        print(f"GET {url}: padrão {padrao * 1000:.2f} ms | rápido {rapido * 1000:.2f} ms | {padrao / rapido:.1f}x")
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # O banco precisa estar definido antes de importar core_utils
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench_lista.db')}"
+        benchmark_serializacao(args)
+        if args.http:
+            asyncio.run(benchmark_http(args))
+
+
+if __name__ == "__main__":
+    main()
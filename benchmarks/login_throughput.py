@@ -0,0 +1,100 @@
+# benchmarks/login_throughput.py
+"""
+Benchmark de throughput de login (/token) com logins concorrentes.
+
+Mede o tempo total de N logins simultâneos e o maior intervalo entre chamadas a um
+endpoint leve ("/") feitas a cada 10 ms durante a rajada. Com o bcrypt no event loop
+esse intervalo cresce para a duração de vários hashes (o loop fica travado).
+
+Uso:
+    python benchmarks/login_throughput.py                # bcrypt no pool (comportamento atual)
+    python benchmarks/login_throughput.py --inline       # bcrypt inline no event loop (comportamento antigo)
+    python benchmarks/login_throughput.py --logins 50 --workers 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+project_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_dir)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=32, help="Número de logins concorrentes")
+    parser.add_argument("--workers", type=int, default=None, help="PASSWORD_HASH_WORKERS")
+    parser.add_argument("--executor", choices=["thread", "process"], default=None, help="PASSWORD_HASH_EXECUTOR")
+    parser.add_argument("--inline", action="store_true", help="Verifica a senha inline no event loop (antes da mudança)")
+    return parser.parse_args()
+
+
+async def run(args) -> None:
+    import httpx
+    import auth_router
+    import core_utils
+    from app_models import Base
+    from main import app
+
+    if args.workers is not None:
+        core_utils.settings.PASSWORD_HASH_WORKERS = args.workers
+    if args.executor is not None:
+        core_utils.settings.PASSWORD_HASH_EXECUTOR = args.executor
+    if args.inline:
+        async def verify_inline(plain_password: str, hashed_password: str) -> bool:
+            return core_utils.verify_password(plain_password, hashed_password)
+        auth_router.verify_password_async = verify_inline
+
+    Base.metadata.create_all(bind=core_utils.engine)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        email, password = "bench_login@example.com", "bench_password"
+        await client.post("/users/register", json={"email": email, "password": password})
+
+        ping_timestamps = []
+        burst_done = asyncio.Event()
+
+        async def ping_loop():
+            while not burst_done.is_set():
+                await client.get("/")
+                ping_timestamps.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        async def login():
+            response = await client.post("/token", data={"username": email, "password": password})
+            assert response.status_code == 200, response.text
+
+        pinger = asyncio.create_task(ping_loop())
+        inicio = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+        total = time.perf_counter() - inicio
+        burst_done.set()
+        await pinger
+
+    core_utils.shutdown_password_executor()
+
+    modo = "inline (event loop)" if args.inline else f"pool {core_utils.settings.PASSWORD_HASH_EXECUTOR} x{core_utils.settings.PASSWORD_HASH_WORKERS}"
+    print(f"Modo: {modo}")
+    print(f"{args.logins} logins concorrentes em {total:.2f}s -> {args.logins / total:.1f} logins/s")
+    intervalos = [b - a for a, b in zip(ping_timestamps, ping_timestamps[1:])]
+    if intervalos:
+        print(
+            f"GET / durante a rajada: {len(ping_timestamps)} respostas, intervalo mediano "
+            f"{statistics.median(intervalos) * 1000:.1f} ms, maior intervalo {max(intervalos) * 1000:.1f} ms"
+        )
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # O banco precisa estar definido antes de importar core_utils
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, 'bench_login.db')}"
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# busca_crud.py
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import case, func, literal, or_, select
+from sqlalchemy.orm import Session
+
+import app_models
+
+# Busca textual por proprietário. No PostgreSQL usa pg_trgm: o filtro `coluna %> termo`
+# (word_similarity acima do limiar) ou ILIKE '%termo%' é atendido pelos índices GIN
+# gin_trgm_ops, e o ranking é o word_similarity. Nos demais bancos (SQLite nos testes)
+# cai para LIKE com um ranking simples: início do texto > início de palavra > meio.
+
+# tipo -> (modelo, coluna de id, coluna buscada, coluna de detalhe)
+ALVOS_BUSCA: Dict[str, Tuple] = {
+    "alunos": (app_models.Aluno, app_models.Aluno.id_aluno, app_models.Aluno.nome_completo_aluno, app_models.Aluno.turma_serie),
+    "responsaveis": (app_models.Responsavel, app_models.Responsavel.id_responsavel, app_models.Responsavel.nome_completo, app_models.Responsavel.telefone_principal),
+    "escolas": (app_models.Escola, app_models.Escola.id_escola, app_models.Escola.nome_escola, app_models.Escola.endereco_completo),
+    "vans": (app_models.Van, app_models.Van.id_van, app_models.Van.placa, app_models.Van.modelo_veiculo),
+}
+
+
+def _escapar_like(termo: str) -> str:
+    return termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _ranking_postgres(coluna, termo: str):
+    filtro = or_(coluna.op("%>")(termo), coluna.ilike(f"%{_escapar_like(termo)}%", escape="\\"))
+    return filtro, func.word_similarity(termo, coluna)
+
+
+def _ranking_portavel(coluna, termo: str):
+    termo_like = _escapar_like(termo)
+    filtro = coluna.ilike(f"%{termo_like}%", escape="\\")
+    score = case(
+        (coluna.ilike(f"{termo_like}%", escape="\\"), 1.0),
+        (coluna.ilike(f"% {termo_like}%", escape="\\"), 0.8),
+        else_=0.5,
+    )
+    return filtro, score
+
+
+def buscar_por_proprietario(
+    db: Session, proprietario_id: int, termo: str, tipos: Sequence[str], limit: int = 20
+) -> List[Dict]:
+    """Retorna até `limit` resultados somando todos os tipos, do mais ao menos relevante."""
+    ranking = _ranking_postgres if db.get_bind().dialect.name == "postgresql" else _ranking_portavel
+    resultados: List[Dict] = []
+    for tipo in tipos:
+        modelo, coluna_id, coluna_texto, coluna_detalhe = ALVOS_BUSCA[tipo]
+        filtro, score = ranking(coluna_texto, termo)
+        stmt = select(
+            literal(tipo).label("tipo"),
+            coluna_id.label("id"),
+            coluna_texto.label("titulo"),
+            coluna_detalhe.label("detalhe"),
+            score.label("score"),
+        ).where(
+            modelo.id_proprietario_user == proprietario_id,
+            filtro,
+        ).order_by(score.desc(), func.length(coluna_texto), coluna_id).limit(limit)
+        resultados.extend(dict(linha) for linha in db.execute(stmt).mappings())
+    resultados.sort(key=lambda r: (-float(r["score"]), len(r["titulo"]), r["tipo"], r["id"]))
+    return resultados[:limit]
@@ -0,0 +1,40 @@
+# busca_router.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+import schemas
+import busca_crud
+import app_models
+from core_utils import get_read_db, get_current_active_user
+
+router = APIRouter(
+    prefix="/busca",
+    tags=["Busca"],
+    responses={
+        401: {"description": "Não autenticado"},
+    },
+)
+
+@router.get("/", response_model=List[schemas.ResultadoBusca])
+def buscar(
+    q: str = Query(..., min_length=2, max_length=100, description="Termo buscado (nome do aluno, responsável, escola ou placa)"),
+    tipos: Optional[str] = Query(None, description="Tipos separados por vírgula. Padrão: alunos,responsaveis,escolas,vans"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user: app_models.User = Depends(get_current_active_user)
+):
+    """
+    Busca aproximada (tolerante a erros de digitação no PostgreSQL) entre as entidades do operador logado,
+    com os resultados mais relevantes primeiro.
+    """
+    tipos_buscados = [tipo.strip() for tipo in tipos.split(",") if tipo.strip()] if tipos else list(busca_crud.ALVOS_BUSCA)
+    invalidos = [tipo for tipo in tipos_buscados if tipo not in busca_crud.ALVOS_BUSCA]
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"Tipo(s) de busca inválido(s): {', '.join(invalidos)}.")
+    termo = q.strip()
+    if len(termo) < 2:
+        raise HTTPException(status_code=400, detail="Informe ao menos 2 caracteres para a busca.")
+    return busca_crud.buscar_por_proprietario(
+        db, proprietario_id=current_user.id_user, termo=termo, tipos=tipos_buscados, limit=limit
+    )
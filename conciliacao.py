@@ -0,0 +1,191 @@
+# conciliacao.py
+import io
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.orm import Session
+
+import app_models
+import entity_versions
+import pagamento_crud
+import resumo_financeiro
+import schemas
+from csv_import import LinhaCSV, abrir_csv, formatar_erro_validacao
+
+# Conciliação bancária: baixa em lote de pagamentos a partir do extrato/retorno do banco.
+#
+# Aceita CSV (colunas de schemas.LinhaConciliacao) ou OFX (transações <STMTTRN> de crédito,
+# FITID = id_transacao_gateway). Cada linha é casada com um pagamento do operador pela
+# transação do gateway (ix_pagamentos_transacao_gateway) ou pelo contrato + mês de referência
+# (ix_pagamentos_contrato_mes), com um SELECT por critério para o arquivo inteiro. As baixas
+# seguem pagamento_crud.aplicar_regras_de_baixa e são gravadas num único UPDATE em lote
+# (executemany por PK), na mesma transação do resumo mensal e das versões (ETags).
+
+TAMANHO_MAXIMO_ARQUIVO = 5 * 1024 * 1024
+MAX_LINHAS_CONCILIACAO = 5000
+STATUS_SEM_BAIXA = {"Pago": "Pagamento já está Pago.", "Cancelado": "Pagamento está Cancelado."}
+
+_TRANSACAO_OFX = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.IGNORECASE | re.DOTALL)
+_CAMPO_OFX = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+
+class ArquivoInvalido(ValueError):
+    pass
+
+
+def _normalizar_valor(valor: str) -> str:
+    # Planilhas em pt-BR: "1.234,56" -> "1234.56"
+    if "," in valor:
+        return valor.replace(".", "").replace(",", ".")
+    return valor
+
+
+def _ler_csv(conteudo: bytes) -> List[LinhaCSV]:
+    try:
+        reader = abrir_csv(io.BytesIO(conteudo))
+        cabecalho = {coluna.strip().lower() for coluna in reader.fieldnames or []}
+        if "valor_pago" not in cabecalho or not (
+            "id_transacao_gateway" in cabecalho or {"id_contrato", "mes_referencia"} <= cabecalho
+        ):
+            raise ArquivoInvalido(
+                "O CSV precisa da coluna valor_pago e de id_transacao_gateway ou id_contrato + mes_referencia."
+            )
+        linhas = []
+        for valores in reader:
+            limpos = {
+                chave.strip().lower(): valor.strip()
+                for chave, valor in valores.items()
+                if chave and isinstance(valor, str) and valor.strip()
+            }
+            if "valor_pago" in limpos:
+                limpos["valor_pago"] = _normalizar_valor(limpos["valor_pago"])
+            linhas.append((reader.line_num, limpos))
+        return linhas
+    except UnicodeDecodeError:
+        raise ArquivoInvalido("O arquivo deve estar codificado em UTF-8.")
+
+
+def _ler_ofx(texto: str) -> List[LinhaCSV]:
+    linhas = []
+    for posicao, bloco in enumerate(_TRANSACAO_OFX.findall(texto), start=1):
+        campos = {tag.upper(): valor.strip() for tag, valor in _CAMPO_OFX.findall(bloco)}
+        valor = _normalizar_valor(campos.get("TRNAMT", ""))
+        if valor.startswith("-"):
+            continue # Débitos do extrato não são recebimentos
+        linha = {"id_transacao_gateway": campos.get("FITID", ""), "valor_pago": valor}
+        data = campos.get("DTPOSTED", "")[:8]
+        if len(data) == 8:
+            linha["data_pagamento"] = f"{data[:4]}-{data[4:6]}-{data[6:]}"
+        linhas.append((posicao, {chave: valor for chave, valor in linha.items() if valor}))
+    return linhas
+
+
+def ler_arquivo(conteudo: bytes) -> List[LinhaCSV]:
+    """Lê o CSV ou OFX enviado. Levanta ArquivoInvalido com a mensagem para o cliente."""
+    inicio = conteudo[:1024].lstrip().upper()
+    if inicio.startswith(b"OFXHEADER") or b"<OFX>" in inicio:
+        try:
+            texto = conteudo.decode("utf-8")
+        except UnicodeDecodeError:
+            texto = conteudo.decode("cp1252") # OFX de bancos brasileiros costuma vir em CHARSET:1252
+        linhas = _ler_ofx(texto)
+    else:
+        linhas = _ler_csv(conteudo)
+    if len(linhas) > MAX_LINHAS_CONCILIACAO:
+        raise ArquivoInvalido(f"O arquivo tem mais de {MAX_LINHAS_CONCILIACAO} linhas; divida-o em partes.")
+    return linhas
+
+
+def _item(numero_linha: int, linha: schemas.LinhaConciliacao, motivo: Optional[str] = None, id_pagamento: Optional[int] = None) -> schemas.ItemConciliacao:
+    return schemas.ItemConciliacao(
+        linha=numero_linha, id_pagamento=id_pagamento, id_transacao_gateway=linha.id_transacao_gateway,
+        id_contrato=linha.id_contrato, mes_referencia=linha.mes_referencia, valor_pago=linha.valor_pago, motivo=motivo,
+    )
+
+
+def conciliar(db: Session, proprietario_id: int, linhas: List[LinhaCSV]) -> schemas.ResultadoConciliacao:
+    resultado = schemas.ResultadoConciliacao(conciliados=[], nao_encontrados=[], conflitos=[], invalidas=[])
+    validas: List[Tuple[int, schemas.LinhaConciliacao]] = []
+    for numero_linha, valores in linhas:
+        try:
+            validas.append((numero_linha, schemas.LinhaConciliacao(**valores)))
+        except ValidationError as exc:
+            resultado.invalidas.append(schemas.ItemConciliacao(
+                linha=numero_linha, id_transacao_gateway=valores.get("id_transacao_gateway"), motivo=formatar_erro_validacao(exc)
+            ))
+
+    pagamento = app_models.Pagamento
+    consulta = select(
+        pagamento.id_pagamento, pagamento.id_transacao_gateway, pagamento.id_contrato, pagamento.mes_referencia,
+        pagamento.status_pagamento, pagamento.valor_nominal, pagamento.valor_pago, pagamento.metodo_pagamento,
+    ).where(pagamento.id_proprietario_user == proprietario_id)\
+        .with_for_update(of=pagamento) # Trava os pagamentos casados até o commit (PostgreSQL)
+
+    transacoes = {linha.id_transacao_gateway for _, linha in validas if linha.id_transacao_gateway}
+    por_transacao: Dict[str, List] = defaultdict(list)
+    if transacoes:
+        for encontrado in db.execute(consulta.where(pagamento.id_transacao_gateway.in_(transacoes))).all():
+            por_transacao[encontrado.id_transacao_gateway].append(encontrado)
+    meses = {
+        (linha.id_contrato, linha.mes_referencia) for _, linha in validas
+        if linha.id_contrato and linha.mes_referencia and linha.id_transacao_gateway not in por_transacao
+    }
+    por_mes = {}
+    if meses:
+        por_mes = {
+            (encontrado.id_contrato, encontrado.mes_referencia): encontrado
+            for encontrado in db.execute(consulta.where(tuple_(pagamento.id_contrato, pagamento.mes_referencia).in_(meses))).all()
+        }
+
+    baixas = []
+    deltas = resumo_financeiro.novos_deltas()
+    linha_da_baixa: Dict[int, int] = {} # id_pagamento -> linha do arquivo que o baixou
+    for numero_linha, linha in validas:
+        candidatos = por_transacao.get(linha.id_transacao_gateway) or []
+        if not candidatos and (linha.id_contrato, linha.mes_referencia) in por_mes:
+            candidatos = [por_mes[(linha.id_contrato, linha.mes_referencia)]]
+        if not candidatos:
+            resultado.nao_encontrados.append(_item(numero_linha, linha))
+            continue
+        if len(candidatos) > 1:
+            resultado.conflitos.append(_item(
+                numero_linha, linha, f"A transação corresponde a {len(candidatos)} pagamentos."
+            ))
+            continue
+        encontrado = candidatos[0]
+        motivo = STATUS_SEM_BAIXA.get(encontrado.status_pagamento)
+        if encontrado.id_pagamento in linha_da_baixa:
+            motivo = f"Pagamento já conciliado pela linha {linha_da_baixa[encontrado.id_pagamento]}."
+        elif linha.id_transacao_gateway and encontrado.id_transacao_gateway not in (None, linha.id_transacao_gateway):
+            motivo = f"Pagamento já vinculado à transação '{encontrado.id_transacao_gateway}'."
+        if motivo:
+            resultado.conflitos.append(_item(numero_linha, linha, motivo, encontrado.id_pagamento))
+            continue
+
+        linha_da_baixa[encontrado.id_pagamento] = numero_linha
+        baixa = pagamento_crud.aplicar_regras_de_baixa({
+            "status_pagamento": "Pago", "valor_pago": linha.valor_pago, "data_pagamento": linha.data_pagamento,
+        })
+        baixas.append({
+            "id_pagamento": encontrado.id_pagamento,
+            "metodo_pagamento": linha.metodo_pagamento or encontrado.metodo_pagamento,
+            "id_transacao_gateway": linha.id_transacao_gateway or encontrado.id_transacao_gateway,
+            # O UPDATE em lote não dispara os eventos do mapper que mantêm a chave da listagem
+            "chave_ordenacao": app_models.chave_ordenacao_pagamento("Pago", None, baixa["data_pagamento"]),
+            **baixa,
+        })
+        chave = (proprietario_id, encontrado.mes_referencia)
+        resumo_financeiro.acumular(deltas, (*chave, encontrado.status_pagamento), -1, encontrado.valor_nominal, encontrado.valor_pago)
+        resumo_financeiro.acumular(deltas, (*chave, "Pago"), 1, encontrado.valor_nominal, linha.valor_pago)
+        resultado.conciliados.append(_item(numero_linha, linha, id_pagamento=encontrado.id_pagamento))
+
+    if baixas:
+        # UPDATE em lote por PK; como não passa pelo flush, resumo e versões são atualizados aqui
+        db.execute(update(pagamento), baixas)
+        resumo_financeiro.aplicar_deltas(db.connection(), deltas)
+        entity_versions.incrementar_versoes(db.connection(), [(proprietario_id, "pagamentos")])
+    db.commit()
+    return resultado
@@ -1,7 +1,9 @@
 # contrato_servico_crud.py
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import extract # Não estamos usando extract diretamente aqui, mas pode ser útil
-from typing import List, Optional, Tuple, Union
+from typing import Any, List, Optional, Tuple, Union
 from datetime import date, timedelta # datetime adicionado para clareza no Pagamento
 from decimal import Decimal
 import datetime
@@ -10,9 +12,13 @@ import datetime
 # from dateutil.relativedelta import relativedelta
 
 import app_models # Seus modelos SQLAlchemy
+from expand import Expansao, aplicar_expand
+from fieldsets import aplicar_campos
+from pagination import paginar_por_chave
 import schemas    # Seus schemas Pydantic
 import aluno_crud # Necessário para validar o aluno
 import responsavel_crud # Necessário para validar o responsável
+import resumo_financeiro # Registra o listener que mantém o resumo mensal dos pagamentos gerados aqui
 
 # Função auxiliar para calcular o próximo mês
 def proximo_mes(ano: int, mes: int) -> Tuple[int, int]:
@@ -93,6 +99,7 @@ def create_contrato_servico(
             status_inicial_pagamento = "Atrasado"
 
         novo_pagamento_obj = app_models.Pagamento(
+            id_proprietario_user=proprietario_id,
             mes_referencia=f"{ano_ref:04d}-{mes_ref_int:02d}",
             ano_referencia=ano_ref,
             data_vencimento=data_venc,
@@ -117,20 +124,37 @@ def create_contrato_servico(
         return "ERRO_INESPERADO_AO_SALVAR_CONTRATO_PAGAMENTOS"
 
 
+# Relações aceitas em `?expand=` (ver expand.py)
+EXPANSOES_CONTRATO = {
+    "aluno": Expansao("aluno", "aluno_obj", "alunos"),
+    "responsavel": Expansao("responsavel_financeiro", "responsavel_financeiro_obj", "responsaveis"),
+}
+
 def get_contratos_servico_por_proprietario(
-    db: Session, proprietario_id: int, skip: int = 0, limit: int = 100
+    db: Session, proprietario_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+    campos: Optional[List[str]] = None, expandir: Optional[List[str]] = None
 ) -> List[app_models.ContratoServico]:
-    return db.query(app_models.ContratoServico).filter(
+    query = db.query(app_models.ContratoServico).filter(
         app_models.ContratoServico.id_proprietario_user == proprietario_id # Nome padronizado
-    ).offset(skip).limit(limit).all()
+    )
+    query = aplicar_campos(query, app_models.ContratoServico, campos)
+    query = aplicar_expand(query, app_models.ContratoServico, EXPANSOES_CONTRATO, expandir)
+    return paginar_por_chave(query, app_models.ContratoServico.id_contrato, skip=skip, limit=limit, after_id=after_id).all()
+
+async def get_contratos_servico_por_proprietario_async(
+    db: AsyncSession, proprietario_id: int, **opcoes: Any
+) -> List[app_models.ContratoServico]:
+    """Variante para AsyncSession (GET /contratos/): a mesma consulta e os mesmos parâmetros, via run_sync."""
+    return await db.run_sync(get_contratos_servico_por_proprietario, proprietario_id=proprietario_id, **opcoes)
 
 def get_contrato_servico_por_id_e_proprietario(
-    db: Session, contrato_id: int, proprietario_id: int
+    db: Session, contrato_id: int, proprietario_id: int, expandir: Optional[List[str]] = None
 ) -> Optional[app_models.ContratoServico]:
-    return db.query(app_models.ContratoServico).filter(
+    query = db.query(app_models.ContratoServico).filter(
         app_models.ContratoServico.id_contrato == contrato_id,
-        app_models.ContratoServico.id_proprietario_user == proprietario_id # Nome padronizado
-    ).first()
+        app_models.ContratoServico.id_proprietario_user == proprietario_id
+    )
+    return aplicar_expand(query, app_models.ContratoServico, EXPANSOES_CONTRATO, expandir).first()
 
 def update_contrato_servico(
     db: Session, contrato_id: int, contrato_update_data: schemas.ContratoServicoUpdate, proprietario_id: int
@@ -253,18 +277,18 @@ def update_contrato_servico(
             else: 
                 mes_iterador_para_novos = date(data_inicio_contrato.year, data_inicio_contrato.month, 1)
 
+            # Meses que já têm pagamento em qualquer status (inclusive Pago/Cancelado), via ix_pagamentos_contrato_mes:
+            # o índice é único, então um mês existente não pode ser gerado de novo
+            meses_existentes = set(db.scalars(
+                select(app_models.Pagamento.mes_referencia).where(app_models.Pagamento.id_contrato == db_contrato.id_contrato)
+            ))
+
             novos_pagamentos_para_adicionar_na_sessao = []
             while mes_iterador_para_novos <= data_fim_efetiva_para_pagamentos:
                 ano_ref = mes_iterador_para_novos.year
                 mes_ref_int = mes_iterador_para_novos.month
                 
-                # Verifica se já existe um pagamento para este mes_referencia (dos mantidos)
-                # para não criar duplicados se a lógica de deleção/manutenção não foi perfeita.
-                # Esta é uma segurança extra.
-                ja_existe_para_este_mes = any(
-                    p.mes_referencia == f"{ano_ref:04d}-{mes_ref_int:02d}" for p in pagamentos_a_manter_ou_atualizar
-                )
-                if ja_existe_para_este_mes:
+                if f"{ano_ref:04d}-{mes_ref_int:02d}" in meses_existentes:
                     ano_ref, mes_ref_int = proximo_mes(ano_ref, mes_ref_int)
                     mes_iterador_para_novos = date(ano_ref, mes_ref_int, 1)
                     continue
@@ -283,6 +307,7 @@ def update_contrato_servico(
 
                 novo_pagamento_obj = app_models.Pagamento(
                     id_contrato=db_contrato.id_contrato, 
+                    id_proprietario_user=db_contrato.id_proprietario_user,
                     mes_referencia=f"{ano_ref:04d}-{mes_ref_int:02d}",
                     ano_referencia=ano_ref,
                     data_vencimento=data_venc,
@@ -320,4 +345,4 @@ def delete_contrato_servico(db: Session, contrato_id: int, proprietario_id: int)
     # no relacionamento ContratoServico.pagamentos no modelo SQLAlchemy.
     db.delete(db_contrato)
     db.commit()
-    return db_contrato # Retorna o objeto deletado (desanexado da sessão)
\ No newline at end of file
+    return db_contrato # Retorna o objeto deletado (desanexado da sessão)
@@ -1,12 +1,17 @@
 # contrato_servico_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import schemas
 import contrato_servico_crud
 import app_models
-from core_utils import get_db, get_current_active_user
+from core_utils import get_async_read_db, get_db, get_read_db, get_current_active_user
+from entity_versions import etag_condicional
+from expand import item_expandido, parse_expand, resposta_expandida
+from fieldsets import parse_fields, resposta_com_campos
+from pagination import decode_cursor, set_next_cursor
 
 router = APIRouter(
     prefix="/contratos",
@@ -43,29 +48,40 @@ def create_novo_contrato_servico(
     # Não precisamos mais checar 'if not created_contrato' se o CRUD sempre retorna obj ou string de erro.
     return created_contrato
 
-@router.get("/", response_model=List[schemas.ContratoServico])
-def read_meus_contratos_servico(
-    skip: int = 0, limit: int = 100,
-    db: Session = Depends(get_db),
+@router.get("/", response_model=List[schemas.ContratoServico], dependencies=[Depends(etag_condicional("contratos", expansoes=contrato_servico_crud.EXPANSOES_CONTRATO, assincrono=True))])
+async def read_meus_contratos_servico(
+    request: Request, response: Response,
+    skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[str] = None,
+    expand: Optional[str] = Query(None, description="Objetos relacionados a incluir: aluno,responsavel (resposta no formato ContratoServicoExpandido)"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
-    contratos = contrato_servico_crud.get_contratos_servico_por_proprietario(
-        db, proprietario_id=current_user.id_user, skip=skip, limit=limit
+    campos = parse_fields(fields, schemas.ContratoServico, "id_contrato")
+    expandir = parse_expand(expand, contrato_servico_crud.EXPANSOES_CONTRATO, campos)
+    contratos = await contrato_servico_crud.get_contratos_servico_por_proprietario_async(
+        db, proprietario_id=current_user.id_user, skip=skip, limit=limit, after_id=decode_cursor(cursor), campos=campos,
+        expandir=expandir
     )
-    return contratos
+    set_next_cursor(request, response, contratos, "id_contrato", limit)
+    if expandir:
+        return resposta_expandida(contratos, schemas.ContratoServicoExpandido, contrato_servico_crud.EXPANSOES_CONTRATO, expandir, response)
+    return resposta_com_campos(contratos, schemas.ContratoServico, campos, response)
 
-@router.get("/{contrato_id}", response_model=schemas.ContratoServico)
+@router.get("/{contrato_id}", response_model=schemas.ContratoServico, dependencies=[Depends(etag_condicional("contratos", expansoes=contrato_servico_crud.EXPANSOES_CONTRATO))])
 def read_meu_contrato_servico_especifico(
     contrato_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    expand: Optional[str] = Query(None, description="Objetos relacionados a incluir: aluno,responsavel (resposta no formato ContratoServicoExpandido)"),
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
+    expandir = parse_expand(expand, contrato_servico_crud.EXPANSOES_CONTRATO)
     db_contrato = contrato_servico_crud.get_contrato_servico_por_id_e_proprietario(
-        db, contrato_id=contrato_id, proprietario_id=current_user.id_user
+        db, contrato_id=contrato_id, proprietario_id=current_user.id_user, expandir=expandir
     )
     if db_contrato is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contrato de serviço não encontrado ou não pertence a você")
-    return db_contrato
+    return item_expandido(db_contrato, schemas.ContratoServico, schemas.ContratoServicoExpandido, contrato_servico_crud.EXPANSOES_CONTRATO, expandir, response)
 
 @router.put("/{contrato_id}", response_model=schemas.ContratoServico)
 def update_meu_contrato_servico(
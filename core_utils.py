@@ -1,17 +1,28 @@
 # core_utils.py
+import asyncio
+import hashlib
+import hmac
 import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import ContextVar
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Any
+from typing import Callable, Dict, Optional, Any, Tuple, Union
 
 from dotenv import load_dotenv
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 import app_models
 from pydantic_settings import BaseSettings
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 # Carregar .env
 project_dir = os.path.abspath(os.path.dirname(__file__))
@@ -24,20 +35,340 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "a_very_default_secret")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+    # Cache de usuários autenticados (por processo) usado em get_current_user
+    USER_CACHE_ENABLED: bool = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+    USER_CACHE_TTL_SECONDS: int = int(os.getenv("USER_CACHE_TTL_SECONDS", 60))
+    USER_CACHE_MAX_SIZE: int = int(os.getenv("USER_CACHE_MAX_SIZE", 10000))
+    # Pool para hashing/verificação de senha (bcrypt) fora do event loop
+    PASSWORD_HASH_EXECUTOR: str = os.getenv("PASSWORD_HASH_EXECUTOR", "thread") # "thread" ou "process"
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 2))
+    PASSWORD_HASH_MAX_QUEUE: int = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", 64))
+    # Pool de conexões (valores por worker do gunicorn)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", 30)) # Segundos esperando uma conexão livre
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800)) # Segundos; -1 desativa
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Engine assíncrono (asyncpg/aiosqlite) dos GETs de listagem. Se vazio, derivado de DATABASE_URL
+    ASYNC_DATABASE_URL: Optional[str] = os.getenv("ASYNC_DATABASE_URL")
+    # Réplica de leitura opcional. Após um commit, o cliente lê do primário por READ_YOUR_WRITES_SECONDS
+    DATABASE_READ_URL: Optional[str] = os.getenv("DATABASE_READ_URL")
+    READ_YOUR_WRITES_SECONDS: int = int(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+    # /metrics exige "Authorization: Bearer <METRICS_TOKEN>"; sem ele o endpoint responde 404
+    METRICS_TOKEN: Optional[str] = os.getenv("METRICS_TOKEN")
+    # Máximo de itens aceitos por requisição nos endpoints /bulk
+    BULK_MAX_ITENS: int = int(os.getenv("BULK_MAX_ITENS", 1000))
+    # Agendador interno (scheduler.py): um líder entre workers/réplicas roda as tarefas periódicas
+    SCHEDULER_ENABLED: bool = os.getenv("SCHEDULER_ENABLED", "false").lower() == "true"
+    SCHEDULER_OVERDUE_INTERVAL_SECONDS: int = int(os.getenv("SCHEDULER_OVERDUE_INTERVAL_SECONDS", 3600))
+    SCHEDULER_JITTER_SECONDS: int = int(os.getenv("SCHEDULER_JITTER_SECONDS", 60))
+    SCHEDULER_LOCK_FILE: Optional[str] = os.getenv("SCHEDULER_LOCK_FILE") # Eleição por arquivo (fora do PostgreSQL)
 
 settings = Settings()
 
 # --- 2. Configuração do Banco de Dados para FastAPI ---
-engine = create_engine(settings.DATABASE_URL)
+class PoolStats:
+    """Estatísticas de espera por conexão do pool deste processo (cada worker tem as suas)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "total_wait_seconds": round(self.total_wait_seconds, 6),
+                "avg_wait_seconds": round(self.total_wait_seconds / waits, 6) if waits else 0.0,
+                "max_wait_seconds": round(self.max_wait_seconds, 6),
+            }
+
+pool_stats = PoolStats()
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mede quanto tempo cada checkout esperou por uma conexão livre."""
+    stats = pool_stats
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - inicio, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - inicio)
+        return connection
+
+def get_pool_options(database_url: str) -> Dict[str, Any]:
+    """Parâmetros de pool vindos de Settings. SQLite em memória usa um pool próprio e não aceita esses parâmetros."""
+    if database_url.startswith("sqlite") and (":memory:" in database_url or database_url.split("://", 1)[1] in ("", "/")):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+_engine_pool_options = get_pool_options(settings.DATABASE_URL)
+if _engine_pool_options:
+    _engine_pool_options["poolclass"] = InstrumentedQueuePool
+engine = create_engine(settings.DATABASE_URL, **_engine_pool_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
+def registrar_sessao_da_requisicao(request: Request, db: Union[Session, AsyncSession]) -> None:
+    """Guarda a sessão do endpoint na requisição: get_current_user consulta o usuário nela em vez de
+    ocupar uma segunda conexão do pool."""
+    if getattr(request.state, "sessao_db", None) is None:
+        request.state.sessao_db = db
+
+def get_db(request: Request):
     db = SessionLocal()
+    registrar_sessao_da_requisicao(request, db)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_session_factory() -> Callable[[], Session]:
+    """Fábrica de sessões do primário para o corpo de um StreamingResponse, que roda depois
+    que as sessões das dependências (get_db) já foram fechadas: o gerador abre e fecha a sua."""
+    return SessionLocal
+
+# --- Réplica de leitura ---
+# Endpoints de leitura podem depender de get_read_db em vez de get_db. Sem DATABASE_READ_URL,
+# ou se o cliente fez commit no primário há menos de READ_YOUR_WRITES_SECONDS (marcador abaixo),
+# a sessão vem do primário; caso contrário, da réplica.
+read_pool_stats = PoolStats()
+
+class ReadInstrumentedQueuePool(InstrumentedQueuePool):
+    stats = read_pool_stats
+
+class SessaoReplica(Session):
+    """Sessão ligada à réplica (síncrona ou por trás de uma AsyncSession): não aceita escrita."""
+
+@event.listens_for(SessaoReplica, "before_flush")
+def _bloquear_escrita_na_replica(session, flush_context, instances):
+    raise RuntimeError("Sessão de leitura (réplica) não aceita escrita. Use get_db.")
+
+read_engine = None
+ReadSessionLocal: Optional[sessionmaker] = None
+if settings.DATABASE_READ_URL:
+    _read_engine_pool_options = get_pool_options(settings.DATABASE_READ_URL)
+    if _read_engine_pool_options:
+        _read_engine_pool_options["poolclass"] = ReadInstrumentedQueuePool
+    read_engine = create_engine(settings.DATABASE_READ_URL, **_read_engine_pool_options)
+    ReadSessionLocal = sessionmaker(class_=SessaoReplica, autocommit=False, autoflush=False, bind=read_engine)
+
+# Read-your-writes entre workers/réplicas da API: o marcador viaja com o cliente. Depois de um
+# commit no primário, a resposta leva um valor assinado (cookie e header) que vale por
+# READ_YOUR_WRITES_SECONDS; enquanto o cliente o reenviar (cookie ou o mesmo header),
+# get_read_db usa o primário, não importa qual processo atenda.
+COOKIE_LEITURA_PRIMARIO = "leitura_primario"
+HEADER_LEITURA_PRIMARIO = "X-Read-Primary"
+
+class _EscritaNaRequisicao:
+    __slots__ = ("houve_commit",)
+
+    def __init__(self):
+        self.houve_commit = False
+
+# Compartilhado com o threadpool como em request_metrics: o listener marca, o middleware lê
+_escrita_na_requisicao: ContextVar[Optional[_EscritaNaRequisicao]] = ContextVar("escrita_na_requisicao", default=None)
+
+def _assinar_marcador(expira_em: int) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), f"leitura_primario:{expira_em}".encode(), hashlib.sha256).hexdigest()[:32]
+
+def criar_marcador_leitura_primario() -> str:
+    expira_em = int(time.time()) + settings.READ_YOUR_WRITES_SECONDS
+    return f"{expira_em}.{_assinar_marcador(expira_em)}"
+
+def headers_leitura_primario() -> list:
+    """Set-Cookie e X-Read-Primary com um marcador novo, no formato de headers ASGI."""
+    marcador = criar_marcador_leitura_primario()
+    cookie = (
+        f"{COOKIE_LEITURA_PRIMARIO}={marcador}; Max-Age={settings.READ_YOUR_WRITES_SECONDS}; "
+        "Path=/; HttpOnly; Secure; SameSite=Lax"
+    )
+    return [
+        (b"set-cookie", cookie.encode("latin-1")),
+        (HEADER_LEITURA_PRIMARIO.lower().encode("latin-1"), marcador.encode("latin-1")),
+    ]
+
+def marcar_leitura_primario(response: Response) -> None:
+    """Para respostas em streaming que gravam no corpo: os commits acontecem depois que os headers
+    saíram, então o middleware não os vê. O marcador vai no início da resposta."""
+    if ReadSessionLocal is not None:
+        response.raw_headers.extend(headers_leitura_primario())
+
+def marcador_leitura_primario_valido(valor: Optional[str]) -> bool:
+    if not valor:
+        return False
+    expira_em, _, assinatura = valor.partition(".")
+    if not expira_em.isdigit() or not hmac.compare_digest(assinatura, _assinar_marcador(int(expira_em))):
+        return False
+    return int(expira_em) >= time.time()
+
+@event.listens_for(SessionLocal, "after_commit")
+def _registrar_escrita_na_requisicao(session):
+    escrita = _escrita_na_requisicao.get()
+    if escrita is not None:
+        escrita.houve_commit = True
+
+class ReadYourWritesMiddleware:
+    """Após um commit no primário durante a requisição, devolve o marcador de leitura no primário."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or ReadSessionLocal is None:
+            await self.app(scope, receive, send)
+            return
+
+        escrita = _EscritaNaRequisicao()
+        token = _escrita_na_requisicao.set(escrita)
+
+        async def send_com_marcador(message):
+            if message["type"] == "http.response.start" and escrita.houve_commit:
+                message = {**message, "headers": list(message.get("headers", [])) + headers_leitura_primario()}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_com_marcador)
+        finally:
+            _escrita_na_requisicao.reset(token)
+
+def _leitura_no_primario(request: Request) -> bool:
+    marcador = request.cookies.get(COOKIE_LEITURA_PRIMARIO) or request.headers.get(HEADER_LEITURA_PRIMARIO)
+    return marcador_leitura_primario_valido(marcador)
+
+def get_read_session_factory(request: Request) -> Callable[[], Session]:
+    """Como get_session_factory, mas para leituras: réplica ou primário pelas mesmas regras de get_read_db."""
+    if ReadSessionLocal is not None and not _leitura_no_primario(request):
+        return ReadSessionLocal
+    return SessionLocal
+
+def get_read_db(request: Request):
+    session_factory = get_read_session_factory(request)
+    db = session_factory()
+    db.info["replica"] = session_factory is ReadSessionLocal
+    registrar_sessao_da_requisicao(request, db)
     try:
         yield db
     finally:
         db.close()
 
+# --- Engine assíncrono ---
+# Os GETs de listagem mais acessados são `async def` e consultam por AsyncSession (asyncpg no
+# PostgreSQL, aiosqlite no SQLite): enquanto esperam o banco, não ocupam uma thread do threadpool
+# do Starlette. Pool com os mesmos parâmetros de Settings e mesma regra de réplica/read-your-writes.
+async_pool_stats = PoolStats()
+async_read_pool_stats = PoolStats()
+
+class AsyncInstrumentedQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    stats = async_pool_stats
+
+class AsyncReadInstrumentedQueuePool(AsyncInstrumentedQueuePool):
+    stats = async_read_pool_stats
+
+def get_async_database_url(database_url: str) -> str:
+    """Converte a URL síncrona para o driver assíncrono equivalente."""
+    if database_url.startswith(("postgresql://", "postgresql+psycopg2://", "postgres://")):
+        return "postgresql+asyncpg://" + database_url.split("://", 1)[1]
+    if database_url.startswith(("sqlite://", "sqlite+pysqlite://")):
+        return "sqlite+aiosqlite://" + database_url.split("://", 1)[1]
+    return database_url
+
+def _criar_async_engine(database_url: str, poolclass: type) -> AsyncEngine:
+    pool_options = get_pool_options(database_url)
+    if pool_options:
+        pool_options["poolclass"] = poolclass
+    return create_async_engine(database_url, **pool_options)
+
+async_engine = _criar_async_engine(
+    settings.ASYNC_DATABASE_URL or get_async_database_url(settings.DATABASE_URL), AsyncInstrumentedQueuePool
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+async_read_engine: Optional[AsyncEngine] = None
+AsyncReadSessionLocal: Optional[async_sessionmaker] = None
+if settings.DATABASE_READ_URL:
+    async_read_engine = _criar_async_engine(get_async_database_url(settings.DATABASE_READ_URL), AsyncReadInstrumentedQueuePool)
+    AsyncReadSessionLocal = async_sessionmaker(
+        bind=async_read_engine, sync_session_class=SessaoReplica, autoflush=False, expire_on_commit=False
+    )
+
+async def get_async_db(request: Request):
+    async with AsyncSessionLocal() as db:
+        registrar_sessao_da_requisicao(request, db)
+        yield db
+
+def get_async_read_session_factory(request: Request) -> Callable[[], AsyncSession]:
+    """Réplica assíncrona, ou o primário se não houver réplica ou o cliente tiver o marcador de read-your-writes."""
+    if AsyncReadSessionLocal is not None and not _leitura_no_primario(request):
+        return AsyncReadSessionLocal
+    return AsyncSessionLocal
+
+async def get_async_read_db(request: Request):
+    """Versão assíncrona de get_read_db."""
+    session_factory = get_async_read_session_factory(request)
+    async with session_factory() as db:
+        db.info["replica"] = session_factory is AsyncReadSessionLocal
+        registrar_sessao_da_requisicao(request, db)
+        yield db
+
+async def dispose_async_engines() -> None:
+    await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
+
+def _describe_pool(pool, stats: PoolStats) -> Dict[str, Any]:
+    metrics: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics.update({
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    metrics["wait"] = stats.snapshot()
+    return metrics
+
+def get_pool_metrics() -> Dict[str, Any]:
+    """Estado atual dos pools deste worker (pid) e estatísticas de espera acumuladas."""
+    metrics: Dict[str, Any] = {
+        "pid": os.getpid(),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+    metrics.update(_describe_pool(engine.pool, pool_stats))
+    if read_engine is not None:
+        metrics["read_replica"] = _describe_pool(read_engine.pool, read_pool_stats)
+    metrics["async"] = _describe_pool(async_engine.pool, async_pool_stats)
+    if async_read_engine is not None:
+        metrics["async_read_replica"] = _describe_pool(async_read_engine.pool, async_read_pool_stats)
+    return metrics
+
 # --- 3. Segurança: Hashing de Senha ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -47,6 +378,66 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# bcrypt custa ~100-300 ms de CPU. Para não travar o event loop (login é async), as operações
+# rodam em um pool limitado. Se houver mais jobs que PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE,
+# a requisição é recusada com 503 em vez de acumular uma fila sem limite.
+_password_executor: Optional[Executor] = None
+_password_executor_lock = threading.Lock()
+_password_jobs_in_flight = 0
+
+def _get_password_executor() -> Executor:
+    global _password_executor
+    with _password_executor_lock:
+        if _password_executor is None:
+            if settings.PASSWORD_HASH_EXECUTOR == "process":
+                _password_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+            else:
+                _password_executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+                )
+        return _password_executor
+
+def shutdown_password_executor() -> None:
+    global _password_executor
+    with _password_executor_lock:
+        if _password_executor is not None:
+            _password_executor.shutdown(wait=False, cancel_futures=True)
+            _password_executor = None
+
+def _release_password_job(_: Future) -> None:
+    global _password_jobs_in_flight
+    with _password_executor_lock:
+        _password_jobs_in_flight -= 1
+
+def _submit_password_job(fn, *args) -> Future:
+    global _password_jobs_in_flight
+    executor = _get_password_executor()
+    with _password_executor_lock:
+        if _password_jobs_in_flight >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado processando autenticações. Tente novamente em instantes.",
+                headers={"Retry-After": "1"},
+            )
+        _password_jobs_in_flight += 1
+    try:
+        future = executor.submit(fn, *args)
+    except Exception:
+        _release_password_job(None)
+        raise
+    future.add_done_callback(_release_password_job)
+    return future
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.wrap_future(_submit_password_job(verify_password, plain_password, hashed_password))
+
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit_password_job(get_password_hash, password))
+
+def get_password_hash_pooled(password: str) -> str:
+    """Versão síncrona (para handlers `def`, que já rodam no threadpool) que respeita o mesmo limite do pool."""
+    return _submit_password_job(get_password_hash, password).result()
+
 # --- 4. Segurança: JWT (Tokens) ---
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token") # O endpoint de login será /token
 
@@ -67,12 +458,62 @@ def decode_access_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
-# --- 5. Dependência para obter usuário atual ---
+# --- 5. Cache de usuários autenticados ---
+# Evita uma ida ao banco por requisição só para carregar o usuário do token.
+# Chave: (id_user, token). Os objetos guardados são desanexados da sessão (expunge),
+# então não expiram quando o handler faz commit na sessão da requisição.
+_user_cache: Dict[Tuple[int, str], Tuple[float, app_models.User]] = {}
+_user_cache_lock = threading.Lock()
+
+def get_cached_user(user_id: int, token: str) -> Optional[app_models.User]:
+    with _user_cache_lock:
+        entry = _user_cache.get((user_id, token))
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del _user_cache[(user_id, token)]
+            return None
+        return user
+
+def cache_user(user_id: int, token: str, user: app_models.User) -> None:
+    now = time.monotonic()
+    with _user_cache_lock:
+        if len(_user_cache) >= settings.USER_CACHE_MAX_SIZE:
+            # Remove primeiro as entradas expiradas; se ainda estiver cheio, descarta as mais antigas
+            for key in [k for k, (exp, _) in _user_cache.items() if exp < now]:
+                del _user_cache[key]
+            while len(_user_cache) >= settings.USER_CACHE_MAX_SIZE:
+                del _user_cache[next(iter(_user_cache))]
+        _user_cache[(user_id, token)] = (now + settings.USER_CACHE_TTL_SECONDS, user)
+
+def invalidate_user_cache(user_id: int) -> None:
+    """Remove todas as entradas (de qualquer token) do usuário. Chamado pelo user_crud ao alterar um usuário."""
+    with _user_cache_lock:
+        for key in [k for k in _user_cache if k[0] == user_id]:
+            del _user_cache[key]
+
+def clear_user_cache() -> None:
+    with _user_cache_lock:
+        _user_cache.clear()
+
+# --- 6. Dependência para obter usuário atual ---
+async def _buscar_usuario(db: Union[Session, AsyncSession], user_id: int) -> Optional[app_models.User]:
+    import user_crud
+    if isinstance(db, AsyncSession):
+        return await user_crud.get_user_by_id_async(db, user_id=user_id)
+    return await run_in_threadpool(user_crud.get_user_by_id, db, user_id=user_id)
+
 async def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
+    request: Request,
+    fabrica_leitura: Callable[[], AsyncSession] = Depends(get_async_read_session_factory),
+    token: str = Depends(oauth2_scheme)
 ) -> app_models.User:
+    # O usuário é lido na sessão que o endpoint já abriu (as dependências de sessão, declaradas antes
+    # de current_user, a registram na requisição): uma conexão por requisição, não duas. Endpoints sem
+    # sessão usam uma de leitura só para esta consulta, fechada em seguida (em respostas em streaming
+    # as dependências só terminam depois do corpo).
     
-    import user_crud
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível validar as credenciais",
@@ -94,9 +535,34 @@ async def get_current_user(
         # Mas para o exemplo, vamos assumir que 'sub' é o user.id_user
         raise credentials_exception 
 
-    user = user_crud.get_user_by_id(db, user_id=user_id)
+    if settings.USER_CACHE_ENABLED:
+        cached_user = get_cached_user(user_id, token)
+        if cached_user is not None:
+            return cached_user
+
+    db = getattr(request.state, "sessao_db", None)
+    if db is not None:
+        user = await _buscar_usuario(db, user_id)
+        replica = db.info.get("replica")
+        if user is not None: # Desanexado: um commit do handler não o expira
+            db.expunge(user)
+    else:
+        async with fabrica_leitura() as db_leitura:
+            user = await _buscar_usuario(db_leitura, user_id)
+            replica = fabrica_leitura is AsyncReadSessionLocal
+            if user is not None:
+                db_leitura.expunge(user)
+    if user is None and replica:
+        # Usuário recém-criado que ainda não chegou à réplica
+        async with AsyncSessionLocal() as db_primario:
+            user = await _buscar_usuario(db_primario, user_id)
+            if user is not None:
+                db_primario.expunge(user)
     if user is None:
         raise credentials_exception
+
+    if settings.USER_CACHE_ENABLED:
+        cache_user(user_id, token, user)
     return user
 
 async def get_current_active_user(
@@ -104,4 +570,11 @@ async def get_current_active_user(
 ) -> app_models.User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Usuário inativo")
+    return current_user
+
+async def get_current_active_superuser(
+    current_user: app_models.User = Depends(get_current_active_user)
+) -> app_models.User:
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso restrito a administradores")
     return current_user
\ No newline at end of file
@@ -0,0 +1,299 @@
+# csv_import.py
+import csv
+import io
+from abc import ABC, abstractmethod
+from typing import Any, Dict, IO, Iterator, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Table, select
+from sqlalchemy.orm import Session
+
+import app_models
+import entity_versions
+import schemas
+
+# Importação de planilhas (CSV) de escolas, responsáveis e alunos para o onboarding de operadores.
+#
+# O arquivo é lido em streaming (csv.DictReader) e processado em lotes:
+#   1. cada linha é validada contra o schema *Create existente;
+#   2. referências e duplicidades são resolvidas com um SELECT ... IN por lote
+#      (CPF do responsável -> id_responsavel, nome da escola -> id_escola);
+#   3. as linhas válidas são carregadas com COPY no PostgreSQL (psycopg2) ou com
+#      executemany nos demais bancos (SQLite nos testes).
+# Tudo roda em uma transação, com commit no final; linhas inválidas são puladas e reportadas.
+
+TAMANHO_LOTE_IMPORTACAO = 1000
+MAX_ERROS_REPORTADOS = 100
+
+LinhaCSV = Tuple[int, Dict[str, str]] # (número da linha no arquivo, valores)
+
+
+def formatar_erro_validacao(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(parte) for parte in erro['loc'])}: {erro['msg']}" for erro in exc.errors()
+    )
+
+
+def _valor_copy(valor: Any) -> Any:
+    return "" if valor is None else valor # Campo vazio sem aspas = NULL no COPY ... (FORMAT csv)
+
+
+def carregar_linhas(db: Session, tabela: Table, linhas: List[Dict[str, Any]]) -> None:
+    """Insere as linhas na transação da sessão: COPY no PostgreSQL/psycopg2, executemany nos demais."""
+    if not linhas:
+        return
+    conn = db.connection()
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+        colunas = list(linhas[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for linha in linhas:
+            writer.writerow([_valor_copy(linha[coluna]) for coluna in colunas])
+        buffer.seek(0)
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {tabela.name} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+    else:
+        conn.execute(tabela.insert(), linhas)
+
+
+class ImportadorCSV(ABC):
+    """Base dos importadores. Subclasses definem o modelo, as colunas e `preparar_lote`."""
+
+    modelo: Any = None
+    entidade: str = ""
+    colunas_obrigatorias: Tuple[str, ...] = ()
+
+    def __init__(self, db: Session, proprietario_id: int):
+        self.db = db
+        self.proprietario_id = proprietario_id
+
+    @classmethod
+    def colunas_faltando(cls, cabecalho: Optional[List[str]]) -> List[str]:
+        presentes = {coluna.strip().lower() for coluna in cabecalho or []}
+        return [coluna for coluna in cls.colunas_obrigatorias if coluna not in presentes]
+
+    @abstractmethod
+    def preparar_lote(self, linhas: List[LinhaCSV]) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]]]:
+        """Valida um lote; devolve as linhas prontas para o INSERT e os erros (linha, motivo)."""
+
+    def _validar(self, schema: type, numero_linha: int, valores: Dict[str, Any], erros: List[Tuple[int, str]]) -> Optional[BaseModel]:
+        try:
+            return schema(**valores)
+        except ValidationError as exc:
+            erros.append((numero_linha, formatar_erro_validacao(exc)))
+            return None
+
+    def executar(self, reader: csv.DictReader) -> Iterator[Dict[str, Any]]:
+        """Processa o CSV lote a lote, emitindo um evento de progresso por lote e o resumo final."""
+        processadas = importadas = rejeitadas = 0
+        erros_reportados: List[Dict[str, Any]] = []
+        lote: List[LinhaCSV] = []
+
+        def _processar(lote: List[LinhaCSV]) -> None:
+            nonlocal importadas, rejeitadas
+            validas, erros = self.preparar_lote(lote)
+            carregar_linhas(self.db, self.modelo.__table__, validas)
+            importadas += len(validas)
+            rejeitadas += len(erros)
+            for numero_linha, erro in erros:
+                if len(erros_reportados) < MAX_ERROS_REPORTADOS:
+                    erros_reportados.append({"linha": numero_linha, "erro": erro})
+
+        for valores in reader:
+            # Células vazias viram "ausentes" para que os defaults do schema se apliquem
+            limpos = {
+                chave.strip().lower(): valor.strip()
+                for chave, valor in valores.items()
+                if chave and isinstance(valor, str) and valor.strip()
+            }
+            lote.append((reader.line_num, limpos))
+            if len(lote) >= TAMANHO_LOTE_IMPORTACAO:
+                _processar(lote)
+                processadas += len(lote)
+                lote = []
+                yield {"linhas_processadas": processadas, "importadas": importadas, "rejeitadas": rejeitadas}
+        if lote:
+            _processar(lote)
+            processadas += len(lote)
+
+        if importadas:
+            entity_versions.incrementar_versoes(self.db.connection(), [(self.proprietario_id, self.entidade)])
+        self.db.commit()
+        yield {
+            "concluido": True, "linhas_processadas": processadas, "importadas": importadas,
+            "rejeitadas": rejeitadas, "erros": erros_reportados,
+        }
+
+
+class ImportadorEscolas(ImportadorCSV):
+    modelo = app_models.Escola
+    entidade = "escolas"
+    colunas_obrigatorias = ("nome_escola", "endereco_completo")
+
+    def __init__(self, db: Session, proprietario_id: int):
+        super().__init__(db, proprietario_id)
+        self._nomes_usados: Set[str] = set()
+        self._cnpjs_usados: Set[str] = set()
+
+    def preparar_lote(self, linhas):
+        erros: List[Tuple[int, str]] = []
+        candidatas = []
+        for numero_linha, valores in linhas:
+            escola = self._validar(schemas.EscolaCreate, numero_linha, valores, erros)
+            if escola is not None:
+                candidatas.append((numero_linha, escola))
+
+        nomes = {escola.nome_escola for _, escola in candidatas} - self._nomes_usados
+        cnpjs = {escola.cnpj for _, escola in candidatas if escola.cnpj} - self._cnpjs_usados
+        if nomes:
+            self._nomes_usados.update(self.db.scalars(select(app_models.Escola.nome_escola).where(
+                app_models.Escola.id_proprietario_user == self.proprietario_id, app_models.Escola.nome_escola.in_(nomes)
+            )))
+        if cnpjs:
+            self._cnpjs_usados.update(self.db.scalars(select(app_models.Escola.cnpj).where(
+                app_models.Escola.id_proprietario_user == self.proprietario_id, app_models.Escola.cnpj.in_(cnpjs)
+            )))
+
+        validas = []
+        for numero_linha, escola in candidatas:
+            if escola.nome_escola in self._nomes_usados:
+                erros.append((numero_linha, f"Já existe uma escola com o nome '{escola.nome_escola}'."))
+            elif escola.cnpj and escola.cnpj in self._cnpjs_usados:
+                erros.append((numero_linha, f"Já existe uma escola com o CNPJ '{escola.cnpj}'."))
+            else:
+                self._nomes_usados.add(escola.nome_escola)
+                if escola.cnpj:
+                    self._cnpjs_usados.add(escola.cnpj)
+                validas.append({**escola.model_dump(), "id_proprietario_user": self.proprietario_id})
+        return validas, erros
+
+
+class ImportadorResponsaveis(ImportadorCSV):
+    modelo = app_models.Responsavel
+    entidade = "responsaveis"
+    colunas_obrigatorias = ("nome_completo", "cpf", "email", "telefone_principal")
+
+    def __init__(self, db: Session, proprietario_id: int):
+        super().__init__(db, proprietario_id)
+        self._cpfs_usados: Set[str] = set()
+        self._emails_usados: Set[str] = set()
+
+    def preparar_lote(self, linhas):
+        erros: List[Tuple[int, str]] = []
+        candidatos = []
+        for numero_linha, valores in linhas:
+            responsavel = self._validar(schemas.ResponsavelCreate, numero_linha, valores, erros)
+            if responsavel is not None:
+                candidatos.append((numero_linha, responsavel))
+
+        cpfs = {responsavel.cpf for _, responsavel in candidatos} - self._cpfs_usados
+        emails = {responsavel.email for _, responsavel in candidatos} - self._emails_usados
+        if cpfs:
+            self._cpfs_usados.update(self.db.scalars(select(app_models.Responsavel.cpf).where(
+                app_models.Responsavel.id_proprietario_user == self.proprietario_id, app_models.Responsavel.cpf.in_(cpfs)
+            )))
+        if emails:
+            self._emails_usados.update(self.db.scalars(select(app_models.Responsavel.email).where(
+                app_models.Responsavel.id_proprietario_user == self.proprietario_id, app_models.Responsavel.email.in_(emails)
+            )))
+
+        validos = []
+        for numero_linha, responsavel in candidatos:
+            if responsavel.cpf in self._cpfs_usados:
+                erros.append((numero_linha, f"Já existe um responsável com o CPF '{responsavel.cpf}'."))
+            elif responsavel.email in self._emails_usados:
+                erros.append((numero_linha, f"Já existe um responsável com o email '{responsavel.email}'."))
+            else:
+                self._cpfs_usados.add(responsavel.cpf)
+                self._emails_usados.add(responsavel.email)
+                validos.append({**responsavel.model_dump(), "id_proprietario_user": self.proprietario_id})
+        return validos, erros
+
+
+class ImportadorAlunos(ImportadorCSV):
+    """Alunos referenciam escola e responsáveis pelas chaves naturais da planilha, não por id."""
+
+    modelo = app_models.Aluno
+    entidade = "alunos"
+    colunas_obrigatorias = (
+        "nome_completo_aluno", "data_nascimento", "cpf_responsavel_principal", "nome_escola",
+        "endereco_embarque_predeterminado", "periodo_escolar",
+    )
+
+    def __init__(self, db: Session, proprietario_id: int):
+        super().__init__(db, proprietario_id)
+        # Cache das referências já resolvidas (ou sabidamente inexistentes: None) entre lotes
+        self._id_responsavel_por_cpf: Dict[str, Optional[int]] = {}
+        self._id_escola_por_nome: Dict[str, Optional[int]] = {}
+
+    def _resolver_referencias(self, linhas: List[LinhaCSV]) -> None:
+        cpfs = {
+            valores[coluna] for _, valores in linhas
+            for coluna in ("cpf_responsavel_principal", "cpf_responsavel_secundario") if coluna in valores
+        } - self._id_responsavel_por_cpf.keys()
+        nomes = {valores["nome_escola"] for _, valores in linhas if "nome_escola" in valores} - self._id_escola_por_nome.keys()
+        if cpfs:
+            self._id_responsavel_por_cpf.update(dict.fromkeys(cpfs))
+            self._id_responsavel_por_cpf.update(self.db.execute(
+                select(app_models.Responsavel.cpf, app_models.Responsavel.id_responsavel).where(
+                    app_models.Responsavel.id_proprietario_user == self.proprietario_id,
+                    app_models.Responsavel.cpf.in_(cpfs)
+                )
+            ).tuples().all())
+        if nomes:
+            self._id_escola_por_nome.update(dict.fromkeys(nomes))
+            self._id_escola_por_nome.update(self.db.execute(
+                select(app_models.Escola.nome_escola, app_models.Escola.id_escola).where(
+                    app_models.Escola.id_proprietario_user == self.proprietario_id,
+                    app_models.Escola.nome_escola.in_(nomes)
+                )
+            ).tuples().all())
+
+    def preparar_lote(self, linhas):
+        self._resolver_referencias(linhas)
+        erros: List[Tuple[int, str]] = []
+        validos = []
+        for numero_linha, valores in linhas:
+            valores = dict(valores)
+            nome_escola = valores.pop("nome_escola", None)
+            cpf_principal = valores.pop("cpf_responsavel_principal", None)
+            cpf_secundario = valores.pop("cpf_responsavel_secundario", None)
+            if nome_escola is not None:
+                if self._id_escola_por_nome.get(nome_escola) is None:
+                    erros.append((numero_linha, f"Escola '{nome_escola}' não encontrada."))
+                    continue
+                valores["id_escola"] = self._id_escola_por_nome[nome_escola]
+            if cpf_principal is not None:
+                if self._id_responsavel_por_cpf.get(cpf_principal) is None:
+                    erros.append((numero_linha, f"Responsável com CPF '{cpf_principal}' não encontrado."))
+                    continue
+                valores["id_responsavel_principal"] = self._id_responsavel_por_cpf[cpf_principal]
+            if cpf_secundario is not None:
+                if self._id_responsavel_por_cpf.get(cpf_secundario) is None:
+                    erros.append((numero_linha, f"Responsável secundário com CPF '{cpf_secundario}' não encontrado."))
+                    continue
+                valores["id_responsavel_secundario"] = self._id_responsavel_por_cpf[cpf_secundario]
+
+            aluno = self._validar(schemas.AlunoCreate, numero_linha, valores, erros)
+            if aluno is not None:
+                validos.append({**aluno.model_dump(), "id_proprietario_user": self.proprietario_id})
+        return validos, erros
+
+
+IMPORTADORES = {
+    "escolas": ImportadorEscolas,
+    "responsaveis": ImportadorResponsaveis,
+    "alunos": ImportadorAlunos,
+}
+
+
+def abrir_csv(arquivo: IO[bytes]) -> csv.DictReader:
+    """Leitor em streaming do CSV enviado (UTF-8, com ou sem BOM; separador ',' ou ';')."""
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline="")
+    amostra = texto.read(4096)
+    texto.seek(0)
+    delimitador = ";" if amostra.count(";") > amostra.count(",") else "," # Planilhas em pt-BR costumam usar ';'
+    return csv.DictReader(texto, delimiter=delimitador)
@@ -0,0 +1,171 @@
+# entity_versions.py
+import datetime
+import hashlib
+import itertools
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import event, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import app_models
+from core_utils import get_async_read_db, get_read_db, get_current_active_user
+
+# Versões de alteração por proprietário (tenant) e tipo de entidade.
+# Toda escrita feita pelos CRUDs passa por um flush da sessão; o listener abaixo identifica
+# o proprietário dos objetos alterados e incrementa `versoes_entidades` na mesma transação.
+# Os GETs montam o ETag a partir dessas versões e respondem 304 a um If-None-Match igual
+# sem consultar as tabelas das entidades.
+
+# Modelo -> entidades cujas respostas mudam quando ele é escrito
+_ENTIDADES_POR_MODELO: Dict[type, Tuple[str, ...]] = {
+    app_models.Escola: ("escolas",),
+    app_models.Responsavel: ("responsaveis",),
+    app_models.Motorista: ("motoristas",),
+    app_models.Van: ("vans",),
+    app_models.Aluno: ("alunos",),
+    app_models.Rota: ("rotas",),
+    app_models.AlunosPorRota: ("rotas",),
+    app_models.ContratoServico: ("contratos", "pagamentos"), # Contratos geram/removem mensalidades
+    app_models.Pagamento: ("pagamentos",),
+}
+
+
+def proprietario_do_objeto(conn: Connection, obj) -> Optional[int]:
+    if isinstance(obj, app_models.AlunosPorRota):
+        rota = obj.__dict__.get("rota")
+        if rota is not None:
+            return rota.id_proprietario_user
+        return conn.scalar(
+            select(app_models.Rota.id_proprietario_user).where(app_models.Rota.id_rota == obj.id_rota)
+        )
+    if isinstance(obj, app_models.Pagamento):
+        if obj.id_proprietario_user is not None: # Copiado do contrato na criação
+            return obj.id_proprietario_user
+        contrato = obj.__dict__.get("contrato") # Sem lazy load dentro do flush
+        if contrato is not None:
+            return contrato.id_proprietario_user
+        return conn.scalar(
+            select(app_models.ContratoServico.id_proprietario_user)
+            .where(app_models.ContratoServico.id_contrato == obj.id_contrato)
+        )
+    return obj.id_proprietario_user
+
+
+def incrementar_versoes(conn: Connection, pares: Iterable[Tuple[int, str]]) -> None:
+    """Incrementa (upsert) a versão de cada par (proprietario_id, entidade)."""
+    tabela = app_models.VersaoEntidade.__table__
+    dialetos_com_upsert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+    insert_fn = dialetos_com_upsert.get(conn.dialect.name)
+    # Ordem fixa para que transações concorrentes travem as linhas na mesma sequência
+    for proprietario_id, entidade in sorted(set(pares)):
+        if insert_fn is not None:
+            stmt = insert_fn(tabela).values(id_proprietario_user=proprietario_id, entidade=entidade, versao=1)
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[tabela.c.id_proprietario_user, tabela.c.entidade],
+                set_={"versao": tabela.c.versao + 1},
+            ))
+            continue
+        result = conn.execute(
+            update(tabela)
+            .where(tabela.c.id_proprietario_user == proprietario_id, tabela.c.entidade == entidade)
+            .values(versao=tabela.c.versao + 1)
+        )
+        if result.rowcount == 0:
+            conn.execute(tabela.insert().values(id_proprietario_user=proprietario_id, entidade=entidade, versao=1))
+
+
+@event.listens_for(Session, "before_flush")
+def _versionar_escritas(session: Session, flush_context, instances) -> None:
+    pares: Set[Tuple[int, str]] = set()
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        entidades = _ENTIDADES_POR_MODELO.get(type(obj))
+        if not entidades:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        proprietario_id = proprietario_do_objeto(session.connection(), obj)
+        if proprietario_id is None:
+            continue
+        pares.update((proprietario_id, entidade) for entidade in entidades)
+    if pares:
+        incrementar_versoes(session.connection(), pares)
+
+
+def get_versoes(db: Session, proprietario_id: int, entidades: Iterable[str]) -> Dict[str, int]:
+    entidades = tuple(entidades)
+    linhas = db.execute(
+        select(app_models.VersaoEntidade.entidade, app_models.VersaoEntidade.versao).where(
+            app_models.VersaoEntidade.id_proprietario_user == proprietario_id,
+            app_models.VersaoEntidade.entidade.in_(entidades),
+        )
+    ).all()
+    versoes = dict.fromkeys(entidades, 0)
+    versoes.update({entidade: versao for entidade, versao in linhas})
+    return versoes
+
+
+def _if_none_match_confere(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    alvo = etag.removeprefix("W/")
+    return any(candidato.strip().removeprefix("W/") == alvo for candidato in if_none_match.split(","))
+
+
+def etag_condicional(
+    *entidades: str, varia_por_dia: bool = False, expansoes: Optional[Dict] = None, assincrono: bool = False
+):
+    """Dependência para GETs: publica o ETag da resposta e responde 304 se o cliente já tem a versão atual.
+
+    O ETag combina usuário, versões das `entidades`, caminho e query string (paginação/filtros).
+    `varia_por_dia` é para listagens que dependem da data atual (ex.: pagamentos atrasados).
+    `expansoes` (expand.Expansao por nome) soma as entidades das relações pedidas em `?expand=`.
+    `assincrono` é para os GETs `async def` com get_async_read_db: as versões são lidas na mesma AsyncSession.
+    """
+    def _entidades_da_resposta(request: Request) -> Tuple[str, ...]:
+        entidades_resposta = entidades
+        if expansoes and request.query_params.get("expand"):
+            pedidas = {nome.strip() for nome in request.query_params["expand"].split(",")}
+            entidades_resposta += tuple(sorted({e.entidade for nome, e in expansoes.items() if nome in pedidas} - set(entidades)))
+        return entidades_resposta
+
+    def _publicar_etag(request: Request, response: Response, user_id: int, versoes: Dict[str, int]) -> None:
+        partes = [
+            str(user_id),
+            ",".join(f"{entidade}={versao}" for entidade, versao in versoes.items()),
+            request.url.path,
+            str(request.url.query),
+        ]
+        if varia_por_dia:
+            partes.append(datetime.date.today().isoformat())
+        etag = 'W/"' + hashlib.blake2s("|".join(partes).encode(), digest_size=12).hexdigest() + '"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if _if_none_match_confere(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    def _dependencia(
+        request: Request,
+        response: Response,
+        db: Session = Depends(get_read_db),
+        current_user: app_models.User = Depends(get_current_active_user),
+    ) -> None:
+        versoes = get_versoes(db, current_user.id_user, _entidades_da_resposta(request))
+        _publicar_etag(request, response, current_user.id_user, versoes)
+
+    async def _dependencia_async(
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_async_read_db),
+        current_user: app_models.User = Depends(get_current_active_user),
+    ) -> None:
+        versoes = await db.run_sync(get_versoes, current_user.id_user, _entidades_da_resposta(request))
+        _publicar_etag(request, response, current_user.id_user, versoes)
+
+    return _dependencia_async if assincrono else _dependencia
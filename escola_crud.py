@@ -4,6 +4,8 @@ from typing import List, Optional
 
 import app_models
 import schemas
+from fieldsets import aplicar_campos
+from pagination import paginar_por_chave
 
 def create_escola(db: Session, escola: schemas.EscolaCreate, proprietario_id: int) -> app_models.Escola:
     db_escola = app_models.Escola(
@@ -15,8 +17,13 @@ def create_escola(db: Session, escola: schemas.EscolaCreate, proprietario_id: in
     db.refresh(db_escola)
     return db_escola
 
-def get_escolas_por_proprietario(db: Session, proprietario_id: int, skip: int = 0, limit: int = 100) -> List[app_models.Escola]:
-    return db.query(app_models.Escola).filter(app_models.Escola.id_proprietario_user == proprietario_id).offset(skip).limit(limit).all()
+def get_escolas_por_proprietario(
+    db: Session, proprietario_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+    campos: Optional[List[str]] = None
+) -> List[app_models.Escola]:
+    query = db.query(app_models.Escola).filter(app_models.Escola.id_proprietario_user == proprietario_id)
+    query = aplicar_campos(query, app_models.Escola, campos)
+    return paginar_por_chave(query, app_models.Escola.id_escola, skip=skip, limit=limit, after_id=after_id).all()
 
 def get_escola_por_id_e_proprietario(db: Session, escola_id: int, proprietario_id: int) -> Optional[app_models.Escola]:
     return db.query(app_models.Escola).filter(
@@ -60,4 +67,4 @@ def delete_escola(db: Session, escola_id: int, proprietario_id: int) -> Optional
         return None # Ou levantar uma exceção
     db.delete(db_escola)
     db.commit()
-    return db_escola
\ No newline at end of file
+    return db_escola
@@ -1,12 +1,15 @@
 # escola_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import schemas
 import escola_crud
 import app_models
-from core_utils import get_db, get_current_active_user
+from core_utils import get_db, get_read_db, get_current_active_user
+from entity_versions import etag_condicional
+from fieldsets import parse_fields, resposta_com_campos
+from pagination import decode_cursor, set_next_cursor
 
 router = APIRouter(
     prefix="/escolas",
@@ -39,21 +42,24 @@ def create_nova_escola_para_usuario_logado( # Nome da função mais descritivo
             
     return escola_crud.create_escola(db=db, escola=escola_in, proprietario_id=current_user.id_user)
 
-@router.get("/", response_model=List[schemas.Escola])
+@router.get("/", response_model=List[schemas.Escola], dependencies=[Depends(etag_condicional("escolas"))])
 def read_minhas_escolas(
-    skip: int = 0, limit: int = 100,
-    db: Session = Depends(get_db),
+    request: Request, response: Response,
+    skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
+    campos = parse_fields(fields, schemas.Escola, "id_escola")
     escolas = escola_crud.get_escolas_por_proprietario(
-        db, proprietario_id=current_user.id_user, skip=skip, limit=limit
+        db, proprietario_id=current_user.id_user, skip=skip, limit=limit, after_id=decode_cursor(cursor), campos=campos
     )
-    return escolas
+    set_next_cursor(request, response, escolas, "id_escola", limit)
+    return resposta_com_campos(escolas, schemas.Escola, campos, response)
 
-@router.get("/{escola_id}", response_model=schemas.Escola)
+@router.get("/{escola_id}", response_model=schemas.Escola, dependencies=[Depends(etag_condicional("escolas"))])
 def read_minha_escola_especifica( # Nome da função mais descritivo
     escola_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
     db_escola = escola_crud.get_escola_por_id_e_proprietario(
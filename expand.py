@@ -0,0 +1,72 @@
+# expand.py
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Type
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Query, joinedload, noload
+
+import schemas
+from fast_json import copiar_headers
+
+# `?expand=van,motorista` inclui objetos relacionados na resposta (campos *_obj dos schemas
+# *Expandido/*Expandida). Cada relação pedida vira um joinedload na mesma consulta, então uma
+# página custa o mesmo número de queries com ou sem expand. As relações não pedidas ficam
+# com noload: a validação do schema expandido não dispara um lazy load por item.
+
+
+class Expansao(NamedTuple):
+    relacao: str # relationship no modelo ORM
+    campo: str # campo *_obj no schema expandido
+    entidade: str # entidade de entity_versions (entra no ETag quando expandida)
+
+
+def parse_expand(expand: Optional[str], expansoes: Dict[str, Expansao], campos: Optional[List[str]] = None) -> Optional[List[str]]:
+    """Valida `expand` contra as relações do endpoint. Retorna None quando nada foi pedido."""
+    if not expand:
+        return None
+    pedidas = {nome.strip() for nome in expand.split(",") if nome.strip()}
+    invalidas = sorted(pedidas - set(expansoes))
+    if invalidas:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Relação(ões) inválida(s) em 'expand': {', '.join(invalidas)}. Use: {', '.join(expansoes)}."
+        )
+    if campos:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use 'fields' ou 'expand', não os dois juntos.")
+    return [nome for nome in expansoes if nome in pedidas] or None
+
+
+def aplicar_expand(query: Query, modelo, expansoes: Dict[str, Expansao], pedidas: Optional[List[str]]) -> Query:
+    if not pedidas:
+        return query
+    return query.options(*(
+        joinedload(getattr(modelo, expansao.relacao)) if nome in pedidas else noload(getattr(modelo, expansao.relacao))
+        for nome, expansao in expansoes.items()
+    ))
+
+
+def _nao_pedidos(expansoes: Dict[str, Expansao], pedidas: List[str]) -> Set[str]:
+    return {expansao.campo for nome, expansao in expansoes.items() if nome not in pedidas}
+
+
+def resposta_expandida(
+    itens: List[Any], schema_expandido: Type[BaseModel], expansoes: Dict[str, Expansao], pedidas: List[str], response: Response
+) -> Response:
+    """Serializa uma listagem no schema expandido, só com os *_obj pedidos."""
+    adaptador = schemas.adaptador_lista(schema_expandido)
+    corpo = adaptador.dump_json(
+        adaptador.validate_python(itens, from_attributes=True), exclude={"__all__": _nao_pedidos(expansoes, pedidas)}
+    )
+    return Response(content=corpo, media_type="application/json", headers=copiar_headers(response))
+
+
+def item_expandido(
+    item: Any, schema: Type[BaseModel], schema_expandido: Type[BaseModel], expansoes: Dict[str, Expansao],
+    pedidas: Optional[List[str]], response: Response
+) -> Response:
+    """Detalhe de um item, com os *_obj pedidos (sem `expand`, no schema base)."""
+    if not pedidas:
+        corpo = schema.model_validate(item).model_dump_json()
+    else:
+        corpo = schema_expandido.model_validate(item).model_dump_json(exclude=_nao_pedidos(expansoes, pedidas))
+    return Response(content=corpo, media_type="application/json", headers=copiar_headers(response))
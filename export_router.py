@@ -0,0 +1,132 @@
+# export_router.py
+import csv
+import datetime
+import io
+import json
+from decimal import Decimal
+from typing import Callable, Iterator, List, Sequence, Type
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import RowMapping
+from sqlalchemy.orm import Session
+
+import schemas
+import aluno_crud
+import pagamento_crud
+import app_models
+from core_utils import get_current_active_user, get_read_session_factory
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Exportação"],
+    responses={
+        401: {"description": "Não autenticado"},
+        400: {"description": "Formato inválido"}
+    },
+)
+
+# Exportação completa dos dados do operador em NDJSON (uma linha JSON por registro) ou CSV.
+# As linhas são lidas do banco em lotes (yield_per, cursor no servidor) e escritas no
+# StreamingResponse lote a lote, então a memória não cresce com o tamanho do tenant.
+
+TAMANHO_LOTE_EXPORTACAO = 500
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _valor_json(valor):
+    # Mesmas representações da API: Decimal como string, datas em ISO 8601
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (datetime.date, datetime.datetime, datetime.time)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+
+def _valor_csv(valor) -> str:
+    if valor is None:
+        return ""
+    if isinstance(valor, (datetime.date, datetime.datetime, datetime.time)):
+        return valor.isoformat()
+    return str(valor)
+
+
+def _gerar_ndjson(lotes: Iterator[Sequence[RowMapping]]) -> Iterator[str]:
+    for lote in lotes:
+        yield "".join(json.dumps(dict(linha), default=_valor_json, ensure_ascii=False) + "\n" for linha in lote)
+
+
+def _gerar_csv(lotes: Iterator[Sequence[RowMapping]], colunas: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(colunas)
+    for lote in lotes:
+        for linha in lote:
+            writer.writerow([_valor_csv(linha[coluna]) for coluna in colunas])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue() # Só o cabeçalho, quando não há linhas
+
+
+def _exportar(
+    fabrica_sessao: Callable[[], Session], proprietario_id: int, formato: str, schema: Type[BaseModel], nome_arquivo: str,
+    iter_lotes: Callable[..., Iterator[Sequence[RowMapping]]]
+) -> StreamingResponse:
+    if formato not in FORMATOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato inválido. Use um de: {', '.join(FORMATOS)}."
+        )
+    colunas = list(schema.model_fields)
+
+    def _corpo() -> Iterator[str]:
+        # Sessão própria: a da dependência pode ser fechada antes ou durante o envio do corpo.
+        # O cursor (yield_per) e a conexão são devolvidos ao final ou se o cliente desconectar.
+        db = fabrica_sessao()
+        try:
+            lotes = iter_lotes(db, proprietario_id=proprietario_id, colunas=colunas, tamanho_lote=TAMANHO_LOTE_EXPORTACAO)
+            if formato == "csv":
+                yield from _gerar_csv(lotes, colunas)
+            else:
+                yield from _gerar_ndjson(lotes)
+        finally:
+            db.close()
+
+    extensao = "csv" if formato == "csv" else "ndjson"
+    return StreamingResponse(
+        _corpo(),
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}.{extensao}"'}
+    )
+
+
+@router.get("/pagamentos",
+            summary="Exporta todos os pagamentos do operador",
+            description="Streaming em NDJSON (padrão) ou CSV (`?formato=csv`) de todos os pagamentos dos contratos do operador logado.")
+def export_meus_pagamentos(
+    formato: str = "ndjson",
+    fabrica_sessao: Callable[[], Session] = Depends(get_read_session_factory),
+    current_user: app_models.User = Depends(get_current_active_user)
+):
+    return _exportar(
+        fabrica_sessao, current_user.id_user, formato, schemas.Pagamento, "pagamentos", pagamento_crud.iter_pagamentos_para_exportacao
+    )
+
+
+@router.get("/alunos",
+            summary="Exporta todos os alunos do operador",
+            description="Streaming em NDJSON (padrão) ou CSV (`?formato=csv`) de todos os alunos do operador logado.")
+def export_meus_alunos(
+    formato: str = "ndjson",
+    fabrica_sessao: Callable[[], Session] = Depends(get_read_session_factory),
+    current_user: app_models.User = Depends(get_current_active_user)
+):
+    return _exportar(
+        fabrica_sessao, current_user.id_user, formato, schemas.Aluno, "alunos", aluno_crud.iter_alunos_para_exportacao
+    )
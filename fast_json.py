@@ -0,0 +1,34 @@
+# fast_json.py
+from typing import Any, Dict, List
+
+import pydantic_core
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+import schemas
+
+# Serialização JSON pelo pydantic-core (Rust) em vez do `json` da stdlib.
+# FastJSONResponse é a classe de resposta padrão da aplicação (main.py); as listagens vão
+# além e usam `resposta_lista`, que valida e serializa a página inteira de uma vez com os
+# TypeAdapters de schemas.py. O JSON gerado é o mesmo do caminho padrão do FastAPI
+# (Decimal como string, datas em ISO 8601). Comparação: benchmarks/list_serialization.py.
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
+
+
+def copiar_headers(response: Response) -> Dict[str, str]:
+    # Uma Response retornada diretamente não herda os headers do parâmetro `response` (ETag, cursor)
+    return {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+
+
+def serializar_lista(itens: List[Any], schema: type) -> bytes:
+    adaptador = schemas.adaptador_lista(schema)
+    return adaptador.dump_json(adaptador.validate_python(itens, from_attributes=True))
+
+
+def resposta_lista(itens: List[Any], schema: type, response: Response) -> Response:
+    """Resposta de uma listagem de objetos ORM no formato de `List[schema]`."""
+    return Response(content=serializar_lista(itens, schema), media_type="application/json", headers=copiar_headers(response))
@@ -0,0 +1,51 @@
+# fieldsets.py
+from typing import Any, List, Optional, Type
+
+from fastapi import HTTPException, Response, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Query, load_only
+
+from fast_json import FastJSONResponse, copiar_headers, resposta_lista
+
+# Sparse fieldsets: `?fields=id_aluno,nome_completo_aluno` nas listagens.
+# Os campos pedidos limitam o SELECT (load_only) e a resposta; a PK sempre vem junto,
+# pois é a chave da paginação por cursor.
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel], pk_attr: str) -> Optional[List[str]]:
+    """Valida `fields` contra o schema de resposta. Retorna None quando o cliente quer o objeto completo."""
+    if not fields:
+        return None
+    pedidos = [campo.strip() for campo in fields.split(",") if campo.strip()]
+    invalidos = [campo for campo in pedidos if campo not in schema.model_fields]
+    if invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campo(s) inválido(s) em 'fields': {', '.join(invalidos)}."
+        )
+    # Mantém a ordem do schema para a resposta ser estável
+    return [campo for campo in schema.model_fields if campo == pk_attr or campo in pedidos]
+
+
+def aplicar_campos(query: Query, modelo, campos: Optional[List[str]]) -> Query:
+    if not campos:
+        return query
+    # Campos calculados (hybrid_property) carregam as colunas de que dependem
+    calculados = getattr(modelo, "colunas_dos_campos_calculados", {})
+    colunas = [coluna for campo in campos for coluna in calculados.get(campo, (campo,))]
+    return query.options(load_only(*(getattr(modelo, coluna) for coluna in dict.fromkeys(colunas))))
+
+
+def resposta_com_campos(itens: List[Any], schema: Type[BaseModel], campos: Optional[List[str]], response: Response) -> Response:
+    """Serializa só os `campos` de cada item, sem tocar nos atributos não carregados.
+
+    Sem `campos`, serializa o objeto completo pelo caminho rápido das listagens (fast_json).
+    """
+    if not campos:
+        return resposta_lista(itens, schema, response)
+    incluir = set(campos)
+    conteudo = [
+        schema.model_construct(**{campo: getattr(item, campo) for campo in campos}).model_dump(mode="json", include=incluir)
+        for item in itens
+    ]
+    return FastJSONResponse(content=conteudo, headers=copiar_headers(response))
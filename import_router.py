@@ -0,0 +1,115 @@
+# import_router.py
+import json
+import shutil
+import tempfile
+from typing import Callable, Type
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+import app_models
+import csv_import
+from core_utils import get_current_active_user, get_session_factory, marcar_leitura_primario
+
+router = APIRouter(
+    prefix="/import",
+    tags=["Importação"],
+    responses={
+        401: {"description": "Não autenticado"},
+        400: {"description": "Arquivo CSV inválido"}
+    },
+)
+
+# A resposta é NDJSON: uma linha de progresso a cada lote processado
+# ({"linhas_processadas", "importadas", "rejeitadas"}) e uma linha final com "concluido": true
+# e as primeiras linhas rejeitadas com o motivo. Se algo falhar no meio, nada é gravado e a
+# última linha traz "concluido": false.
+
+DESCRICAO_RESPOSTA = "Progresso em NDJSON, uma linha por lote, terminando com o resumo (`concluido`)."
+
+
+def _importar(
+    importador_cls: Type[csv_import.ImportadorCSV], arquivo: UploadFile,
+    fabrica_sessao: Callable[[], Session], current_user: app_models.User
+) -> StreamingResponse:
+    # O FastAPI fecha o upload assim que o handler retorna, antes do corpo da resposta ser enviado;
+    # por isso o arquivo é copiado (em blocos, para disco se passar de 1MB) para uma cópia nossa.
+    copia = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    shutil.copyfileobj(arquivo.file, copia)
+    copia.seek(0)
+    try:
+        reader = csv_import.abrir_csv(copia)
+        faltando = importador_cls.colunas_faltando(reader.fieldnames)
+    except UnicodeDecodeError:
+        copia.close()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O arquivo deve estar codificado em UTF-8.")
+    if faltando:
+        copia.close()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Colunas obrigatórias ausentes no CSV: {', '.join(faltando)}."
+        )
+
+    proprietario_id = current_user.id_user
+
+    def _eventos():
+        # Sessão própria: a de get_db pode ser fechada antes ou durante o envio do corpo
+        db = fabrica_sessao()
+        try:
+            for evento in importador_cls(db, proprietario_id).executar(reader):
+                yield json.dumps(evento, ensure_ascii=False) + "\n"
+        except Exception as e:
+            db.rollback()
+            print(f"LOG ERRO: Falha na importação de {importador_cls.entidade} do usuário {proprietario_id}: {e}")
+            motivo = "Arquivo não está em UTF-8." if isinstance(e, UnicodeDecodeError) else "Erro interno durante a importação."
+            yield json.dumps({"concluido": False, "erro": f"{motivo} Nenhuma linha foi importada."}, ensure_ascii=False) + "\n"
+        finally:
+            db.close()
+            copia.close()
+
+    resposta = StreamingResponse(_eventos(), media_type="application/x-ndjson")
+    # Os commits do corpo acontecem depois que os headers saíram, fora do alcance do middleware
+    # de leitura-no-primário; o marcador vai já no início. Ele conta a partir do início da
+    # importação, então numa importação mais longa que READ_YOUR_WRITES_SECONDS as leituras
+    # seguintes podem voltar a cair na réplica antes dela alcançar o primário.
+    marcar_leitura_primario(resposta)
+    return resposta
+
+
+@router.post("/escolas",
+             summary="Importa escolas de um CSV",
+             description="Colunas: nome_escola, endereco_completo, cnpj, telefone_escola, nome_contato_escola, email_contato_escola. " + DESCRICAO_RESPOSTA)
+def importar_escolas(
+    arquivo: UploadFile = File(...),
+    fabrica_sessao: Callable[[], Session] = Depends(get_session_factory),
+    current_user: app_models.User = Depends(get_current_active_user)
+):
+    return _importar(csv_import.ImportadorEscolas, arquivo, fabrica_sessao, current_user)
+
+
+@router.post("/responsaveis",
+             summary="Importa responsáveis de um CSV",
+             description="Colunas: nome_completo, cpf, email, telefone_principal, telefone_secundario, endereco_completo. " + DESCRICAO_RESPOSTA)
+def importar_responsaveis(
+    arquivo: UploadFile = File(...),
+    fabrica_sessao: Callable[[], Session] = Depends(get_session_factory),
+    current_user: app_models.User = Depends(get_current_active_user)
+):
+    return _importar(csv_import.ImportadorResponsaveis, arquivo, fabrica_sessao, current_user)
+
+
+@router.post("/alunos",
+             summary="Importa alunos de um CSV",
+             description=(
+                 "Colunas: nome_completo_aluno, data_nascimento (AAAA-MM-DD), nome_escola, cpf_responsavel_principal, "
+                 "cpf_responsavel_secundario, endereco_embarque_predeterminado, turma_serie, periodo_escolar, "
+                 "observacoes_medicas, foto_aluno_url, status_aluno. Escolas e responsáveis precisam existir (importe-os antes). "
+                 + DESCRICAO_RESPOSTA
+             ))
+def importar_alunos(
+    arquivo: UploadFile = File(...),
+    fabrica_sessao: Callable[[], Session] = Depends(get_session_factory),
+    current_user: app_models.User = Depends(get_current_active_user)
+):
+    return _importar(csv_import.ImportadorAlunos, arquivo, fabrica_sessao, current_user)
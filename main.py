@@ -1,24 +1,49 @@
 # main.py
-from fastapi import FastAPI, Depends
+import hmac
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI, Depends, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+import admin_router
 import auth_router
+import busca_router
 import contrato_servico_router
 import escola_router
+import export_router
+import import_router
 import mororista_router
 import pagamento_router
+import request_metrics
 import responsavel_router
 import aluno_router
 import app_models
 import rota_router
 import schemas
-from core_utils import get_current_active_user
+import scheduler
+from fast_json import FastJSONResponse
+from core_utils import ReadYourWritesMiddleware, dispose_async_engines, get_current_active_user, settings, shutdown_password_executor
 import task_router
 import van_router
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    agendador = scheduler.criar_agendador() if settings.SCHEDULER_ENABLED else None
+    if agendador is not None:
+        await agendador.iniciar()
+    yield
+    if agendador is not None:
+        await agendador.parar()
+    shutdown_password_executor()
+    await dispose_async_engines()
+
 app = FastAPI(
     title="API Transporte Escolar Multi-Operador",
-    version="0.3.0" 
+    version="0.3.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse # JSON serializado pelo pydantic-core
 )
 
 origins = [
@@ -33,8 +58,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], # Permite todos os métodos (GET, POST, PUT, etc.)
     allow_headers=["*"], # Permite todos os cabeçalhos
+    expose_headers=["Server-Timing", "X-Next-Cursor", "Link", "ETag", "Content-Disposition", "X-Read-Primary"],
 )
 
+# Tempo do handler e consultas SQL por requisição (header Server-Timing + /metrics)
+app.add_middleware(request_metrics.RequestMetricsMiddleware)
+
+# Marcador de read-your-writes (cookie/header) nas respostas de requisições que gravaram no primário
+app.add_middleware(ReadYourWritesMiddleware)
+
 # Incluir os roteadores
 app.include_router(auth_router.router)
 app.include_router(escola_router.router)
@@ -45,14 +77,27 @@ app.include_router(van_router.router)
 app.include_router(contrato_servico_router.router)
 app.include_router(pagamento_router.router)
 app.include_router(rota_router.router)
+app.include_router(export_router.router)
+app.include_router(import_router.router)
+app.include_router(busca_router.router)
 
 app.include_router(task_router.router)
+app.include_router(admin_router.router)
 
 
 @app.get("/")
 async def root():
     return {"message": "Bem-vindo à API de Transporte Escolar!"}
 
+@app.get("/metrics", include_in_schema=False)
+def read_metrics(authorization: Optional[str] = Header(None)):
+    # Sem METRICS_TOKEN o endpoint fica desligado: as métricas expõem rotas e volume de uso
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not hmac.compare_digest(authorization or "", f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso não autorizado.")
+    return PlainTextResponse(request_metrics.registry.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.get("/users/me", response_model=schemas.User)
 async def read_users_me(current_user: app_models.User = Depends(get_current_active_user)):
     return current_user
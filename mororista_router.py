@@ -1,12 +1,15 @@
 # motorista_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import schemas
 import motorista_crud # NOVO
 import app_models
-from core_utils import get_db, get_current_active_user
+from core_utils import get_db, get_read_db, get_current_active_user
+from entity_versions import etag_condicional
+from fieldsets import parse_fields, resposta_com_campos
+from pagination import decode_cursor, set_next_cursor
 
 router = APIRouter(
     prefix="/motoristas",
@@ -36,21 +39,24 @@ def create_novo_motorista(
             
     return motorista_crud.create_motorista(db=db, motorista=motorista_in, proprietario_id=current_user.id_user)
 
-@router.get("/", response_model=List[schemas.Motorista])
+@router.get("/", response_model=List[schemas.Motorista], dependencies=[Depends(etag_condicional("motoristas"))])
 def read_meus_motoristas(
-    skip: int = 0, limit: int = 100,
-    db: Session = Depends(get_db),
+    request: Request, response: Response,
+    skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
+    campos = parse_fields(fields, schemas.Motorista, "id_motorista")
     motoristas = motorista_crud.get_motoristas_por_proprietario(
-        db, proprietario_id=current_user.id_user, skip=skip, limit=limit
+        db, proprietario_id=current_user.id_user, skip=skip, limit=limit, after_id=decode_cursor(cursor), campos=campos
     )
-    return motoristas
+    set_next_cursor(request, response, motoristas, "id_motorista", limit)
+    return resposta_com_campos(motoristas, schemas.Motorista, campos, response)
 
-@router.get("/{motorista_id}", response_model=schemas.Motorista)
+@router.get("/{motorista_id}", response_model=schemas.Motorista, dependencies=[Depends(etag_condicional("motoristas"))])
 def read_meu_motorista_especifico(
     motorista_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
     db_motorista = motorista_crud.get_motorista_por_id_e_proprietario(
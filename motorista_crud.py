@@ -4,6 +4,8 @@ from typing import List, Optional
 
 import app_models # Seu módulo de modelos SQLAlchemy
 import schemas # Seu módulo de schemas Pydantic
+from fieldsets import aplicar_campos
+from pagination import paginar_por_chave
 
 def create_motorista(db: Session, motorista: schemas.MotoristaCreate, proprietario_id: int) -> app_models.Motorista:
     db_motorista = app_models.Motorista(
@@ -15,8 +17,13 @@ def create_motorista(db: Session, motorista: schemas.MotoristaCreate, proprietar
     db.refresh(db_motorista)
     return db_motorista
 
-def get_motoristas_por_proprietario(db: Session, proprietario_id: int, skip: int = 0, limit: int = 100) -> List[app_models.Motorista]:
-    return db.query(app_models.Motorista).filter(app_models.Motorista.id_proprietario_user == proprietario_id).offset(skip).limit(limit).all()
+def get_motoristas_por_proprietario(
+    db: Session, proprietario_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+    campos: Optional[List[str]] = None
+) -> List[app_models.Motorista]:
+    query = db.query(app_models.Motorista).filter(app_models.Motorista.id_proprietario_user == proprietario_id)
+    query = aplicar_campos(query, app_models.Motorista, campos)
+    return paginar_por_chave(query, app_models.Motorista.id_motorista, skip=skip, limit=limit, after_id=after_id).all()
 
 def get_motorista_por_id_e_proprietario(db: Session, motorista_id: int, proprietario_id: int) -> Optional[app_models.Motorista]:
     return db.query(app_models.Motorista).filter(
@@ -71,4 +78,4 @@ def delete_motorista(db: Session, motorista_id: int, proprietario_id: int) -> Op
     
     db.delete(db_motorista)
     db.commit()
-    return db_motorista
\ No newline at end of file
+    return db_motorista
@@ -1,12 +1,18 @@
 # pagamento_crud.py
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional, Union
-from sqlalchemy import case, extract, or_ # Para extrair o ano do mes_referencia se necessário
+from typing import Any, Callable, Iterator, List, Optional, Sequence, Union
+from sqlalchemy import RowMapping, extract, func, select, update # Para extrair o ano do mes_referencia se necessário
+from sqlalchemy.exc import IntegrityError
 
 import datetime
+from decimal import Decimal
 import app_models
 import schemas
 import contrato_servico_crud # Para validar o contrato
+import entity_versions
+import resumo_financeiro
+from fieldsets import aplicar_campos
 
 def create_pagamento(
     db: Session, pagamento_in: schemas.PagamentoCreate, proprietario_id: int
@@ -25,8 +31,17 @@ def create_pagamento(
     except:
         return "ERRO_MES_REFERENCIA_FORMATO" # Formato inválido para mes_referencia
 
+    # Um pagamento por contrato e mês (ix_pagamentos_contrato_mes)
+    ja_existe = db.query(app_models.Pagamento.id_pagamento).filter(
+        app_models.Pagamento.id_contrato == pagamento_in.id_contrato,
+        app_models.Pagamento.mes_referencia == pagamento_in.mes_referencia
+    ).first()
+    if ja_existe:
+        return "ERRO_MES_REFERENCIA_DUPLICADO"
+
     db_pagamento = app_models.Pagamento(
         id_contrato=pagamento_in.id_contrato,
+        id_proprietario_user=proprietario_id,
         mes_referencia=pagamento_in.mes_referencia,
         ano_referencia=ano_ref, # Populando o campo do modelo
         data_vencimento=pagamento_in.data_vencimento,
@@ -44,12 +59,28 @@ def create_pagamento(
         # data_baixa é preenchido depois
     )
     db.add(db_pagamento)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError: # Outro request criou o mesmo mês entre a verificação e o INSERT
+        db.rollback()
+        return "ERRO_MES_REFERENCIA_DUPLICADO"
     db.refresh(db_pagamento)
     return db_pagamento
 
+def _ordem_listagem_pagamentos() -> tuple:
+    """Ordem da listagem por contrato: não pagos por vencimento, depois pagos do mais recente ao mais antigo.
+
+    A ordem vem pré-calculada em Pagamento.chave_ordenacao (app_models.chave_ordenacao_pagamento),
+    então a página é lida direto de ix_pagamentos_contrato_ordenacao.
+    """
+    return (
+        app_models.Pagamento.chave_ordenacao.asc(),
+        app_models.Pagamento.id_pagamento.asc() # Ordenação final para garantir consistência
+    )
+
 def get_pagamentos_por_contrato_e_proprietario(
-    db: Session, contrato_id: int, proprietario_id: int, skip: int = 0, limit: int = 100
+    db: Session, contrato_id: int, proprietario_id: int, skip: int = 0, limit: int = 100,
+    campos: Optional[List[str]] = None
 ) -> Union[List[app_models.Pagamento], str]:
     
     # Primeiro, verifica se o contrato pertence ao proprietário
@@ -59,67 +90,63 @@ def get_pagamentos_por_contrato_e_proprietario(
     if not contrato:
         return "ERRO_CONTRATO_INVALIDO"
 
-    # Define a ordem de agrupamento por status
-    status_order_expression = case(
-        (app_models.Pagamento.status_pagamento.in_(['Pendente', 'Atrasado']), 1), # Grupo Não Pagos
-        (app_models.Pagamento.status_pagamento == 'Pago', 2),                     # Grupo Pagos
-        else_=3                                                                   # Outros status
-    ).label("status_group")
-
-    return db.query(app_models.Pagamento)\
+    return aplicar_campos(db.query(app_models.Pagamento), app_models.Pagamento, campos)\
         .filter(app_models.Pagamento.id_contrato == contrato_id)\
-        .order_by(
-            status_order_expression.asc(),  # Ordena pelos grupos (Não Pagos primeiro, depois Pagos)
-            # Para pagamentos não pagos (Pendente/Atrasado), ordena por data de vencimento ascendente
-            case(
-                (app_models.Pagamento.status_pagamento.in_(['Pendente', 'Atrasado']), app_models.Pagamento.data_vencimento),
-                else_=None # Não usa data_vencimento para ordenação primária de pagos aqui
-            ).asc().nullsfirst(), # .nullsfirst() ou .nullslast() para tratar data_vencimento nula (não deve acontecer)
-            
-            # Para pagamentos pagos, ordena por data de pagamento descendente (mais recente primeiro)
-            case(
-                (app_models.Pagamento.status_pagamento == 'Pago', app_models.Pagamento.data_pagamento),
-                else_=None # Não usa data_pagamento para ordenação de não pagos aqui
-            ).desc().nullslast(), # .nullslast() para tratar data_pagamento nula (se um pago não tiver data_pagamento)
-
-            app_models.Pagamento.id_pagamento.asc() # Ordenação final para garantir consistência
-        )\
+        .order_by(*_ordem_listagem_pagamentos())\
         .offset(skip)\
         .limit(limit)\
         .all()
 
-def get_pagamento_por_id_e_proprietario( # Verifica a propriedade através do contrato
+async def get_pagamentos_por_contrato_e_proprietario_async(
+    db: AsyncSession, contrato_id: int, proprietario_id: int, **opcoes: Any
+) -> Union[List[app_models.Pagamento], str]:
+    """Variante para AsyncSession (GET /pagamentos/por-contrato/{id}), via run_sync."""
+    return await db.run_sync(
+        get_pagamentos_por_contrato_e_proprietario, contrato_id=contrato_id, proprietario_id=proprietario_id, **opcoes
+    )
+
+def get_pagamento_por_id_e_proprietario( # Verifica a propriedade pelo proprietário copiado do contrato
     db: Session, pagamento_id: int, proprietario_id: int
 ) -> Optional[app_models.Pagamento]:
-    # Este join é para garantir que o pagamento pertence a um contrato do proprietário
-    pagamento = db.query(app_models.Pagamento).join(app_models.ContratoServico).filter(
+    pagamento = db.query(app_models.Pagamento).filter(
         app_models.Pagamento.id_pagamento == pagamento_id,
-        app_models.ContratoServico.id_proprietario_user == proprietario_id
+        app_models.Pagamento.id_proprietario_user == proprietario_id
     ).first()
     return pagamento
 
 def get_pagamentos_atrasados_por_proprietario(
-    db: Session, proprietario_id: int, skip: int = 0, limit: int = 100
+    db: Session, proprietario_id: int, skip: int = 0, limit: int = 100,
+    campos: Optional[List[str]] = None
 ) -> List[app_models.Pagamento]:
     """
     Busca pagamentos que estão com status 'Pendente' e data de vencimento passada,
     OU que já estão com status 'Atrasado', pertencentes ao proprietário.
     """
-    hoje = datetime.date.today()
-    return db.query(app_models.Pagamento)\
-        .join(app_models.ContratoServico, app_models.Pagamento.id_contrato == app_models.ContratoServico.id_contrato)\
-        .filter(app_models.ContratoServico.id_proprietario_user == proprietario_id)\
-        .filter(
-            or_(
-                app_models.Pagamento.status_pagamento == "Atrasado",
-                ( (app_models.Pagamento.status_pagamento == "Pendente") & (app_models.Pagamento.data_vencimento < hoje) ) # noqa E712
-            )
-        )\
+    return aplicar_campos(db.query(app_models.Pagamento), app_models.Pagamento, campos)\
+        .filter(app_models.Pagamento.id_proprietario_user == proprietario_id)\
+        .filter(app_models.Pagamento.esta_atrasado)\
         .order_by(app_models.Pagamento.data_vencimento.asc())\
         .offset(skip)\
         .limit(limit)\
         .all()
 
+async def get_pagamentos_atrasados_por_proprietario_async(
+    db: AsyncSession, proprietario_id: int, **opcoes: Any
+) -> List[app_models.Pagamento]:
+    """Variante para AsyncSession (GET /pagamentos/atrasados), via run_sync."""
+    return await db.run_sync(get_pagamentos_atrasados_por_proprietario, proprietario_id=proprietario_id, **opcoes)
+
+
+def aplicar_regras_de_baixa(update_data: dict) -> dict:
+    """Regras da baixa (também usadas pela conciliação): ao marcar como 'Pago', data_pagamento e
+    data_baixa são preenchidas com hoje/agora quando não informadas."""
+    if update_data.get("status_pagamento") == "Pago":
+        if update_data.get("data_pagamento") is None:
+            update_data["data_pagamento"] = datetime.date.today()
+        if update_data.get("data_baixa") is None:
+            update_data["data_baixa"] = datetime.datetime.now(datetime.timezone.utc)
+    return update_data
+
 
 def update_pagamento(
     db: Session, pagamento_id: int, pagamento_update_data: schemas.PagamentoUpdate, proprietario_id: int
@@ -138,14 +165,7 @@ def update_pagamento(
         except:
             return "ERRO_MES_REFERENCIA_FORMATO_UPDATE"
     
-    # Se o pagamento está sendo marcado como "Pago" e data_pagamento não foi fornecida, usar data atual
-    if "status_pagamento" in update_data and update_data["status_pagamento"] == "Pago":
-        if "data_pagamento" not in update_data or update_data["data_pagamento"] is None:
-            update_data["data_pagamento"] = datetime.date.today() # type: ignore
-        # Poderia também setar data_baixa aqui
-        if "data_baixa" not in update_data or update_data["data_baixa"] is None:
-             update_data["data_baixa"] = datetime.datetime.now(datetime.timezone.utc)
-
+    aplicar_regras_de_baixa(update_data)
 
     for key, value in update_data.items():
         setattr(db_pagamento, key, value)
@@ -156,34 +176,56 @@ def update_pagamento(
     return db_pagamento
 
 
-def atualizar_pagamentos_para_atrasado(db: Session) -> int:
+# Tamanho do lote da tarefa de atrasados: cada lote é uma transação curta
+TAMANHO_LOTE_ATRASADOS = 1000
+
+def atualizar_pagamentos_para_atrasado(
+    db: Session, tamanho_lote: int = TAMANHO_LOTE_ATRASADOS,
+    ao_concluir_lote: Optional[Callable[[int, int], None]] = None
+) -> int:
+    """Marca como 'Atrasado' os pagamentos pendentes vencidos, em lotes por PK com commit por lote.
+
+    Cada lote trava só as suas linhas (FOR UPDATE SKIP LOCKED no PostgreSQL; ignorado no SQLite)
+    e as libera no commit. Linhas travadas por outra transação ficam para a próxima execução.
+    Como o critério é o próprio status, interromper e rodar de novo retoma de onde parou.
+    `ao_concluir_lote(atualizados, ultimo_id)` roda antes do commit de cada lote, na mesma transação.
+    """
     hoje = datetime.date.today()
-    query = db.query(app_models.Pagamento).join(
-        app_models.ContratoServico, 
-        app_models.Pagamento.id_contrato == app_models.ContratoServico.id_contrato
-    ).filter(
-        or_(
-            app_models.Pagamento.status_pagamento == "Atrasado", # Para re-processar se necessário (improvável)
-            (
-                (app_models.Pagamento.status_pagamento == "Pendente") &
-                (app_models.Pagamento.data_vencimento < hoje)
-            )
-        )
-    )
-    query_para_atualizar = db.query(app_models.Pagamento).filter(
-        app_models.Pagamento.status_pagamento == "Pendente",
-        app_models.Pagamento.data_vencimento < hoje
-    )
-    
-    num_atualizados = query_para_atualizar.update(
-        {"status_pagamento": "Atrasado"}, 
-        synchronize_session=False
-    )
-    
-    if num_atualizados > 0:
+    total_atualizados = 0
+    ultimo_id = 0
+    while True:
+        ids = db.scalars(
+            select(app_models.Pagamento.id_pagamento).where(
+                app_models.Pagamento.status_pagamento == "Pendente",
+                app_models.Pagamento.data_vencimento < hoje,
+                app_models.Pagamento.id_pagamento > ultimo_id,
+            ).order_by(app_models.Pagamento.id_pagamento).limit(tamanho_lote)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            break
+        ultimo_id = ids[-1]
+
+        # chave_ordenacao não muda: Pendente e Atrasado estão no mesmo grupo da listagem
+        atualizados = db.execute(
+            update(app_models.Pagamento).where(
+                app_models.Pagamento.id_pagamento.in_(ids),
+                app_models.Pagamento.status_pagamento == "Pendente", # Pode ter sido pago desde o SELECT (sem SKIP LOCKED)
+            ).values(status_pagamento="Atrasado").execution_options(synchronize_session=False)
+        ).rowcount
+        if atualizados:
+            # O UPDATE em massa não passa pelo flush: resumo mensal e versões (ETags) são atualizados aqui
+            deltas = resumo_financeiro.deltas_de_mudanca_de_status(db.connection(), ids, "Pendente", "Atrasado")
+            resumo_financeiro.aplicar_deltas(db.connection(), deltas)
+            proprietarios_afetados = {proprietario_id for proprietario_id, _, _ in deltas}
+            entity_versions.incrementar_versoes(db.connection(), [(p, "pagamentos") for p in proprietarios_afetados])
+        if ao_concluir_lote:
+            ao_concluir_lote(atualizados, ultimo_id)
         db.commit()
-        
-    return num_atualizados
+        total_atualizados += atualizados
+        if len(ids) < tamanho_lote:
+            break
+    return total_atualizados
 
 def delete_pagamento(db: Session, pagamento_id: int, proprietario_id: int) -> Optional[app_models.Pagamento]:
     db_pagamento = get_pagamento_por_id_e_proprietario(db, pagamento_id=pagamento_id, proprietario_id=proprietario_id)
@@ -196,3 +238,65 @@ def delete_pagamento(db: Session, pagamento_id: int, proprietario_id: int) -> Op
     db.delete(db_pagamento)
     db.commit()
     return db_pagamento
+
+
+def _meses_do_ano(coluna_mes, ano: Optional[int]) -> list:
+    return [] if ano is None else [coluna_mes.between(f"{ano:04d}-01", f"{ano:04d}-12")]
+
+def get_resumo_mensal(
+    db: Session, proprietario_id: int, ano: Optional[int] = None
+) -> List[schemas.ResumoFinanceiroMensal]:
+    """Totais por mês e status, lidos do resumo materializado (resumo_financeiro.py).
+
+    Pendentes já vencidos passam de 'Pendente' para 'Atrasado' na leitura (mesmo critério de
+    Pagamento.status_efetivo), então o resumo não depende da tarefa de atrasados ter rodado.
+    """
+    resumo = app_models.ResumoFinanceiroMensal
+    totais = {
+        (mes, status_pagamento): [quantidade, nominal, pago]
+        for mes, status_pagamento, quantidade, nominal, pago in db.execute(
+            select(
+                resumo.mes_referencia, resumo.status_pagamento, resumo.quantidade,
+                resumo.valor_nominal_total, resumo.valor_pago_total,
+            ).where(resumo.id_proprietario_user == proprietario_id, resumo.quantidade > 0, *_meses_do_ano(resumo.mes_referencia, ano))
+        ).all()
+    }
+
+    # Pendentes vencidos do proprietário (ix_pagamentos_pendentes_vencimento)
+    vencidos = db.execute(
+        select(
+            app_models.Pagamento.mes_referencia, func.count(), func.sum(app_models.Pagamento.valor_nominal),
+            func.sum(func.coalesce(app_models.Pagamento.valor_pago, 0)),
+        ).where(
+            app_models.Pagamento.id_proprietario_user == proprietario_id,
+            app_models.Pagamento.status_pagamento == "Pendente",
+            app_models.Pagamento.data_vencimento < datetime.date.today(),
+            *_meses_do_ano(app_models.Pagamento.mes_referencia, ano),
+        ).group_by(app_models.Pagamento.mes_referencia)
+    ).all()
+    for mes, quantidade, nominal, pago in vencidos:
+        pendente = totais.setdefault((mes, "Pendente"), [0, Decimal("0"), Decimal("0")])
+        atrasado = totais.setdefault((mes, "Atrasado"), [0, Decimal("0"), Decimal("0")])
+        for indice, valor in enumerate((quantidade, Decimal(nominal or 0), Decimal(pago or 0))):
+            pendente[indice] -= valor
+            atrasado[indice] += valor
+
+    return [
+        schemas.ResumoFinanceiroMensal(
+            mes_referencia=mes, status_pagamento=status_pagamento,
+            quantidade=quantidade, valor_nominal_total=nominal, valor_pago_total=pago,
+        )
+        for (mes, status_pagamento), (quantidade, nominal, pago) in sorted(totais.items())
+        if quantidade > 0
+    ]
+
+
+def iter_pagamentos_para_exportacao(
+    db: Session, proprietario_id: int, colunas: List[str], tamanho_lote: int = 500
+) -> Iterator[Sequence[RowMapping]]:
+    """Lê todos os pagamentos do proprietário em lotes por cursor no servidor (yield_per), sem montar objetos ORM."""
+    stmt = select(*(getattr(app_models.Pagamento, coluna) for coluna in colunas))\
+        .where(app_models.Pagamento.id_proprietario_user == proprietario_id)\
+        .order_by(app_models.Pagamento.id_pagamento)\
+        .execution_options(yield_per=tamanho_lote)
+    yield from db.execute(stmt).mappings().partitions()
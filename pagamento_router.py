@@ -1,12 +1,16 @@
 # pagamento_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import schemas
+import conciliacao
 import pagamento_crud # NOVO
 import app_models
-from core_utils import get_db, get_current_active_user
+from core_utils import get_async_read_db, get_db, get_read_db, get_current_active_user
+from entity_versions import etag_condicional
+from fieldsets import parse_fields, resposta_com_campos
 
 router = APIRouter(
     prefix="/pagamentos", # Rotas de pagamento diretas
@@ -29,8 +33,7 @@ def create_novo_pagamento(
     db: Session = Depends(get_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
-    # Validação do contrato (se pertence ao usuário) está no CRUD.
-    # Poderia adicionar validação para não permitir pagamentos duplicados para o mesmo contrato/mês-referência.
+    # Validação do contrato (se pertence ao usuário) e do mês duplicado estão no CRUD.
     
     created_pagamento = pagamento_crud.create_pagamento(
         db=db, pagamento_in=pagamento_in, proprietario_id=current_user.id_user
@@ -41,17 +44,21 @@ def create_novo_pagamento(
             raise HTTPException(status_code=400, detail="Contrato fornecido é inválido ou não pertence a você.")
         elif created_pagamento == "ERRO_MES_REFERENCIA_FORMATO":
             raise HTTPException(status_code=400, detail="Formato do mês de referência inválido. Use 'AAAA-MM'.")
+        elif created_pagamento == "ERRO_MES_REFERENCIA_DUPLICADO":
+            raise HTTPException(status_code=409, detail="Já existe um pagamento para este contrato neste mês de referência.")
         raise HTTPException(status_code=500, detail="Erro interno ao criar pagamento.")
     
     if not created_pagamento: # Genérico
         raise HTTPException(status_code=400, detail="Não foi possível criar o pagamento.")
     return created_pagamento
 
-@router.get("/atrasados", response_model=List[schemas.Pagamento])
-def read_meus_pagamentos_atrasados(
+@router.get("/atrasados", response_model=List[schemas.Pagamento], dependencies=[Depends(etag_condicional("pagamentos", varia_por_dia=True, assincrono=True))])
+async def read_meus_pagamentos_atrasados(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
     """
@@ -59,32 +66,69 @@ def read_meus_pagamentos_atrasados(
     (status 'Pendente' com data de vencimento passada OU status 'Atrasado')
     pertencentes ao operador logado.
     """
-    pagamentos_atrasados = pagamento_crud.get_pagamentos_atrasados_por_proprietario(
-        db, proprietario_id=current_user.id_user, skip=skip, limit=limit
+    campos = parse_fields(fields, schemas.Pagamento, "id_pagamento")
+    pagamentos_atrasados = await pagamento_crud.get_pagamentos_atrasados_por_proprietario_async(
+        db, proprietario_id=current_user.id_user, skip=skip, limit=limit, campos=campos
     )
-    return pagamentos_atrasados
+    return resposta_com_campos(pagamentos_atrasados, schemas.Pagamento, campos, response)
+
+@router.post("/conciliacao", response_model=schemas.ResultadoConciliacao)
+def conciliar_pagamentos(
+    arquivo: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: app_models.User = Depends(get_current_active_user)
+):
+    """
+    Baixa em lote a partir do arquivo de conciliação do banco: CSV com valor_pago e
+    id_transacao_gateway ou id_contrato + mes_referencia (opcionais: data_pagamento,
+    metodo_pagamento), ou OFX (FITID = id_transacao_gateway). Retorna as linhas conciliadas,
+    não encontradas, em conflito (pagamento já pago/cancelado, duplicado no arquivo...) e inválidas.
+    """
+    conteudo = arquivo.file.read(conciliacao.TAMANHO_MAXIMO_ARQUIVO + 1)
+    if len(conteudo) > conciliacao.TAMANHO_MAXIMO_ARQUIVO:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Arquivo maior que 5 MB.")
+    try:
+        linhas = conciliacao.ler_arquivo(conteudo)
+    except conciliacao.ArquivoInvalido as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return conciliacao.conciliar(db, proprietario_id=current_user.id_user, linhas=linhas)
+
+@router.get("/resumo-mensal", response_model=List[schemas.ResumoFinanceiroMensal], dependencies=[Depends(etag_condicional("pagamentos", varia_por_dia=True))])
+def read_resumo_mensal(
+    ano: Optional[int] = Query(None, ge=2000, le=2100, description="Filtra os meses de referência de um ano"),
+    db: Session = Depends(get_read_db),
+    current_user: app_models.User = Depends(get_current_active_user)
+):
+    """
+    Totais do operador por mês de referência e status (a receber, recebido, atrasado, cancelado):
+    quantidade de pagamentos, soma do valor nominal e do valor pago. Lido de um resumo mantido
+    a cada escrita, sem percorrer os pagamentos.
+    """
+    return pagamento_crud.get_resumo_mensal(db, proprietario_id=current_user.id_user, ano=ano)
 
 # Endpoint para listar pagamentos de um contrato específico do usuário logado
-@router.get("/por-contrato/{contrato_id}", response_model=List[schemas.Pagamento])
-def read_pagamentos_de_um_contrato(
+@router.get("/por-contrato/{contrato_id}", response_model=List[schemas.Pagamento], dependencies=[Depends(etag_condicional("pagamentos", varia_por_dia=True, assincrono=True))])
+async def read_pagamentos_de_um_contrato(
     contrato_id: int,
-    skip: int = 0, limit: int = 100,
-    db: Session = Depends(get_db),
+    response: Response,
+    skip: int = 0, limit: int = 100, fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
-    pagamentos_ou_erro = pagamento_crud.get_pagamentos_por_contrato_e_proprietario(
-        db, contrato_id=contrato_id, proprietario_id=current_user.id_user, skip=skip, limit=limit
+    campos = parse_fields(fields, schemas.Pagamento, "id_pagamento")
+    pagamentos_ou_erro = await pagamento_crud.get_pagamentos_por_contrato_e_proprietario_async(
+        db, contrato_id=contrato_id, proprietario_id=current_user.id_user, skip=skip, limit=limit, campos=campos
     )
     if isinstance(pagamentos_ou_erro, str): # Se o CRUD retornou erro (contrato inválido)
         if pagamentos_ou_erro == "ERRO_CONTRATO_INVALIDO":
              raise HTTPException(status_code=404, detail="Contrato não encontrado ou não pertence a você.")
     
-    return pagamentos_ou_erro # Retorna a lista de pagamentos
+    return resposta_com_campos(pagamentos_ou_erro, schemas.Pagamento, campos, response) # Retorna a lista de pagamentos
 
-@router.get("/{pagamento_id}", response_model=schemas.Pagamento)
+@router.get("/{pagamento_id}", response_model=schemas.Pagamento, dependencies=[Depends(etag_condicional("pagamentos", varia_por_dia=True))])
 def read_meu_pagamento_especifico(
     pagamento_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
     db_pagamento = pagamento_crud.get_pagamento_por_id_e_proprietario(
@@ -0,0 +1,176 @@
+# pagination.py
+import base64
+import binascii
+import datetime
+import json
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+# Paginação por cursor (keyset) para as listagens por proprietário.
+# O cursor é opaco para o cliente: base64 (url-safe) de um JSON com a chave do último item
+# da página. A próxima página é `WHERE pk > :ultimo_id ORDER BY pk LIMIT :limit`, que usa
+# os índices (id_proprietario_user, pk) e custa o mesmo na página 1 ou na 1000.
+# `skip`/`limit` continuam aceitos por compatibilidade (ordenados pela mesma chave).
+#
+# Com `?sort=campo` (ou `-campo`, decrescente) a chave passa a ser (campo, pk): o cursor leva
+# também o valor do campo no último item e o campo ordenado, e a próxima página é
+# `WHERE (campo, pk) > (:valor, :ultimo_id)` (ou `<` no decrescente).
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Ordenacao(NamedTuple):
+    campo: Optional[str] # None = ordem padrão, pela PK
+    descendente: bool = False
+
+
+SEM_ORDENACAO = Ordenacao(None)
+
+_TIPOS_VALOR_CURSOR = {
+    "date": datetime.date.fromisoformat,
+    "datetime": datetime.datetime.fromisoformat,
+    "time": datetime.time.fromisoformat,
+}
+
+
+def _valor_para_cursor(valor: Any) -> Any:
+    if isinstance(valor, (datetime.date, datetime.datetime, datetime.time)):
+        return [type(valor).__name__, valor.isoformat()]
+    return valor
+
+
+def _valor_do_cursor(valor: Any, tipo_coluna: type) -> Any:
+    """Decodifica `v` exigindo o tipo Python da coluna ordenada: o cursor vem do cliente e um
+    valor de outro tipo chegaria ao banco como um erro de comparação (500 no PostgreSQL)."""
+    if tipo_coluna.__name__ in _TIPOS_VALOR_CURSOR:
+        if not isinstance(valor, list) or len(valor) != 2 or valor[0] != tipo_coluna.__name__ or not isinstance(valor[1], str):
+            raise ValueError(valor)
+        return _TIPOS_VALOR_CURSOR[valor[0]](valor[1])
+    if type(valor) is bool and tipo_coluna is not bool:
+        raise ValueError(valor)
+    if tipo_coluna is float and isinstance(valor, int):
+        return float(valor)
+    if not isinstance(valor, tipo_coluna):
+        raise ValueError(valor)
+    return valor
+
+
+def encode_cursor(ultimo_id: int, ordenacao: Ordenacao = SEM_ORDENACAO, ultimo_valor: Any = None) -> str:
+    dados = {"id": ultimo_id}
+    if ordenacao.campo:
+        dados.update(s=("-" if ordenacao.descendente else "") + ordenacao.campo, v=_valor_para_cursor(ultimo_valor))
+    payload = json.dumps(dados, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def _cursor_invalido() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginação inválido.")
+
+
+def _decode_payload(cursor: str) -> dict:
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(dados, dict) or type(dados["id"]) is not int: # bool também é int
+            raise _cursor_invalido()
+        return dados
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise _cursor_invalido()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    return _decode_payload(cursor)["id"]
+
+
+def decode_cursor_ordenado(cursor: Optional[str], ordenacao: Ordenacao, modelo) -> Optional[Tuple[Any, int]]:
+    """Retorna (valor do campo ordenado, id) do último item; o cursor precisa ser da mesma ordenação
+    e o valor, do tipo da coluna ordenada em `modelo`."""
+    if not cursor:
+        return None
+    dados = _decode_payload(cursor)
+    sort = ("-" if ordenacao.descendente else "") + (ordenacao.campo or "")
+    if dados.get("s", "") != (sort if ordenacao.campo else ""):
+        raise _cursor_invalido()
+    if not ordenacao.campo:
+        return None, dados["id"]
+    try:
+        tipo_coluna = getattr(modelo, ordenacao.campo).type.python_type
+        return _valor_do_cursor(dados["v"], tipo_coluna), dados["id"]
+    except (KeyError, ValueError, TypeError):
+        raise _cursor_invalido()
+
+
+def parse_sort(sort: Optional[str], campos_permitidos: Sequence[str]) -> Ordenacao:
+    """Valida `?sort=campo` / `?sort=-campo` contra os campos ordenáveis do endpoint."""
+    if not sort:
+        return SEM_ORDENACAO
+    descendente = sort.startswith("-")
+    campo = sort.lstrip("-").strip()
+    if campo not in campos_permitidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ordenação inválida em 'sort': {campo}. Use um de: {', '.join(campos_permitidos)} (prefixo '-' para decrescente)."
+        )
+    return Ordenacao(campo, descendente)
+
+
+def paginar_por_chave(query: Query, coluna_pk, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> Query:
+    """Ordena pela PK e aplica o cursor (se houver) ou o offset legado."""
+    query = query.order_by(coluna_pk)
+    if after_id is not None:
+        query = query.filter(coluna_pk > after_id)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def paginar_ordenado(
+    query: Query, modelo, coluna_pk, ordenacao: Ordenacao, skip: int = 0, limit: int = 100,
+    apos: Optional[Tuple[Any, int]] = None
+) -> Query:
+    """Como `paginar_por_chave`, mas ordenando por (campo, pk) quando há `?sort=`.
+
+    Os campos ordenáveis devem ser NOT NULL: a comparação de tupla não alcança linhas com NULL.
+    """
+    if not ordenacao.campo or getattr(modelo, ordenacao.campo) is coluna_pk:
+        after_id = apos[1] if apos else None
+        if not ordenacao.descendente:
+            return paginar_por_chave(query, coluna_pk, skip=skip, limit=limit, after_id=after_id)
+        query = query.order_by(coluna_pk.desc())
+        if after_id is not None:
+            return query.filter(coluna_pk < after_id).limit(limit)
+        return (query.offset(skip) if skip else query).limit(limit)
+
+    coluna = getattr(modelo, ordenacao.campo)
+    if ordenacao.descendente:
+        query = query.order_by(coluna.desc(), coluna_pk.desc())
+    else:
+        query = query.order_by(coluna, coluna_pk)
+    if apos is not None:
+        chave, chave_apos = tuple_(coluna, coluna_pk), tuple_(*apos)
+        query = query.filter(chave < chave_apos if ordenacao.descendente else chave > chave_apos)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def set_next_cursor(
+    request: Request, response: Response, itens: List[Any], pk_attr: str, limit: int,
+    ordenacao: Ordenacao = SEM_ORDENACAO
+) -> None:
+    """Publica o cursor da próxima página em `X-Next-Cursor` e no header `Link` (rel="next").
+
+    Página incompleta significa que não há próxima página; nesse caso nenhum header é enviado.
+    """
+    if limit <= 0 or len(itens) < limit:
+        return
+    ultimo = itens[-1]
+    ultimo_valor = getattr(ultimo, ordenacao.campo) if ordenacao.campo else None
+    cursor = encode_cursor(getattr(ultimo, pk_attr), ordenacao, ultimo_valor)
+    response.headers[NEXT_CURSOR_HEADER] = cursor
+    proxima_url = request.url.remove_query_params("skip").include_query_params(cursor=cursor, limit=limit)
+    response.headers["Link"] = f'<{proxima_url}>; rel="next"'
@@ -0,0 +1,190 @@
+# request_metrics.py
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Métricas por requisição: tempo do handler, número de statements SQL e tempo total no banco.
+# Vão para o header Server-Timing de cada resposta e são agregadas (por processo/worker)
+# no endpoint /metrics em formato Prometheus.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROTA_NAO_ENCONTRADA = "<unmatched>"
+
+
+class RequestStats:
+    __slots__ = ("db_queries", "db_seconds")
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+# O objeto é compartilhado com o threadpool (o contexto é copiado para handlers `def`),
+# então o que o handler acumula fica visível para o middleware.
+_current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+def get_current_request_stats() -> Optional[RequestStats]:
+    return _current_request_stats.get()
+
+
+# --- Hooks do SQLAlchemy (valem para todos os engines: primário, réplica, testes) ---
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_do_statement(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("request_metrics_inicio", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _depois_do_statement(conn, cursor, statement, parameters, context, executemany):
+    inicio = conn.info["request_metrics_inicio"].pop()
+    stats = _current_request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_seconds += time.perf_counter() - inicio
+
+
+@event.listens_for(Engine, "handle_error")
+def _erro_no_statement(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("request_metrics_inicio"):
+        conn.info["request_metrics_inicio"].pop()
+
+
+# --- Agregação por rota ---
+
+class _RouteMetrics:
+    __slots__ = ("bucket_counts", "count", "total_seconds", "db_queries", "db_seconds")
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], _RouteMetrics] = {}
+        self._responses: Dict[Tuple[str, str, int], int] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._responses.clear()
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float, stats: RequestStats) -> None:
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = _RouteMetrics()
+            for i, limite in enumerate(LATENCY_BUCKETS):
+                if seconds <= limite:
+                    metrics.bucket_counts[i] += 1
+            metrics.count += 1
+            metrics.total_seconds += seconds
+            metrics.db_queries += stats.db_queries
+            metrics.db_seconds += stats.db_seconds
+            key = (method, route, status_code)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def render_prometheus(self) -> str:
+        import core_utils
+        linhas: List[str] = []
+        with self._lock:
+            routes = sorted(self._routes.items())
+            responses = sorted(self._responses.items())
+
+            linhas.append("# HELP http_requests_total Requisições HTTP atendidas por este worker.")
+            linhas.append("# TYPE http_requests_total counter")
+            for (method, route, status_code), total in responses:
+                linhas.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status_code}"}} {total}')
+
+            linhas.append("# HELP http_request_duration_seconds Tempo do handler por rota.")
+            linhas.append("# TYPE http_request_duration_seconds histogram")
+            for (method, route), metrics in routes:
+                labels = f'method="{method}",route="{_escape(route)}"'
+                for limite, acumulado in zip(LATENCY_BUCKETS, metrics.bucket_counts):
+                    linhas.append(f'http_request_duration_seconds_bucket{{{labels},le="{limite}"}} {acumulado}')
+                linhas.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {metrics.count}')
+                linhas.append(f"http_request_duration_seconds_sum{{{labels}}} {metrics.total_seconds:.6f}")
+                linhas.append(f"http_request_duration_seconds_count{{{labels}}} {metrics.count}")
+
+            linhas.append("# HELP http_request_db_queries_total Statements SQL executados pelas requisições da rota.")
+            linhas.append("# TYPE http_request_db_queries_total counter")
+            for (method, route), metrics in routes:
+                linhas.append(f'http_request_db_queries_total{{method="{method}",route="{_escape(route)}"}} {metrics.db_queries}')
+
+            linhas.append("# HELP http_request_db_duration_seconds_total Tempo total no banco pelas requisições da rota.")
+            linhas.append("# TYPE http_request_db_duration_seconds_total counter")
+            for (method, route), metrics in routes:
+                linhas.append(f'http_request_db_duration_seconds_total{{method="{method}",route="{_escape(route)}"}} {metrics.db_seconds:.6f}')
+
+        pool = core_utils.get_pool_metrics()
+        linhas.append("# HELP db_pool_checked_out Conexões do pool em uso neste worker.")
+        linhas.append("# TYPE db_pool_checked_out gauge")
+        linhas.append(f"db_pool_checked_out {pool.get('checked_out', 0)}")
+        linhas.append("# HELP db_pool_overflow Conexões abertas além de pool_size neste worker.")
+        linhas.append("# TYPE db_pool_overflow gauge")
+        linhas.append(f"db_pool_overflow {pool.get('overflow', 0)}")
+        linhas.append("# HELP db_pool_wait_seconds_total Tempo total esperando por uma conexão do pool.")
+        linhas.append("# TYPE db_pool_wait_seconds_total counter")
+        linhas.append(f"db_pool_wait_seconds_total {pool['wait']['total_wait_seconds']}")
+        linhas.append("# HELP db_pool_timeouts_total Checkouts que estouraram pool_timeout.")
+        linhas.append("# TYPE db_pool_timeouts_total counter")
+        linhas.append(f"db_pool_timeouts_total {pool['wait']['timeouts']}")
+        return "\n".join(linhas) + "\n"
+
+
+def _escape(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"')
+
+
+registry = MetricsRegistry()
+
+
+# --- Middleware ASGI ---
+
+class RequestMetricsMiddleware:
+    """Mede cada requisição HTTP, adiciona o header Server-Timing e registra no `registry`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request_stats.set(stats)
+        inicio = time.perf_counter()
+        status_code = 500
+
+        async def send_com_server_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                duracao_ms = (time.perf_counter() - inicio) * 1000
+                server_timing = (
+                    f'app;dur={duracao_ms:.1f}, '
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.db_queries} queries"'
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_com_server_timing)
+        finally:
+            _current_request_stats.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or ROTA_NAO_ENCONTRADA
+            registry.observe(scope["method"], route_path, status_code, time.perf_counter() - inicio, stats)
@@ -1,9 +1,13 @@
 # responsavel_crud.py
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Union
 
 import app_models
 import schemas
+from fieldsets import aplicar_campos
+from pagination import paginar_por_chave
 
 def create_responsavel(db: Session, responsavel: schemas.ResponsavelCreate, proprietario_id: int) -> app_models.Responsavel:
     db_responsavel = app_models.Responsavel(
@@ -15,8 +19,60 @@ def create_responsavel(db: Session, responsavel: schemas.ResponsavelCreate, prop
     db.refresh(db_responsavel)
     return db_responsavel
 
-def get_responsaveis_por_proprietario(db: Session, proprietario_id: int, skip: int = 0, limit: int = 100) -> List[app_models.Responsavel]:
-    return db.query(app_models.Responsavel).filter(app_models.Responsavel.id_proprietario_user == proprietario_id).offset(skip).limit(limit).all()
+def create_responsaveis_em_lote(
+    db: Session, responsaveis_in: List[schemas.ResponsavelCreate], proprietario_id: int
+) -> Union[List[Union[int, str]], str]:
+    """Cria vários responsáveis em uma transação. Retorna, por item, o id criado ou o código de erro.
+
+    CPFs e emails já cadastrados são buscados com um SELECT ... IN cada; duplicidades dentro
+    do próprio lote também são rejeitadas (vale o primeiro item).
+    """
+    cpfs = {responsavel_in.cpf for responsavel_in in responsaveis_in}
+    emails = {responsavel_in.email for responsavel_in in responsaveis_in}
+    cpfs_usados = set(db.scalars(
+        select(app_models.Responsavel.cpf).where(
+            app_models.Responsavel.id_proprietario_user == proprietario_id,
+            app_models.Responsavel.cpf.in_(cpfs)
+        )
+    ))
+    emails_usados = set(db.scalars(
+        select(app_models.Responsavel.email).where(
+            app_models.Responsavel.id_proprietario_user == proprietario_id,
+            app_models.Responsavel.email.in_(emails)
+        )
+    ))
+
+    resultados: List[Union[app_models.Responsavel, str]] = []
+    for responsavel_in in responsaveis_in:
+        if responsavel_in.cpf in cpfs_usados:
+            resultados.append("ERRO_CPF_DUPLICADO")
+        elif responsavel_in.email in emails_usados:
+            resultados.append("ERRO_EMAIL_DUPLICADO")
+        else:
+            cpfs_usados.add(responsavel_in.cpf)
+            emails_usados.add(responsavel_in.email)
+            resultados.append(app_models.Responsavel(**responsavel_in.model_dump(), id_proprietario_user=proprietario_id))
+
+    novos = [resultado for resultado in resultados if isinstance(resultado, app_models.Responsavel)]
+    if not novos:
+        return resultados # type: ignore[return-value]
+    db.add_all(novos)
+    try:
+        db.flush() # INSERT em lote; os ids são lidos aqui para não recarregar cada objeto após o commit
+    except IntegrityError: # Outro request cadastrou o mesmo CPF/email entre a validação e o INSERT
+        db.rollback()
+        return "ERRO_INTEGRIDADE_LOTE"
+    ids = [resultado if isinstance(resultado, str) else resultado.id_responsavel for resultado in resultados]
+    db.commit()
+    return ids
+
+def get_responsaveis_por_proprietario(
+    db: Session, proprietario_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+    campos: Optional[List[str]] = None
+) -> List[app_models.Responsavel]:
+    query = db.query(app_models.Responsavel).filter(app_models.Responsavel.id_proprietario_user == proprietario_id)
+    query = aplicar_campos(query, app_models.Responsavel, campos)
+    return paginar_por_chave(query, app_models.Responsavel.id_responsavel, skip=skip, limit=limit, after_id=after_id).all()
 
 def get_responsavel_por_id_e_proprietario(db: Session, responsavel_id: int, proprietario_id: int) -> Optional[app_models.Responsavel]:
     return db.query(app_models.Responsavel).filter(
@@ -58,4 +114,4 @@ def delete_responsavel(db: Session, responsavel_id: int, proprietario_id: int) -
         return None
     db.delete(db_responsavel)
     db.commit()
-    return db_responsavel
\ No newline at end of file
+    return db_responsavel
@@ -1,12 +1,15 @@
 # responsavel_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import schemas
 import responsavel_crud # NOVO
 import app_models
-from core_utils import get_db, get_current_active_user
+from core_utils import get_db, get_read_db, get_current_active_user, settings
+from entity_versions import etag_condicional
+from fieldsets import parse_fields, resposta_com_campos
+from pagination import decode_cursor, set_next_cursor
 
 router = APIRouter(
     prefix="/responsaveis",
@@ -39,21 +42,56 @@ def create_novo_responsavel(
             
     return responsavel_crud.create_responsavel(db=db, responsavel=responsavel_in, proprietario_id=current_user.id_user)
 
-@router.get("/", response_model=List[schemas.Responsavel])
-def read_meus_responsaveis(
-    skip: int = 0, limit: int = 100,
+@router.post("/bulk", response_model=schemas.ResultadoLote)
+def create_responsaveis_em_lote(
+    responsaveis_in: List[schemas.ResponsavelCreate],
     db: Session = Depends(get_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
+    """
+    Cria vários responsáveis em uma única transação. Itens com CPF ou email já cadastrados
+    (ou repetidos no próprio lote) são rejeitados individualmente, sem impedir os demais.
+    """
+    if not responsaveis_in:
+        raise HTTPException(status_code=400, detail="Envie ao menos um responsável.")
+    if len(responsaveis_in) > settings.BULK_MAX_ITENS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {settings.BULK_MAX_ITENS} responsáveis por requisição.")
+
+    resultados = responsavel_crud.create_responsaveis_em_lote(
+        db, responsaveis_in=responsaveis_in, proprietario_id=current_user.id_user
+    )
+    if resultados == "ERRO_INTEGRIDADE_LOTE":
+        raise HTTPException(status_code=409, detail="CPF ou email cadastrado simultaneamente por outra requisição. Reenvie o lote.")
+
+    itens = []
+    for indice, (responsavel_in, resultado) in enumerate(zip(responsaveis_in, resultados)):
+        if resultado == "ERRO_CPF_DUPLICADO":
+            itens.append(schemas.ResultadoLoteItem(indice=indice, erro=f"Você já possui um responsável com o CPF '{responsavel_in.cpf}'."))
+        elif resultado == "ERRO_EMAIL_DUPLICADO":
+            itens.append(schemas.ResultadoLoteItem(indice=indice, erro=f"Você já possui um responsável com o email '{responsavel_in.email}'."))
+        else:
+            itens.append(schemas.ResultadoLoteItem(indice=indice, id=resultado))
+    criados = sum(1 for item in itens if item.id is not None)
+    return schemas.ResultadoLote(criados=criados, rejeitados=len(itens) - criados, resultados=itens)
+
+@router.get("/", response_model=List[schemas.Responsavel], dependencies=[Depends(etag_condicional("responsaveis"))])
+def read_meus_responsaveis(
+    request: Request, response: Response,
+    skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: app_models.User = Depends(get_current_active_user)
+):
+    campos = parse_fields(fields, schemas.Responsavel, "id_responsavel")
     responsaveis = responsavel_crud.get_responsaveis_por_proprietario(
-        db, proprietario_id=current_user.id_user, skip=skip, limit=limit
+        db, proprietario_id=current_user.id_user, skip=skip, limit=limit, after_id=decode_cursor(cursor), campos=campos
     )
-    return responsaveis
+    set_next_cursor(request, response, responsaveis, "id_responsavel", limit)
+    return resposta_com_campos(responsaveis, schemas.Responsavel, campos, response)
 
-@router.get("/{responsavel_id}", response_model=schemas.Responsavel)
+@router.get("/{responsavel_id}", response_model=schemas.Responsavel, dependencies=[Depends(etag_condicional("responsaveis"))])
 def read_meu_responsavel_especifico(
     responsavel_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
     db_responsavel = responsavel_crud.get_responsavel_por_id_e_proprietario(
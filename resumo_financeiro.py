@@ -0,0 +1,130 @@
+# resumo_financeiro.py
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+import app_models
+from entity_versions import proprietario_do_objeto
+
+# Resumo financeiro mensal por proprietário (tabela resumos_financeiros_mensais).
+# Como em entity_versions, o listener de before_flush observa os pagamentos inseridos,
+# alterados e removidos pelos CRUDs (inclusive os gerados/removidos pela sincronização dos
+# contratos) e aplica a diferença nos totais na mesma transação. Escritas em massa que não
+# passam pelo flush (tarefa de atrasados) chamam aplicar_deltas diretamente.
+
+# (proprietario_id, mes_referencia, status_pagamento)
+ChaveResumo = Tuple[int, str, str]
+# [quantidade, valor_nominal_total, valor_pago_total]
+Deltas = Dict[ChaveResumo, List]
+
+# Colunas do pagamento que entram no resumo; alterações em outras colunas não mexem nos totais
+_COLUNAS_RESUMO = ("id_contrato", "mes_referencia", "status_pagamento", "valor_nominal", "valor_pago")
+
+
+def novos_deltas() -> Deltas:
+    return defaultdict(lambda: [0, Decimal("0"), Decimal("0")])
+
+
+def acumular(deltas: Deltas, chave: ChaveResumo, sinal: int, valor_nominal, valor_pago, quantidade: int = 1) -> None:
+    delta = deltas[chave]
+    delta[0] += sinal * quantidade
+    delta[1] += sinal * Decimal(valor_nominal or 0)
+    delta[2] += sinal * Decimal(valor_pago or 0)
+
+
+def aplicar_deltas(conn: Connection, deltas: Deltas) -> None:
+    """Soma (upsert) cada delta na linha (proprietario, mês, status) do resumo."""
+    tabela = app_models.ResumoFinanceiroMensal.__table__
+    dialetos_com_upsert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+    insert_fn = dialetos_com_upsert.get(conn.dialect.name)
+    # Ordem fixa para que transações concorrentes travem as linhas na mesma sequência
+    for (proprietario_id, mes, status_pagamento), (quantidade, nominal, pago) in sorted(deltas.items()):
+        if quantidade == 0 and nominal == 0 and pago == 0:
+            continue
+        valores = {"quantidade": quantidade, "valor_nominal_total": nominal, "valor_pago_total": pago}
+        if insert_fn is not None:
+            stmt = insert_fn(tabela).values(
+                id_proprietario_user=proprietario_id, mes_referencia=mes, status_pagamento=status_pagamento, **valores
+            )
+            conn.execute(stmt.on_conflict_do_update(
+                index_elements=[tabela.c.id_proprietario_user, tabela.c.mes_referencia, tabela.c.status_pagamento],
+                set_={coluna: tabela.c[coluna] + stmt.excluded[coluna] for coluna in valores},
+            ))
+            continue
+        result = conn.execute(
+            update(tabela).where(
+                tabela.c.id_proprietario_user == proprietario_id, tabela.c.mes_referencia == mes,
+                tabela.c.status_pagamento == status_pagamento,
+            ).values({coluna: tabela.c[coluna] + valor for coluna, valor in valores.items()})
+        )
+        if result.rowcount == 0:
+            conn.execute(tabela.insert().values(
+                id_proprietario_user=proprietario_id, mes_referencia=mes, status_pagamento=status_pagamento, **valores
+            ))
+
+
+def _estado_gravado(conn: Connection, ids: Iterable[int]) -> List:
+    """Valores ainda no banco (antes do flush) dos pagamentos alterados/removidos, com o proprietário."""
+    return conn.execute(
+        select(
+            app_models.Pagamento.id_proprietario_user, app_models.Pagamento.mes_referencia,
+            app_models.Pagamento.status_pagamento, app_models.Pagamento.valor_nominal, app_models.Pagamento.valor_pago,
+        ).where(app_models.Pagamento.id_pagamento.in_(sorted(ids)))
+    ).all()
+
+
+def _alterou_resumo(obj: app_models.Pagamento) -> bool:
+    estado = inspect(obj)
+    return any(estado.attrs[coluna].history.has_changes() for coluna in _COLUNAS_RESUMO)
+
+
+@event.listens_for(Session, "before_flush")
+def _resumir_pagamentos(session: Session, flush_context, instances) -> None:
+    deltas = novos_deltas()
+    gravados = set() # ids cujo estado anterior sai do resumo
+    atuais = [] # objetos cujo estado novo entra no resumo
+    for obj in session.new:
+        if isinstance(obj, app_models.Pagamento):
+            atuais.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, app_models.Pagamento) and obj not in session.deleted and _alterou_resumo(obj):
+            gravados.add(obj.id_pagamento)
+            atuais.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, app_models.Pagamento) and obj.id_pagamento is not None:
+            gravados.add(obj.id_pagamento)
+    if not atuais and not gravados:
+        return
+
+    conn = session.connection()
+    if gravados:
+        for proprietario_id, mes, status_pagamento, nominal, pago in _estado_gravado(conn, gravados):
+            acumular(deltas, (proprietario_id, mes, status_pagamento), -1, nominal, pago)
+    with session.no_autoflush:
+        for obj in atuais:
+            proprietario_id = proprietario_do_objeto(conn, obj)
+            if proprietario_id is None:
+                continue
+            acumular(deltas, (proprietario_id, obj.mes_referencia, obj.status_pagamento), 1, obj.valor_nominal, obj.valor_pago)
+    aplicar_deltas(conn, deltas)
+
+
+def deltas_de_mudanca_de_status(conn: Connection, ids: Iterable[int], status_anterior: str, status_novo: str) -> Deltas:
+    """Deltas de um UPDATE em massa de status: os pagamentos `ids` (já com `status_novo`) saem de `status_anterior`."""
+    deltas = novos_deltas()
+    linhas = conn.execute(
+        select(
+            app_models.Pagamento.id_proprietario_user, app_models.Pagamento.mes_referencia, func.count(),
+            func.sum(app_models.Pagamento.valor_nominal), func.sum(func.coalesce(app_models.Pagamento.valor_pago, 0)),
+        ).where(app_models.Pagamento.id_pagamento.in_(sorted(ids)), app_models.Pagamento.status_pagamento == status_novo)
+        .group_by(app_models.Pagamento.id_proprietario_user, app_models.Pagamento.mes_referencia)
+    ).all()
+    for proprietario_id, mes, quantidade, nominal, pago in linhas:
+        acumular(deltas, (proprietario_id, mes, status_anterior), -1, nominal, pago, quantidade)
+        acumular(deltas, (proprietario_id, mes, status_novo), 1, nominal, pago, quantidade)
+    return deltas
@@ -1,11 +1,14 @@
 # rota_crud.py
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
-from typing import List, Optional, Union
+from typing import Any, List, Optional, Union
 from datetime import date
 
 import app_models
 import schemas
+from expand import Expansao, aplicar_expand
+from fieldsets import aplicar_campos
+from pagination import Ordenacao, SEM_ORDENACAO, paginar_ordenado
 # Importar CRUDs necessários para validação
 import van_crud
 import motorista_crud
@@ -31,14 +34,41 @@ def create_rota(db: Session, rota_in: schemas.RotaCreate, proprietario_id: int)
     db.refresh(db_rota)
     return db_rota
 
-def get_rotas_por_proprietario(db: Session, proprietario_id: int, skip: int = 0, limit: int = 100) -> List[app_models.Rota]:
-    return db.query(app_models.Rota).filter(app_models.Rota.id_proprietario_user == proprietario_id).offset(skip).limit(limit).all()
-
-def get_rota_por_id_e_proprietario(db: Session, rota_id: int, proprietario_id: int) -> Optional[app_models.Rota]:
-    return db.query(app_models.Rota).filter(
+# Relações aceitas em `?expand=` (ver expand.py)
+EXPANSOES_ROTA = {
+    "van": Expansao("van_designada", "van_designada_obj", "vans"),
+    "motorista": Expansao("motorista_escalado", "motorista_escalado_obj", "motoristas"),
+    "escola": Expansao("escola_atendida", "escola_atendida_obj", "escolas"),
+}
+
+# Campos aceitos em `?sort=` (todos NOT NULL, ver pagination.paginar_ordenado)
+CAMPOS_ORDENACAO_ROTAS = ("id_rota", "nome_rota")
+
+def get_rotas_por_proprietario(
+    db: Session, proprietario_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+    campos: Optional[List[str]] = None, ativa: Optional[bool] = None, id_escola_atendida: Optional[int] = None,
+    ordenacao: Ordenacao = SEM_ORDENACAO, after_valor: Any = None, expandir: Optional[List[str]] = None
+) -> List[app_models.Rota]:
+    query = db.query(app_models.Rota).filter(app_models.Rota.id_proprietario_user == proprietario_id)
+    if ativa is not None:
+        query = query.filter(app_models.Rota.ativa == ativa)
+    if id_escola_atendida is not None:
+        query = query.filter(app_models.Rota.id_escola_atendida == id_escola_atendida)
+    if campos and ordenacao.campo and ordenacao.campo not in campos:
+        campos = campos + [ordenacao.campo] # O valor do último item vai para o cursor
+    query = aplicar_campos(query, app_models.Rota, campos)
+    query = aplicar_expand(query, app_models.Rota, EXPANSOES_ROTA, expandir)
+    apos = (after_valor, after_id) if after_id is not None else None
+    return paginar_ordenado(query, app_models.Rota, app_models.Rota.id_rota, ordenacao, skip=skip, limit=limit, apos=apos).all()
+
+def get_rota_por_id_e_proprietario(
+    db: Session, rota_id: int, proprietario_id: int, expandir: Optional[List[str]] = None
+) -> Optional[app_models.Rota]:
+    query = db.query(app_models.Rota).filter(
         app_models.Rota.id_rota == rota_id,
         app_models.Rota.id_proprietario_user == proprietario_id
-    ).first()
+    )
+    return aplicar_expand(query, app_models.Rota, EXPANSOES_ROTA, expandir).first()
 
 def get_rota_by_nome_e_proprietario(db: Session, nome_rota: str, proprietario_id: int) -> Optional[app_models.Rota]:
     return db.query(app_models.Rota).filter(
@@ -145,7 +175,11 @@ def get_alunos_da_rota_detalhes(db: Session, rota_id: int, proprietario_id: int)
     if not rota:
         return "ERRO_ROTA_INVALIDA"
     # Retorna os objetos AlunosPorRota, que têm o relacionamento 'aluno' para pegar os detalhes do aluno.
-    return db.query(app_models.AlunosPorRota).filter(app_models.AlunosPorRota.id_rota == rota_id).all()
+    # O aluno vem no mesmo SELECT (joinedload) para não gerar uma query por associação na serialização.
+    return db.query(app_models.AlunosPorRota)\
+        .options(joinedload(app_models.AlunosPorRota.aluno))\
+        .filter(app_models.AlunosPorRota.id_rota == rota_id)\
+        .all()
 
 def get_aluno_rota_associacao_por_id(db: Session, aluno_rota_id: int, proprietario_id: int) -> Optional[app_models.AlunosPorRota]:
     # Verifica a propriedade através da rota associada
@@ -193,4 +227,4 @@ def delete_associacao_aluno_rota(db: Session, aluno_rota_id: int, proprietario_i
         return None
     db.delete(db_aluno_rota)
     db.commit()
-    return db_aluno_rota
\ No newline at end of file
+    return db_aluno_rota
@@ -1,12 +1,17 @@
 # rota_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import schemas
 import rota_crud # NOVO
 import app_models
-from core_utils import get_db, get_current_active_user
+from core_utils import get_db, get_read_db, get_current_active_user
+from entity_versions import etag_condicional
+from fast_json import resposta_lista
+from expand import item_expandido, parse_expand, resposta_expandida
+from fieldsets import parse_fields, resposta_com_campos
+from pagination import decode_cursor_ordenado, parse_sort, set_next_cursor
 
 router = APIRouter(
     prefix="/rotas",
@@ -46,29 +51,44 @@ def create_nova_rota(
         raise HTTPException(status_code=400, detail="Não foi possível criar a rota.")
     return created_rota
 
-@router.get("/", response_model=List[schemas.Rota])
+@router.get("/", response_model=List[schemas.Rota], dependencies=[Depends(etag_condicional("rotas", expansoes=rota_crud.EXPANSOES_ROTA))])
 def read_minhas_rotas(
-    skip: int = 0, limit: int = 100,
-    db: Session = Depends(get_db),
+    request: Request, response: Response,
+    skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[str] = None,
+    ativa: Optional[bool] = None, id_escola_atendida: Optional[int] = None,
+    sort: Optional[str] = Query(None, description="Campo de ordenação (prefixo '-' para decrescente): " + ", ".join(rota_crud.CAMPOS_ORDENACAO_ROTAS)),
+    expand: Optional[str] = Query(None, description="Objetos relacionados a incluir: van,motorista,escola (resposta no formato RotaExpandida)"),
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
+    campos = parse_fields(fields, schemas.Rota, "id_rota")
+    expandir = parse_expand(expand, rota_crud.EXPANSOES_ROTA, campos)
+    ordenacao = parse_sort(sort, rota_crud.CAMPOS_ORDENACAO_ROTAS)
+    after_valor, after_id = decode_cursor_ordenado(cursor, ordenacao, app_models.Rota) or (None, None)
     rotas = rota_crud.get_rotas_por_proprietario(
-        db, proprietario_id=current_user.id_user, skip=skip, limit=limit
+        db, proprietario_id=current_user.id_user, skip=skip, limit=limit, after_id=after_id, campos=campos,
+        ativa=ativa, id_escola_atendida=id_escola_atendida, ordenacao=ordenacao, after_valor=after_valor, expandir=expandir
     )
-    return rotas
+    set_next_cursor(request, response, rotas, "id_rota", limit, ordenacao)
+    if expandir:
+        return resposta_expandida(rotas, schemas.RotaExpandida, rota_crud.EXPANSOES_ROTA, expandir, response)
+    return resposta_com_campos(rotas, schemas.Rota, campos, response)
 
-@router.get("/{rota_id}", response_model=schemas.Rota)
+@router.get("/{rota_id}", response_model=schemas.Rota, dependencies=[Depends(etag_condicional("rotas", expansoes=rota_crud.EXPANSOES_ROTA))])
 def read_minha_rota_especifica(
     rota_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    expand: Optional[str] = Query(None, description="Objetos relacionados a incluir: van,motorista,escola (resposta no formato RotaExpandida)"),
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
+    expandir = parse_expand(expand, rota_crud.EXPANSOES_ROTA)
     db_rota = rota_crud.get_rota_por_id_e_proprietario(
-        db, rota_id=rota_id, proprietario_id=current_user.id_user
+        db, rota_id=rota_id, proprietario_id=current_user.id_user, expandir=expandir
     )
     if db_rota is None:
         raise HTTPException(status_code=404, detail="Rota não encontrada ou não pertence a você")
-    return db_rota
+    return item_expandido(db_rota, schemas.Rota, schemas.RotaExpandida, rota_crud.EXPANSOES_ROTA, expandir, response)
 
 @router.put("/{rota_id}", response_model=schemas.Rota)
 def update_minha_rota(
@@ -139,10 +159,11 @@ def add_aluno_a_rota(
     return associacao
 
 
-@router.get("/{rota_id}/alunos", response_model=List[schemas.AlunosPorRotaDetalhes])
+@router.get("/{rota_id}/alunos", response_model=List[schemas.AlunosPorRotaDetalhes], dependencies=[Depends(etag_condicional("rotas", "alunos"))])
 def get_alunos_em_rota(
     rota_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
     alunos_associados = rota_crud.get_alunos_da_rota_detalhes(
@@ -150,7 +171,7 @@ def get_alunos_em_rota(
     )
     if isinstance(alunos_associados, str): # Caso o CRUD retorne erro de rota inválida
         raise HTTPException(status_code=404, detail="Rota não encontrada ou não pertence a você.")
-    return alunos_associados
+    return resposta_lista(alunos_associados, schemas.AlunosPorRotaDetalhes, response)
 
 
 # O ID aqui é o id_aluno_rota (da tabela de associação)
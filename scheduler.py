@@ -0,0 +1,243 @@
+# scheduler.py
+import asyncio
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import NullPool
+
+import pagamento_crud
+import tarefa_crud
+from core_utils import SessionLocal, engine, settings
+
+try:
+    import fcntl
+except ImportError: # Windows: sem eleição por arquivo (só para desenvolvimento local)
+    fcntl = None
+
+# Agendador de tarefas periódicas dentro da aplicação, iniciado no lifespan (main.py).
+# Cada worker do gunicorn (e cada réplica) sobe um agendador, mas só o líder executa as tarefas:
+# no PostgreSQL a liderança é um advisory lock de sessão mantido numa conexão dedicada (fora do
+# pool da aplicação, que não perde uma conexão enquanto o processo for o líder); nos
+# demais bancos (SQLite) é um flock num arquivo ao lado do banco. Se o líder morre, a conexão
+# (ou o arquivo) é liberada e outro worker assume na próxima tentativa. As tarefas rodam em
+# sequência numa thread, então uma execução nunca se sobrepõe à anterior; o intervalo recebe
+# um jitter aleatório para as réplicas não baterem no banco no mesmo instante.
+
+# Chave do pg_advisory_lock da liderança (int64 arbitrário, fixo para toda a aplicação)
+CHAVE_LOCK_LIDER = 7_135_420_861_017
+
+
+class TarefaAgendada(NamedTuple):
+    nome: str
+    intervalo_segundos: int
+    executar: Callable[[], None] # Síncrona; roda fora do event loop
+
+
+class LiderPostgres:
+    """Liderança por pg_try_advisory_lock numa conexão mantida aberta enquanto este processo for o líder.
+
+    `engine_lider` deve ser um engine só da eleição (ver `criar_engine_lider`), não o da aplicação.
+    """
+
+    def __init__(self, engine_lider: Engine):
+        self.engine = engine_lider
+        self.conexao: Optional[Connection] = None
+
+    def tentar_assumir(self) -> bool:
+        conexao = self.engine.connect()
+        try:
+            obtido = conexao.scalar(text("SELECT pg_try_advisory_lock(:chave)"), {"chave": CHAVE_LOCK_LIDER})
+            conexao.commit() # O lock é da sessão; não deixa a conexão "idle in transaction"
+        except DBAPIError:
+            conexao.invalidate()
+            conexao.close()
+            return False
+        if not obtido:
+            conexao.close()
+            return False
+        self.conexao = conexao
+        return True
+
+    def ainda_lider(self) -> bool:
+        if self.conexao is None:
+            return False
+        try:
+            self.conexao.scalar(text("SELECT 1"))
+            self.conexao.commit()
+            return True
+        except DBAPIError: # Conexão caiu: o servidor já soltou o lock
+            self.conexao.invalidate()
+            self.conexao.close()
+            self.conexao = None
+            return False
+
+    def liberar(self) -> None:
+        if self.conexao is None:
+            return
+        try:
+            self.conexao.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": CHAVE_LOCK_LIDER})
+            self.conexao.commit()
+        except DBAPIError:
+            self.conexao.invalidate() # Descarta a conexão em vez de devolvê-la ao pool com o lock
+        finally:
+            self.conexao.close()
+            self.conexao = None
+
+
+class LiderArquivo:
+    """Liderança por flock exclusivo num arquivo; o sistema operacional solta o lock se o processo morrer."""
+
+    def __init__(self, caminho: str):
+        self.caminho = caminho
+        self.arquivo = None
+
+    def tentar_assumir(self) -> bool:
+        if fcntl is None:
+            return True
+        arquivo = open(self.caminho, "a+")
+        try:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            arquivo.close()
+            return False
+        arquivo.seek(0)
+        arquivo.truncate()
+        arquivo.write(str(os.getpid())) # Diagnóstico: quem é o líder
+        arquivo.flush()
+        self.arquivo = arquivo
+        return True
+
+    def ainda_lider(self) -> bool:
+        return fcntl is None or self.arquivo is not None
+
+    def liberar(self) -> None:
+        if self.arquivo is None:
+            return
+        try:
+            fcntl.flock(self.arquivo.fileno(), fcntl.LOCK_UN)
+        finally:
+            self.arquivo.close()
+            self.arquivo = None
+
+
+def caminho_lock_arquivo(database_url: str) -> str:
+    if settings.SCHEDULER_LOCK_FILE:
+        return settings.SCHEDULER_LOCK_FILE
+    if database_url.startswith("sqlite:///") and database_url != "sqlite:///:memory:":
+        return database_url[len("sqlite:///"):] + ".scheduler.lock"
+    return os.path.join(tempfile.gettempdir(), "scholary-scheduler.lock")
+
+
+class Agendador:
+    def __init__(
+        self, tarefas: List[TarefaAgendada], eleicao, jitter_segundos: float = 0,
+        intervalo_eleicao_segundos: float = 30
+    ):
+        self.tarefas = tarefas
+        self.eleicao = eleicao
+        self.jitter_segundos = jitter_segundos
+        self.intervalo_eleicao_segundos = intervalo_eleicao_segundos
+        self.lider = False
+        self._proxima_execucao: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._execucao: Optional[asyncio.Future] = None # Tarefa rodando na thread, se houver
+
+    def _jitter(self) -> float:
+        return random.uniform(0, self.jitter_segundos) if self.jitter_segundos > 0 else 0.0
+
+    async def iniciar(self) -> None:
+        self._task = asyncio.create_task(self._loop(), name="agendador")
+
+    async def parar(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._execucao is not None:
+            # Cancelar o loop não interrompe a thread da tarefa: a liderança só é solta depois que
+            # ela termina, senão outro worker assumiria e rodaria a mesma tarefa em paralelo
+            try:
+                await self._execucao
+            except Exception as e:
+                print(f"LOG ERRO: Tarefa agendada falhou durante o desligamento: {e}")
+            self._execucao = None
+        if self.lider:
+            await asyncio.to_thread(self.eleicao.liberar)
+            self.lider = False
+
+    async def _loop(self) -> None:
+        while True:
+            await self._ciclo()
+            await asyncio.sleep(self._espera_ate_proximo_ciclo())
+
+    async def _ciclo(self) -> None:
+        if self.lider:
+            self.lider = await asyncio.to_thread(self.eleicao.ainda_lider)
+            if not self.lider:
+                print("LOG ALERTA: Agendador perdeu a liderança; as tarefas param neste worker.")
+        if not self.lider:
+            self.lider = await asyncio.to_thread(self.eleicao.tentar_assumir)
+            if not self.lider:
+                return
+            print(f"LOG INFO: Agendador assumiu a liderança (pid {os.getpid()}).")
+            agora = time.monotonic()
+            # Primeira execução logo após assumir, espalhada pelo jitter
+            self._proxima_execucao = {tarefa.nome: agora + self._jitter() for tarefa in self.tarefas}
+
+        for tarefa in self.tarefas:
+            if time.monotonic() < self._proxima_execucao[tarefa.nome]:
+                continue
+            # shield: o cancelamento do loop (parar) não chega a este future, que `parar` aguarda
+            self._execucao = asyncio.ensure_future(asyncio.to_thread(tarefa.executar))
+            try:
+                await asyncio.shield(self._execucao)
+            except Exception as e:
+                print(f"LOG ERRO: Tarefa agendada '{tarefa.nome}' falhou: {e}")
+            self._execucao = None
+            # O intervalo conta a partir do fim da execução: não há sobreposição nem rajadas de atraso
+            self._proxima_execucao[tarefa.nome] = time.monotonic() + tarefa.intervalo_segundos + self._jitter()
+
+    def _espera_ate_proximo_ciclo(self) -> float:
+        if not self.lider or not self._proxima_execucao:
+            return self.intervalo_eleicao_segundos
+        ate_proxima = min(self._proxima_execucao.values()) - time.monotonic()
+        return max(0.0, min(ate_proxima, self.intervalo_eleicao_segundos))
+
+
+def _tarefa_pagamentos_atrasados() -> None:
+    db = SessionLocal()
+    try:
+        execucao = tarefa_crud.executar_com_historico(
+            db, tarefa_crud.TAREFA_PAGAMENTOS_ATRASADOS, pagamento_crud.atualizar_pagamentos_para_atrasado
+        )
+        if execucao is not None:
+            print(f"LOG INFO: Agendador: {execucao.registros_atualizados} pagamentos marcados como atrasados.")
+    finally:
+        db.close()
+
+
+def criar_engine_lider() -> Engine:
+    """Engine da eleição: NullPool, a conexão do lock é aberta e fechada pela própria eleição."""
+    return create_engine(settings.DATABASE_URL, poolclass=NullPool)
+
+
+def criar_agendador() -> Agendador:
+    if engine.dialect.name == "postgresql":
+        eleicao = LiderPostgres(criar_engine_lider())
+    else:
+        eleicao = LiderArquivo(caminho_lock_arquivo(settings.DATABASE_URL))
+    tarefas = [
+        TarefaAgendada(
+            tarefa_crud.TAREFA_PAGAMENTOS_ATRASADOS, settings.SCHEDULER_OVERDUE_INTERVAL_SECONDS, _tarefa_pagamentos_atrasados
+        ),
+    ]
+    return Agendador(tarefas, eleicao, jitter_segundos=settings.SCHEDULER_JITTER_SECONDS)
@@ -1,7 +1,7 @@
 # schemas.py
 from decimal import Decimal
-from pydantic import BaseModel, EmailStr, ConfigDict, Field
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, TypeAdapter, model_validator
+from typing import Dict, Optional, List
 from datetime import datetime, date, time
 
 class Token(BaseModel):
@@ -111,6 +111,25 @@ class Aluno(AlunoBase):
     # escola_obj: Optional[Escola] = None # Renomeado para evitar conflito
     model_config = ConfigDict(from_attributes=True)
 
+# Resposta dos endpoints de criação em lote (/bulk): um resultado por item, na ordem enviada
+class ResultadoLoteItem(BaseModel):
+    indice: int
+    id: Optional[int] = None # ID criado, quando o item foi inserido
+    erro: Optional[str] = None # Motivo da rejeição, quando não foi
+
+class ResultadoLote(BaseModel):
+    criados: int
+    rejeitados: int
+    resultados: List[ResultadoLoteItem]
+
+# Resultado da busca textual (/busca): tipo da entidade, id e o texto que casou com o termo
+class ResultadoBusca(BaseModel):
+    tipo: str # 'alunos', 'responsaveis', 'escolas' ou 'vans'
+    id: int
+    titulo: str
+    detalhe: Optional[str] = None
+    score: float
+
 class MotoristaBase(BaseModel):
     nome_completo: str
     cpf: str # Validação de formato e unicidade por proprietário no backend
@@ -170,10 +189,14 @@ class Van(VanBase): # Schema de resposta
     id_van: int
     data_cadastro: datetime
     # id_proprietario_user: Optional[int] = None # Geralmente não precisa expor
-    # Se quiser retornar o objeto Motorista completo em vez do ID:
-    # motorista_padrao_obj: Optional[Motorista] = None # Requereria que Motorista schema esteja definido antes
+    # Objeto Motorista completo: VanExpandida (?expand=motorista)
     model_config = ConfigDict(from_attributes=True)
 
+# Respostas com ?expand=: os *_obj são lidos das relationships (validation_alias) e só
+# aparecem na resposta quando pedidos (ver expand.py)
+class VanExpandida(Van):
+    motorista_padrao_obj: Optional[Motorista] = Field(default=None, validation_alias="motorista_padrao")
+
 class ContratoServicoBase(BaseModel):
     id_aluno: int # ID de um Aluno existente (do mesmo proprietário)
     id_responsavel_financeiro: int # ID de um Responsavel existente (do mesmo proprietário)
@@ -207,11 +230,13 @@ class ContratoServico(ContratoServicoBase): # Schema de resposta
     id_contrato: int
     data_cadastro: datetime
     # id_proprietario_user: Optional[int] = None # Geralmente não precisa expor
-    # Se quiser retornar os objetos Aluno e Responsavel completos:
-    # aluno_obj: Optional[Aluno] = None # Renomear para evitar conflito com id_aluno
-    # responsavel_financeiro_obj: Optional[Responsavel] = None # Renomear
+    # Objetos Aluno e Responsavel completos: ContratoServicoExpandido (?expand=aluno,responsavel)
     model_config = ConfigDict(from_attributes=True)
 
+class ContratoServicoExpandido(ContratoServico):
+    aluno_obj: Optional[Aluno] = Field(default=None, validation_alias="aluno")
+    responsavel_financeiro_obj: Optional[Responsavel] = Field(default=None, validation_alias="responsavel_financeiro")
+
 class PagamentoBase(BaseModel):
     id_contrato: int # ID de um ContratoServico existente (do mesmo proprietário)
     mes_referencia: str # Formato 'AAAA-MM'
@@ -248,9 +273,10 @@ class PagamentoUpdate(BaseModel): # Para atualizações parciais (ex: registrar
 
 class Pagamento(PagamentoBase): # Schema de resposta
     id_pagamento: int
+    status_efetivo: Optional[str] = None # Calculado na leitura: pendente vencido é 'Atrasado' (app_models.Pagamento)
     data_geracao: datetime
     data_baixa: Optional[datetime] = None
-    # id_proprietario_user não está diretamente no Pagamento, mas no Contrato.
+    # id_proprietario_user é uma cópia interna do dono do contrato e não é exposto.
     # Se quiser mostrar o objeto ContratoServico:
     # contrato_obj: Optional[ContratoServico] = None
     model_config = ConfigDict(from_attributes=True)
@@ -323,8 +349,81 @@ class Rota(RotaBase): # Schema de resposta para Rota
     data_cadastro: datetime
     # Para exibir os alunos diretamente na resposta da Rota:
     # alunos_na_rota: List[AlunosPorRotaDetalhes] = [] # Ou List[Aluno] se simplificar
-    # Para exibir os objetos Van, Motorista, Escola em vez de IDs:
-    # van_designada_obj: Optional[Van] = None
-    # motorista_escalado_obj: Optional[Motorista] = None
-    # escola_atendida_obj: Optional[Escola] = None
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    # Objetos Van, Motorista e Escola completos: RotaExpandida (?expand=van,motorista,escola)
+    model_config = ConfigDict(from_attributes=True)
+
+class RotaExpandida(Rota):
+    van_designada_obj: Optional[Van] = Field(default=None, validation_alias="van_designada")
+    motorista_escalado_obj: Optional[Motorista] = Field(default=None, validation_alias="motorista_escalado")
+    escola_atendida_obj: Optional[Escola] = Field(default=None, validation_alias="escola_atendida")
+
+# Histórico das tarefas agendadas (GET /tasks/runs)
+class ExecucaoTarefa(BaseModel):
+    id_execucao: int
+    tarefa: str
+    status_execucao: str # Executando, Concluída, Falhou
+    iniciada_em: datetime
+    finalizada_em: Optional[datetime] = None
+    duracao_ms: Optional[int] = None
+    lotes_processados: int
+    registros_atualizados: int
+    ultimo_id_processado: Optional[int] = None
+    erro: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
+
+# Conciliação bancária (POST /pagamentos/conciliacao)
+class LinhaConciliacao(BaseModel):
+    # Identificação: pela transação do gateway/banco OU pelo contrato + mês de referência
+    id_transacao_gateway: Optional[str] = None
+    id_contrato: Optional[int] = None
+    mes_referencia: Optional[str] = Field(default=None, pattern=r"^\d{4}-\d{2}$")
+    valor_pago: Decimal = Field(gt=0)
+    data_pagamento: Optional[date] = None # Padrão: hoje (mesma regra do PUT /pagamentos/{id})
+    metodo_pagamento: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _identificacao(self):
+        if not self.id_transacao_gateway and not (self.id_contrato and self.mes_referencia):
+            raise ValueError("Informe id_transacao_gateway ou id_contrato e mes_referencia.")
+        return self
+
+class ItemConciliacao(BaseModel):
+    linha: int # Linha do CSV ou posição da transação no OFX
+    id_pagamento: Optional[int] = None
+    id_transacao_gateway: Optional[str] = None
+    id_contrato: Optional[int] = None
+    mes_referencia: Optional[str] = None
+    valor_pago: Optional[Decimal] = None
+    motivo: Optional[str] = None # Conflitos e linhas inválidas
+
+class ResultadoConciliacao(BaseModel):
+    conciliados: List[ItemConciliacao]
+    nao_encontrados: List[ItemConciliacao]
+    conflitos: List[ItemConciliacao]
+    invalidas: List[ItemConciliacao]
+
+# Resumo financeiro mensal (GET /pagamentos/resumo-mensal)
+class ResumoFinanceiroMensal(BaseModel):
+    mes_referencia: str # 'AAAA-MM'
+    status_pagamento: str # Status efetivo: Pendente, Atrasado, Pago, Cancelado...
+    quantidade: int
+    valor_nominal_total: Decimal
+    valor_pago_total: Decimal
+
+
+# --- Adaptadores das listagens (fast_json.resposta_lista) ---
+# Validam a lista inteira de objetos ORM e serializam direto para bytes no pydantic-core,
+# sem o passo intermediário por dicts + json da stdlib do response_model.
+_ADAPTADORES_LISTA: Dict[type, TypeAdapter] = {
+    schema: TypeAdapter(List[schema])
+    for schema in (
+        Escola, Responsavel, Aluno, Motorista, Van, ContratoServico, Pagamento, Rota, AlunosPorRotaDetalhes,
+        VanExpandida, ContratoServicoExpandido, RotaExpandida,
+    )
+}
+
+def adaptador_lista(schema: type) -> TypeAdapter:
+    adaptador = _ADAPTADORES_LISTA.get(schema)
+    if adaptador is None:
+        adaptador = _ADAPTADORES_LISTA[schema] = TypeAdapter(List[schema])
+    return adaptador
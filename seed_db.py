@@ -215,6 +215,7 @@ def seed_database():
                 if data_venc < hoje_seed: status_inicial_pagamento = "Atrasado"
 
                 pagamento_obj = Pagamento(
+                    id_proprietario_user=contrato.id_proprietario_user,
                     mes_referencia=f"{ano_ref:04d}-{mes_ref_int:02d}",
                     ano_referencia=ano_ref, data_vencimento=data_venc,
                     valor_nominal=contrato.valor_mensal,
@@ -0,0 +1,129 @@
+# tarefa_crud.py
+import datetime
+import threading
+import time
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+import app_models
+
+# Histórico das tarefas agendadas. A execução é gravada (commit) ao iniciar, atualizada junto
+# com o commit de cada lote da tarefa e fechada no fim, então o histórico mostra também
+# execuções em andamento ou interrompidas no meio.
+
+STATUS_EXECUTANDO = "Executando"
+STATUS_CONCLUIDA = "Concluída"
+STATUS_FALHOU = "Falhou"
+
+TAREFA_PAGAMENTOS_ATRASADOS = "pagamentos_atrasados"
+
+# Uma execução por tarefa em todo o banco: no PostgreSQL, advisory lock (classid fixo, objid derivado
+# do nome da tarefa; o da liderança do agendador usa a forma de chave única e não colide) numa
+# conexão própria, porque os commits por lote devolvem a conexão da sessão ao pool e o lock de
+# sessão iria junto. Se o processo morre, a conexão cai e o servidor solta o lock. Nos demais
+# bancos (SQLite, desenvolvimento) vale só a trava do processo.
+CLASSE_LOCK_TAREFAS = 71_354
+_travas_tarefas: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+
+
+def _agora() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def iniciar_execucao(db: Session, tarefa: str) -> app_models.ExecucaoTarefa:
+    execucao = app_models.ExecucaoTarefa(
+        tarefa=tarefa, status_execucao=STATUS_EXECUTANDO, iniciada_em=_agora(),
+        lotes_processados=0, registros_atualizados=0
+    )
+    db.add(execucao)
+    db.commit()
+    db.refresh(execucao)
+    return execucao
+
+
+def registrador_de_lotes(execucao: app_models.ExecucaoTarefa) -> Callable[[int, int], None]:
+    """Callback `ao_concluir_lote` que acumula o progresso na execução (gravado no commit do lote)."""
+    def _registrar(atualizados: int, ultimo_id: int) -> None:
+        execucao.lotes_processados += 1
+        execucao.registros_atualizados += atualizados
+        execucao.ultimo_id_processado = ultimo_id
+    return _registrar
+
+
+def finalizar_execucao(
+    db: Session, execucao: app_models.ExecucaoTarefa, inicio_monotonico: float, erro: Optional[str] = None
+) -> app_models.ExecucaoTarefa:
+    db.rollback() # Descarta um lote que tenha falhado no meio; os lotes já gravados (e seu progresso) permanecem
+    execucao.status_execucao = STATUS_FALHOU if erro else STATUS_CONCLUIDA
+    execucao.finalizada_em = _agora()
+    execucao.duracao_ms = int((time.monotonic() - inicio_monotonico) * 1000)
+    execucao.erro = erro
+    db.commit()
+    db.refresh(execucao)
+    return execucao
+
+
+def get_execucoes(
+    db: Session, tarefa: Optional[str] = None, skip: int = 0, limit: int = 50
+) -> List[app_models.ExecucaoTarefa]:
+    query = db.query(app_models.ExecucaoTarefa)
+    if tarefa:
+        query = query.filter(app_models.ExecucaoTarefa.tarefa == tarefa)
+    return query.order_by(app_models.ExecucaoTarefa.id_execucao.desc()).offset(skip).limit(limit).all()
+
+
+@contextmanager
+def _trava_da_tarefa(db: Session, tarefa: str) -> Iterator[bool]:
+    trava = _travas_tarefas[tarefa]
+    if not trava.acquire(blocking=False):
+        yield False
+        return
+    try:
+        engine = db.get_bind().engine
+        if engine.dialect.name != "postgresql":
+            yield True
+            return
+        parametros = {"classe": CLASSE_LOCK_TAREFAS, "chave": zlib.crc32(tarefa.encode()) & 0x7FFFFFFF}
+        with engine.connect() as conexao:
+            obtido = conexao.scalar(text("SELECT pg_try_advisory_lock(:classe, :chave)"), parametros)
+            conexao.commit()
+            if not obtido:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                try:
+                    conexao.execute(text("SELECT pg_advisory_unlock(:classe, :chave)"), parametros)
+                    conexao.commit()
+                except DBAPIError:
+                    conexao.invalidate() # Não devolve ao pool uma conexão que pode estar com o lock
+    finally:
+        trava.release()
+
+
+def executar_com_historico(
+    db: Session, tarefa: str, funcao: Callable[..., int]
+) -> Optional[app_models.ExecucaoTarefa]:
+    """Roda `funcao(db, ao_concluir_lote=...)` registrando a execução.
+
+    Retorna None, sem executar, se a mesma tarefa já está rodando (em qualquer processo, no
+    PostgreSQL). Exceções da tarefa são registradas na execução (status 'Falhou') e propagadas.
+    """
+    with _trava_da_tarefa(db, tarefa) as obtida:
+        if not obtida:
+            return None
+        execucao = iniciar_execucao(db, tarefa)
+        inicio = time.monotonic()
+        try:
+            funcao(db, ao_concluir_lote=registrador_de_lotes(execucao))
+        except Exception as e:
+            finalizar_execucao(db, execucao, inicio, erro=str(e))
+            raise
+        return finalizar_execucao(db, execucao, inicio)
@@ -1,11 +1,14 @@
 # task_router.py
 from fastapi import APIRouter, Depends, HTTPException, Header, status
 from sqlalchemy.orm import Session
-from typing import Optional # Para Optional no Header
+from typing import List, Optional # Para Optional no Header
 import os
 
-from core_utils import get_db # Sua dependência de sessão de DB
+import app_models
+import schemas
+from core_utils import get_db, get_read_db, get_current_active_superuser # Sua dependência de sessão de DB
 import pagamento_crud # Seu CRUD de pagamentos
+import tarefa_crud
 
 router = APIRouter(
     prefix="/tasks", # Prefixo para todas as rotas de tarefas
@@ -19,8 +22,10 @@ CRON_JOB_SECRET = os.getenv("CRON_JOB_SECRET")
 
 @router.post("/update-overdue-payments", 
              summary="Atualiza pagamentos pendentes para atrasados",
-             description="Endpoint para ser chamado por um cron job. Requer header 'X-Cron-Secret'.")
-async def trigger_update_overdue_payments(
+             description="Execução manual ou por cron externo (requer header 'X-Cron-Secret'). Com SCHEDULER_ENABLED "
+                         "o agendador interno já roda esta tarefa periodicamente. O progresso fica em GET /tasks/runs.",
+             responses={409: {"description": "Tarefa já em execução"}})
+def trigger_update_overdue_payments( # Síncrono: roda no threadpool, sem travar o event loop durante os lotes
     db: Session = Depends(get_db),
     x_cron_secret: Optional[str] = Header(None, description="Chave secreta para autorizar o cron job.")
 ):
@@ -31,15 +36,38 @@ async def trigger_update_overdue_payments(
             detail="Acesso não autorizado."
         )
 
+    print("LOG INFO: Iniciando tarefa de atualização de pagamentos atrasados...")
     try:
-        print("LOG INFO: Iniciando tarefa de atualização de pagamentos atrasados...")
-        num_atualizados = pagamento_crud.atualizar_pagamentos_para_atrasado(db)
-        print(f"LOG INFO: Tarefa de pagamentos atrasados concluída. {num_atualizados} pagamentos atualizados para 'Atrasado'.")
-        return {"message": "Tarefa de atualização de pagamentos atrasados executada com sucesso.", "atualizados": num_atualizados}
+        execucao = tarefa_crud.executar_com_historico(
+            db, tarefa_crud.TAREFA_PAGAMENTOS_ATRASADOS, pagamento_crud.atualizar_pagamentos_para_atrasado
+        )
     except Exception as e:
         print(f"LOG ERRO: Erro na tarefa de atualização de pagamentos atrasados: {e}")
         # Em um sistema de produção, você logaria isso de forma mais robusta (ex: Sentry, arquivo de log)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
             detail=f"Erro interno ao executar a tarefa: {str(e)}"
-        )
\ No newline at end of file
+        )
+    if execucao is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A tarefa já está em execução.")
+    print(
+        f"LOG INFO: Tarefa de pagamentos atrasados concluída. {execucao.registros_atualizados} pagamentos atualizados "
+        f"para 'Atrasado' em {execucao.lotes_processados} lote(s), {execucao.duracao_ms} ms."
+    )
+    return {
+        "message": "Tarefa de atualização de pagamentos atrasados executada com sucesso.",
+        "atualizados": execucao.registros_atualizados,
+        "id_execucao": execucao.id_execucao,
+    }
+
+
+@router.get("/runs", response_model=List[schemas.ExecucaoTarefa],
+            summary="Histórico de execuções das tarefas agendadas",
+            description="Mais recentes primeiro. Restrito a administradores.",
+            responses={401: {"description": "Não autenticado"}})
+def read_execucoes_tarefas(
+    tarefa: Optional[str] = None, skip: int = 0, limit: int = 50,
+    db: Session = Depends(get_read_db),
+    current_user: app_models.User = Depends(get_current_active_superuser)
+):
+    return tarefa_crud.get_execucoes(db, tarefa=tarefa, skip=skip, limit=limit)
@@ -1,9 +1,11 @@
 # tests/conftest.py
 import pytest
+from contextlib import contextmanager
+from fastapi import Request
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session # Para db_session_test, se não estiver já aqui
 import datetime
-from typing import Dict, Tuple # Adicionado Tuple
+from typing import Dict, Optional, Tuple # Adicionado Tuple
 
 # Importar schemas e app_models uma vez aqui para as fixtures que retornam esses tipos
 import schemas
@@ -13,11 +15,17 @@ import app_models # Para type hinting e uso direto se necessário
 # Vou reescrevê-las para garantir que estão completas e como esperamos.
 
 # ---- Configuração do Banco de Dados de Teste e Cliente HTTP ----
-from sqlalchemy import create_engine
+import aiosqlite
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app_models import Base # de app_models/__init__.py
 from main import app # Sua instância FastAPI
-from core_utils import get_db # A dependência original
+from core_utils import ( # As dependências originais
+    get_async_db, get_async_read_db, get_async_read_session_factory, get_db, get_read_db, get_read_session_factory,
+    get_session_factory, clear_user_cache, registrar_sessao_da_requisicao
+)
 import os
 from dotenv import load_dotenv
 
@@ -68,18 +76,113 @@ def db_session_test() -> Session:
             transaction.rollback()
         connection.close()
 
+# ---- Sessão assíncrona dos GETs `async def` (get_async_db / get_async_read_db) ----
+
+class _ConexaoSqliteCompartilhada:
+    """A sqlite3.Connection do db_session_test emprestada ao aiosqlite.
+
+    commit, rollback e close não fazem nada: a transação é do db_session_test, que a desfaz no fim do teste.
+    """
+    def __init__(self, dbapi_connection):
+        object.__setattr__(self, "_dbapi_connection", dbapi_connection)
+
+    def __getattr__(self, nome):
+        return getattr(self._dbapi_connection, nome)
+
+    def __setattr__(self, nome, valor):
+        setattr(self._dbapi_connection, nome, valor)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+@pytest.fixture(scope="function")
+def async_engine_test(db_session_test: Session) -> Optional[AsyncEngine]:
+    """No SQLite, um engine aiosqlite sobre a mesma conexão (e transação) do db_session_test: as
+    AsyncSessions enxergam o que o teste gravou sem commit e passam por um driver assíncrono de verdade."""
+    if engine_test.dialect.name != "sqlite":
+        return None
+    dbapi_connection = db_session_test.connection().connection.dbapi_connection
+
+    async def _conectar():
+        return await aiosqlite.Connection(lambda: _ConexaoSqliteCompartilhada(dbapi_connection), 64)
+    return create_async_engine("sqlite+aiosqlite://", async_creator=_conectar, poolclass=NullPool)
+
 @pytest.fixture(scope="function")
-def client(db_session_test: Session) -> TestClient:
-    def override_get_db():
+def client(db_session_test: Session, async_engine_test: Optional[AsyncEngine]) -> TestClient:
+    def override_get_db(request: Request):
+        registrar_sessao_da_requisicao(request, db_session_test) # get_current_user reaproveita a sessão, como em produção
         try:
             yield db_session_test
         finally:
             pass
             
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db # Leituras usam a mesma sessão transacional do teste
+    # Corpos em streaming (importação/exportação) abrem a sessão pela fábrica
+    app.dependency_overrides[get_session_factory] = lambda: lambda: db_session_test
+    app.dependency_overrides[get_read_session_factory] = lambda: lambda: db_session_test
+
+    def nova_sessao_async() -> AsyncSession:
+        if async_engine_test is None:
+            # Fora do SQLite não há como dividir a conexão com um driver async: a AsyncSession roda sobre a sessão do teste
+            return AsyncSession(sync_session_class=lambda **kw: db_session_test)
+        return AsyncSession(async_engine_test, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db(request: Request):
+        db = nova_sessao_async()
+        registrar_sessao_da_requisicao(request, db)
+        if async_engine_test is None:
+            yield db # Não fecha: a sessão síncrona por trás é a do teste
+            return
+        async with db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_session_factory] = lambda: nova_sessao_async
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
+    clear_user_cache() # O banco de teste sofre rollback, então o cache de usuários também é descartado
+
+# ---- Orçamento de queries (detecta N+1) ----
+
+@pytest.fixture(scope="function")
+def assert_max_queries(db_session_test: Session, async_engine_test: Optional[AsyncEngine]):
+    """Retorna um context manager que falha se o bloco executar mais que `max_queries` statements no engine_test
+    (somados os das AsyncSessions, que no SQLite passam pelo async_engine_test).
+
+    Uso:
+        with assert_max_queries(2):
+            client.get("/alunos/", headers=headers)
+
+    O identity map da sessão de teste é limpo antes do bloco para que relacionamentos lazy
+    sejam realmente carregados do banco, como aconteceria em uma requisição de produção.
+    """
+    @contextmanager
+    def _assert_max_queries(max_queries: int):
+        db_session_test.expunge_all()
+        statements = []
+        def _registrar_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        engines = [engine_test] + ([async_engine_test.sync_engine] if async_engine_test is not None else [])
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", _registrar_statement)
+        try:
+            yield statements
+        finally:
+            for engine in engines:
+                event.remove(engine, "before_cursor_execute", _registrar_statement)
+        assert len(statements) <= max_queries, (
+            f"Esperado no máximo {max_queries} queries, executadas {len(statements)}:\n" + "\n".join(statements)
+        )
+    return _assert_max_queries
 
 # ---- Novas Fixtures de Helper ----
 
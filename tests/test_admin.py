@@ -0,0 +1,29 @@
+# tests/test_admin.py
+from fastapi.testclient import TestClient
+
+
+def _login(client: TestClient, email: str, is_superuser: bool) -> dict:
+    password = "adminpassword123"
+    client.post("/users/register", json={"email": email, "password": password, "is_superuser": is_superuser})
+    login_response = client.post("/token", data={"username": email, "password": password})
+    assert login_response.status_code == 200, login_response.text
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+def test_db_pool_metrics_superuser(client: TestClient):
+    headers = _login(client, "admin_pool@example.com", is_superuser=True)
+    response = client.get("/admin/db-pool", headers=headers)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert "pid" in data
+    assert data["pool_size"] >= 1
+    for campo in ("checkouts", "timeouts", "avg_wait_seconds", "max_wait_seconds"):
+        assert campo in data["wait"]
+
+def test_db_pool_metrics_usuario_comum_proibido(client: TestClient):
+    headers = _login(client, "nao_admin_pool@example.com", is_superuser=False)
+    response = client.get("/admin/db-pool", headers=headers)
+    assert response.status_code == 403, response.text
+
+def test_db_pool_metrics_unauthenticated(client: TestClient):
+    response = client.get("/admin/db-pool")
+    assert response.status_code == 401, response.text
@@ -1,9 +1,16 @@
 # tests/test_alunos.py
+import base64
+import json
+
 import pytest
 from fastapi.testclient import TestClient
 import datetime
 from typing import Dict # Para type hinting
 import schemas # Seus Pydantic schemas
+from sqlalchemy import event, select
+
+import app_models
+import aluno_crud
 
 # --- Funções Helper ---
 # NOTA: Mova estas helpers para conftest.py em um projeto real!
@@ -229,4 +236,197 @@ def test_aluno_data_isolation(client: TestClient):
 
     # 4. Operador B tenta DELETAR o aluno do Operador A
     response_delete_b_for_a = client.delete(f"/alunos/{id_aluno_op_a}", headers=headers_op_b)
-    assert response_delete_b_for_a.status_code == 404
\ No newline at end of file
+    assert response_delete_b_for_a.status_code == 404
+
+def test_list_meus_alunos_query_budget(client: TestClient, setup_operador_com_escola_e_responsavel, create_aluno_fixture_factory, assert_max_queries):
+    headers, escola, responsavel = setup_operador_com_escola_e_responsavel
+    for _ in range(3):
+        create_aluno_fixture_factory(headers, escola.id_escola, responsavel.id_responsavel, "AlunoBudget")
+    with assert_max_queries(2): # Versão (ETag) + listagem
+        response = client.get("/alunos/", headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 3
+
+
+def test_list_meus_alunos_usa_sessao_assincrona(client: TestClient, setup_operador_com_escola_e_responsavel, create_aluno_fixture_factory, async_engine_test, db_session_test):
+    if async_engine_test is None:
+        pytest.skip("Sessão assíncrona de teste com driver async só no SQLite")
+    headers, escola, responsavel = setup_operador_com_escola_e_responsavel
+    create_aluno_fixture_factory(headers, escola.id_escola, responsavel.id_responsavel, "AlunoAsync")
+
+    statements = {"sync": [], "async": []}
+    def _registrar(destino):
+        return lambda conn, cursor, statement, *args: statements[destino].append(statement)
+    registros = [(db_session_test.get_bind().engine, _registrar("sync")), (async_engine_test.sync_engine, _registrar("async"))]
+    for engine, fn in registros:
+        event.listen(engine, "before_cursor_execute", fn)
+    try:
+        response = client.get("/alunos/", headers=headers)
+    finally:
+        for engine, fn in registros:
+            event.remove(engine, "before_cursor_execute", fn)
+    assert response.status_code == 200, response.text
+    assert statements["sync"] == [] # Nada passa pelo threadpool/engine síncrono
+    assert any("FROM alunos" in statement for statement in statements["async"])
+
+def test_list_meus_alunos_etag_304(client: TestClient, setup_operador_com_escola_e_responsavel, create_aluno_fixture_factory, assert_max_queries):
+    headers, escola, responsavel = setup_operador_com_escola_e_responsavel
+    create_aluno_fixture_factory(headers, escola.id_escola, responsavel.id_responsavel, "AlunoEtag")
+
+    response = client.get("/alunos/", headers=headers)
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+
+    with assert_max_queries(1): # Só a versão; a tabela de alunos não é consultada
+        response = client.get("/alunos/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    # Outra página é outra representação
+    response = client.get("/alunos/?limit=1", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+    # Qualquer escrita do proprietário invalida o ETag
+    create_aluno_fixture_factory(headers, escola.id_escola, responsavel.id_responsavel, "AlunoEtag2")
+    response = client.get("/alunos/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 2
+
+
+def test_list_meus_alunos_sparse_fields(client: TestClient, setup_operador_com_escola_e_responsavel, create_aluno_fixture_factory, assert_max_queries):
+    headers, escola, responsavel = setup_operador_com_escola_e_responsavel
+    for _ in range(3):
+        create_aluno_fixture_factory(headers, escola.id_escola, responsavel.id_responsavel, "AlunoFields")
+
+    with assert_max_queries(2) as statements: # Versão (ETag) + listagem, sem lazy load das colunas omitidas
+        response = client.get("/alunos/?fields=nome_completo_aluno&limit=2", headers=headers)
+    assert response.status_code == 200, response.text
+    alunos = response.json()
+    assert len(alunos) == 2
+    assert all(set(aluno) == {"id_aluno", "nome_completo_aluno"} for aluno in alunos) # PK sempre incluída
+    assert "observacoes_medicas" not in statements[-1]
+    assert response.headers["ETag"]
+
+    # O cursor continua funcionando com fields
+    response = client.get(f"/alunos/?fields=nome_completo_aluno&limit=2&cursor={response.headers['X-Next-Cursor']}", headers=headers)
+    assert len(response.json()) == 1
+
+    response = client.get("/alunos/?fields=nome_completo_aluno,senha", headers=headers)
+    assert response.status_code == 400
+    assert "senha" in response.json()["detail"]
+
+
+def test_list_meus_alunos_filtros_e_ordenacao(client: TestClient, setup_operador_com_escola_e_responsavel, assert_max_queries):
+    headers, escola, responsavel = setup_operador_com_escola_e_responsavel
+    outra_escola = create_test_escola_for_operator(client, headers, "EscFiltro")
+    for nome, nascimento, id_escola, status_aluno, periodo in [
+        ("Carla", "2015-01-10", escola.id_escola, "Ativo", "Manhã"),
+        ("Ana", "2016-05-02", escola.id_escola, "Ativo", "Tarde"),
+        ("Bruno", "2014-03-20", escola.id_escola, "Inativo", "Manhã"),
+        ("Ana", "2017-07-07", outra_escola.id_escola, "Ativo", "Manhã"),
+    ]:
+        response = client.post("/alunos", headers=headers, json={
+            "nome_completo_aluno": nome, "data_nascimento": nascimento, "id_responsavel_principal": responsavel.id_responsavel,
+            "id_escola": id_escola, "endereco_embarque_predeterminado": "Rua Filtro", "periodo_escolar": periodo,
+            "status_aluno": status_aluno
+        })
+        assert response.status_code == 201, response.text
+
+    response = client.get(f"/alunos/?id_escola={escola.id_escola}&status_aluno=Ativo&sort=nome_completo_aluno", headers=headers)
+    assert response.status_code == 200, response.text
+    assert [a["nome_completo_aluno"] for a in response.json()] == ["Ana", "Carla"]
+
+    response = client.get("/alunos/?periodo_escolar=Manhã&sort=-data_nascimento", headers=headers)
+    assert [a["data_nascimento"] for a in response.json()] == ["2017-07-07", "2015-01-10", "2014-03-20"]
+
+    # Cursor por (nome, id): os dois "Ana" ficam em páginas diferentes sem repetir nem pular
+    vistos, cursor = [], None
+    while True:
+        url = "/alunos/?sort=nome_completo_aluno&limit=1" + (f"&cursor={cursor}" if cursor else "")
+        with assert_max_queries(2): # Versão (ETag) + listagem
+            response = client.get(url, headers=headers)
+        vistos += [(a["nome_completo_aluno"], a["id_aluno"]) for a in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert [nome for nome, _ in vistos] == ["Ana", "Ana", "Bruno", "Carla"]
+    assert vistos == sorted(vistos)
+
+    # Cursor de outra ordenação é rejeitado
+    primeiro_cursor = client.get("/alunos/?sort=nome_completo_aluno&limit=1", headers=headers).headers["X-Next-Cursor"]
+    response = client.get(f"/alunos/?sort=-data_nascimento&cursor={primeiro_cursor}", headers=headers)
+    assert response.status_code == 400
+
+    # Cursor adulterado: valor ou id de outro tipo viram 400 antes de chegar ao banco
+    def _cursor(dados: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(dados).encode()).decode().rstrip("=")
+    for ordenacao, dados in [
+        ("nome_completo_aluno", {"id": "x", "s": "nome_completo_aluno", "v": "Ana"}),
+        ("nome_completo_aluno", {"id": 1, "s": "nome_completo_aluno", "v": 1}),
+        ("nome_completo_aluno", {"id": 1, "s": "nome_completo_aluno"}),
+        ("-data_nascimento", {"id": 1, "s": "-data_nascimento", "v": "2015-01-10"}),
+        ("-data_nascimento", {"id": 1, "s": "-data_nascimento", "v": ["datetime", "2015-01-10T00:00:00"]}),
+        ("-data_nascimento", {"id": 1, "s": "-data_nascimento", "v": ["date", "ontem"]}),
+        ("id_aluno", {"id": True, "s": "id_aluno", "v": 1}),
+    ]:
+        response = client.get(f"/alunos/?sort={ordenacao}&cursor={_cursor(dados)}", headers=headers)
+        assert response.status_code == 400, dados
+
+    # O cursor de uma coluna de data continua válido
+    cursor_data = client.get("/alunos/?sort=-data_nascimento&limit=1", headers=headers).headers["X-Next-Cursor"]
+    response = client.get(f"/alunos/?sort=-data_nascimento&limit=1&cursor={cursor_data}", headers=headers)
+    assert response.status_code == 200, response.text
+
+    response = client.get("/alunos/?sort=observacoes_medicas", headers=headers)
+    assert response.status_code == 400
+    assert "observacoes_medicas" in response.json()["detail"]
+
+
+def test_create_alunos_bulk(client: TestClient, setup_operador_com_escola_e_responsavel, operator_token_fixture_factory, assert_max_queries):
+    headers, escola, responsavel = setup_operador_com_escola_e_responsavel
+    outro_headers = operator_token_fixture_factory("op_alu_bulk_outro")
+    escola_de_outro = create_test_escola_for_operator(client, outro_headers, "EscOutroBulk")
+
+    def _aluno(nome: str, id_escola: int, **extra) -> dict:
+        return {
+            "nome_completo_aluno": nome, "data_nascimento": "2016-03-01",
+            "id_responsavel_principal": responsavel.id_responsavel, "id_escola": id_escola,
+            "endereco_embarque_predeterminado": "Rua Bulk", "periodo_escolar": "Manhã", **extra
+        }
+
+    payload = [_aluno(f"Aluno Bulk {i}", escola.id_escola) for i in range(20)]
+    payload.insert(3, _aluno("Aluno Escola Alheia", escola_de_outro.id_escola))
+    payload.append(_aluno("Aluno Resp Inexistente", escola.id_escola, id_responsavel_secundario=999999))
+
+    # SQLite não tem sentinel para insertmanyvalues e faz um INSERT por linha (o PostgreSQL agrupa);
+    # o que não pode crescer com o lote são as validações: um SELECT ... IN por tipo de entidade
+    with assert_max_queries(len(payload) + 4) as statements:
+        response = client.post("/alunos/bulk", headers=headers, json=payload)
+    assert response.status_code == 200, response.text
+    selects = [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+    assert len(selects) <= 3, selects # usuário (se fora do cache) + escolas + responsáveis
+    data = response.json()
+    assert data["criados"] == 20
+    assert data["rejeitados"] == 2
+    assert data["resultados"][3] == {"indice": 3, "id": None, "erro": "Escola fornecida é inválida ou não pertence a você."}
+    assert "secundário" in data["resultados"][-1]["erro"]
+
+    ids_criados = [r["id"] for r in data["resultados"] if r["id"] is not None]
+    listagem = client.get("/alunos/?fields=nome_completo_aluno&limit=1000", headers=headers).json()
+    assert sorted(ids_criados) == [a["id_aluno"] for a in listagem]
+
+    assert client.post("/alunos/bulk", headers=headers, json=[]).status_code == 400
+
+
+@pytest.mark.parametrize("campo", aluno_crud.CAMPOS_ORDENACAO_ALUNOS)
+def test_ordenacao_de_alunos_usa_indice(db_session_test, campo):
+    # Cada campo de ?sort= tem índice (id_proprietario_user, campo, pk): a página sai sem ordenação em memória
+    modelo = app_models.Aluno
+    stmt = select(modelo).where(modelo.id_proprietario_user == 1)\
+        .order_by(getattr(modelo, campo).desc(), modelo.id_aluno.desc()).limit(10)
+    compilado = stmt.compile(db_session_test.get_bind(), compile_kwargs={"literal_binds": True})
+    plano = " ".join(str(linha[-1]) for linha in db_session_test.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compilado}"))
+    assert "TEMP B-TREE" not in plano, plano
+
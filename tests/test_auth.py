@@ -188,3 +188,55 @@ def test_create_superuser(client: TestClient):
     me_response = client.get("/users/me", headers=headers)
     assert me_response.status_code == 200
     assert me_response.json()["is_superuser"] is True
+
+
+def _register_and_login(client: TestClient, email: str, password: str) -> dict:
+    client.post("/users/register", json={"email": email, "password": password, "nome_completo": "Cache User"})
+    login_response = client.post("/token", data={"username": email, "password": password})
+    assert login_response.status_code == 200, login_response.text
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+def test_current_user_cache_evita_consulta_repetida(client: TestClient, monkeypatch):
+    import user_crud
+    headers = _register_and_login(client, "cache_user@example.com", "cachepassword123")
+
+    chamadas = []
+    original_get_user_by_id = user_crud.get_user_by_id
+    def get_user_by_id_contando(db, user_id):
+        chamadas.append(user_id)
+        return original_get_user_by_id(db, user_id=user_id)
+    monkeypatch.setattr(user_crud, "get_user_by_id", get_user_by_id_contando)
+
+    for _ in range(3):
+        response = client.get("/users/me", headers=headers)
+        assert response.status_code == 200, response.text
+        assert response.json()["email"] == "cache_user@example.com"
+    assert len(chamadas) == 1 # Apenas a primeira requisição vai ao banco
+
+def test_current_user_cache_desabilitado(client: TestClient, monkeypatch):
+    import user_crud
+    from core_utils import settings
+    monkeypatch.setattr(settings, "USER_CACHE_ENABLED", False)
+    headers = _register_and_login(client, "no_cache_user@example.com", "cachepassword123")
+
+    chamadas = []
+    original_get_user_by_id = user_crud.get_user_by_id
+    def get_user_by_id_contando(db, user_id):
+        chamadas.append(user_id)
+        return original_get_user_by_id(db, user_id=user_id)
+    monkeypatch.setattr(user_crud, "get_user_by_id", get_user_by_id_contando)
+
+    for _ in range(2):
+        assert client.get("/users/me", headers=headers).status_code == 200
+    assert len(chamadas) == 2
+
+def test_login_pool_de_senha_lotado_retorna_503(client: TestClient, monkeypatch):
+    import core_utils
+    client.post("/users/register", json={"email": "pool_cheio@example.com", "password": "poolpassword123"})
+    # Simula o pool ocupado com jobs além do limite de workers + fila
+    limite = core_utils.settings.PASSWORD_HASH_WORKERS + core_utils.settings.PASSWORD_HASH_MAX_QUEUE
+    monkeypatch.setattr(core_utils, "_password_jobs_in_flight", limite)
+
+    response = client.post("/token", data={"username": "pool_cheio@example.com", "password": "poolpassword123"})
+    assert response.status_code == 503, response.text
+    assert response.headers.get("Retry-After") == "1"
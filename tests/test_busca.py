@@ -0,0 +1,56 @@
+# tests/test_busca.py
+from fastapi.testclient import TestClient
+
+
+def _criar_escolas(client: TestClient, headers, nomes):
+    for i, nome in enumerate(nomes):
+        response = client.post("/escolas", headers=headers, json={
+            "nome_escola": nome, "endereco_completo": f"Rua {i}, Centro", "cnpj": f"9988877700{i:04d}"
+        })
+        assert response.status_code == 201, response.text
+
+
+def test_busca_ranking_prefixo_primeiro(client: TestClient, operator_token_fixture_factory):
+    headers = operator_token_fixture_factory("op_busca_rank")
+    _criar_escolas(client, headers, ["Colégio Santa Maria", "Maria Montessori", "Escola Anne Frank"])
+
+    response = client.get("/busca/?q=maria", headers=headers)
+    assert response.status_code == 200, response.text
+    resultados = response.json()
+    assert [r["titulo"] for r in resultados] == ["Maria Montessori", "Colégio Santa Maria"]
+    assert all(r["tipo"] == "escolas" for r in resultados)
+    assert resultados[0]["score"] >= resultados[1]["score"]
+    assert resultados[0]["detalhe"].startswith("Rua")
+
+
+def test_busca_isolamento_e_filtro_por_tipo(client: TestClient, setup_pre_requisitos_contrato_fixture, operator_token_fixture_factory):
+    headers, aluno, _, _ = setup_pre_requisitos_contrato_fixture
+    termo = aluno.nome_completo_aluno[:6]
+
+    response = client.get(f"/busca/?q={termo}&tipos=alunos", headers=headers)
+    assert response.status_code == 200, response.text
+    assert {"tipo": "alunos", "id": aluno.id_aluno} in [{"tipo": r["tipo"], "id": r["id"]} for r in response.json()]
+
+    response = client.get(f"/busca/?q={termo}&tipos=vans", headers=headers)
+    assert all(r["tipo"] == "vans" for r in response.json())
+
+    outro_headers = operator_token_fixture_factory("op_busca_outro")
+    response = client.get(f"/busca/?q={termo}", headers=outro_headers)
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_busca_validacao(client: TestClient, operator_token_fixture_factory):
+    headers = operator_token_fixture_factory("op_busca_val")
+    assert client.get("/busca/?q=a", headers=headers).status_code == 422
+    response = client.get("/busca/?q=abc&tipos=alunos,motoristas", headers=headers)
+    assert response.status_code == 400
+    assert "motoristas" in response.json()["detail"]
+    assert client.get("/busca/?q=abc").status_code == 401
+
+
+def test_busca_escapa_curingas(client: TestClient, operator_token_fixture_factory):
+    headers = operator_token_fixture_factory("op_busca_like")
+    _criar_escolas(client, headers, ["Escola 100% Integral", "Escola Integral"])
+    response = client.get("/busca/?q=0%25 I", headers=headers)
+    assert [r["titulo"] for r in response.json()] == ["Escola 100% Integral"]
@@ -523,6 +523,45 @@ def test_update_contrato_estender_data_fim_gera_novos_pagamentos(client: TestCli
         assert pag.valor_nominal == Decimal("120.00") # Valor original mantido para novos
 
 
+
+def test_update_contrato_estender_com_meses_pagos_nao_duplica(client: TestClient, setup_pre_requisitos_contrato):
+    headers, aluno, responsavel, _ = setup_pre_requisitos_contrato
+    create_response = client.post("/contratos", headers=headers, json={
+        "id_aluno": aluno.id_aluno, "id_responsavel_financeiro": responsavel.id_responsavel,
+        "data_inicio_contrato": "2026-01-01", "data_fim_contrato": "2026-01-31",
+        "valor_mensal": "120.00", "dia_vencimento_mensalidade": 5, "tipo_servico_contratado": "Estender Pago"
+    })
+    assert create_response.status_code == 201
+    contrato_id = create_response.json()["id_contrato"]
+    pagamento_jan = client.get(f"/pagamentos/por-contrato/{contrato_id}", headers=headers).json()[0]
+    client.put(f"/pagamentos/{pagamento_jan['id_pagamento']}", headers=headers, json={"status_pagamento": "Pago"})
+
+    # Sem pagamentos em aberto, a geração recomeça do início do contrato e deve pular o mês já pago
+    update_response = client.put(f"/contratos/{contrato_id}", headers=headers, json={"data_fim_contrato": "2026-02-15"})
+    assert update_response.status_code == 200, update_response.text
+    meses = sorted(p["mes_referencia"] for p in client.get(f"/pagamentos/por-contrato/{contrato_id}", headers=headers).json())
+    assert meses == ["2026-01", "2026-02"]
+
+
+def test_update_contrato_atualiza_resumo_mensal(client: TestClient, setup_pre_requisitos_contrato):
+    headers, aluno, responsavel, _ = setup_pre_requisitos_contrato
+    contrato_id = client.post("/contratos", headers=headers, json={
+        "id_aluno": aluno.id_aluno, "id_responsavel_financeiro": responsavel.id_responsavel,
+        "data_inicio_contrato": "2030-01-01", "data_fim_contrato": "2030-06-30",
+        "valor_mensal": "100.00", "dia_vencimento_mensalidade": 5, "tipo_servico_contratado": "Resumo"
+    }).json()["id_contrato"]
+
+    # Encurta para março e reajusta: os totais acompanham os pagamentos removidos e alterados
+    update_response = client.put(f"/contratos/{contrato_id}", headers=headers, json={
+        "data_fim_contrato": "2030-03-31", "valor_mensal": "150.00"
+    })
+    assert update_response.status_code == 200, update_response.text
+    resumo = client.get("/pagamentos/resumo-mensal?ano=2030", headers=headers).json()
+    assert [(linha["mes_referencia"], linha["status_pagamento"], linha["quantidade"]) for linha in resumo] == [
+        ("2030-01", "Pendente", 1), ("2030-02", "Pendente", 1), ("2030-03", "Pendente", 1)
+    ]
+    assert all(Decimal(linha["valor_nominal_total"]) == Decimal("150.00") for linha in resumo)
+
 def test_update_contrato_valor_mensal_afeta_pagamentos_pendentes(client: TestClient, setup_pre_requisitos_contrato):
     headers, aluno, responsavel, _ = setup_pre_requisitos_contrato
     
@@ -605,4 +644,68 @@ def test_update_contrato_status_para_cancelado_cancela_pagamentos_pendentes(clie
     
     assert len(pagamentos_depois) == 3 # Ainda existem 3 pagamentos, mas seus status devem ter mudado
     for pag in pagamentos_depois:
-        assert pag.status_pagamento == "Cancelado"
\ No newline at end of file
+        assert pag.status_pagamento == "Cancelado"
+
+def test_list_meus_contratos_query_budget(client: TestClient, setup_pre_requisitos_contrato_fixture, create_aluno_fixture_factory, assert_max_queries):
+    headers, aluno, responsavel, escola = setup_pre_requisitos_contrato_fixture
+    alunos = [aluno] + [create_aluno_fixture_factory(headers, escola.id_escola, responsavel.id_responsavel, "AlunoBudget") for _ in range(2)]
+    for a in alunos:
+        response = client.post("/contratos", headers=headers, json={
+            "id_aluno": a.id_aluno, "id_responsavel_financeiro": responsavel.id_responsavel,
+            "data_inicio_contrato": datetime.date.today().isoformat(), "valor_mensal": "150.00",
+            "dia_vencimento_mensalidade": 10, "tipo_servico_contratado": "Budget"
+        })
+        assert response.status_code == 201, response.text
+    with assert_max_queries(2): # Versão (ETag) + listagem
+        response = client.get("/contratos/", headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 3
+
+
+def test_list_meus_contratos_expand(client: TestClient, setup_pre_requisitos_contrato_fixture, create_aluno_fixture_factory, assert_max_queries):
+    headers, aluno, responsavel, escola = setup_pre_requisitos_contrato_fixture
+    alunos = [aluno] + [create_aluno_fixture_factory(headers, escola.id_escola, responsavel.id_responsavel, "AlunoExpand") for _ in range(2)]
+    for a in alunos:
+        response = client.post("/contratos", headers=headers, json={
+            "id_aluno": a.id_aluno, "id_responsavel_financeiro": responsavel.id_responsavel,
+            "data_inicio_contrato": datetime.date.today().isoformat(), "valor_mensal": "150.00",
+            "dia_vencimento_mensalidade": 10, "tipo_servico_contratado": "Expand"
+        })
+        assert response.status_code == 201, response.text
+
+    with assert_max_queries(2): # Versão (ETag) + listagem com os JOINs, sem N+1
+        response = client.get("/contratos/?expand=aluno,responsavel", headers=headers)
+    assert response.status_code == 200, response.text
+    contratos = response.json()
+    assert [c["aluno_obj"]["id_aluno"] for c in contratos] == [a.id_aluno for a in alunos]
+    assert all(c["responsavel_financeiro_obj"]["cpf"] == responsavel.cpf for c in contratos)
+
+    with assert_max_queries(2): # A relação não pedida não é carregada nem serializada
+        response = client.get("/contratos/?expand=aluno", headers=headers)
+    assert all("aluno_obj" in c and "responsavel_financeiro_obj" not in c for c in response.json())
+    assert all("aluno_obj" not in c for c in client.get("/contratos/", headers=headers).json())
+
+    id_contrato = contratos[0]["id_contrato"]
+    response = client.get(f"/contratos/{id_contrato}?expand=responsavel", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["responsavel_financeiro_obj"]["id_responsavel"] == responsavel.id_responsavel
+    assert response.headers["ETag"]
+
+    # O ETag com expand acompanha a versão da entidade expandida
+    etag = response.headers["ETag"]
+    client.put(f"/responsaveis/{responsavel.id_responsavel}", headers=headers, json={"telefone_principal": "4830303030"})
+    response = client.get(f"/contratos/{id_contrato}?expand=responsavel", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["responsavel_financeiro_obj"]["telefone_principal"] == "4830303030"
+
+    assert client.get("/contratos/?expand=pagamentos", headers=headers).status_code == 400
+    assert client.get("/contratos/?expand=aluno&fields=valor_mensal", headers=headers).status_code == 400
+
+
+def test_openapi_contratos_sem_expand_usa_schema_base(client: TestClient):
+    # ?expand= é opcional: o contrato público continua sendo o schema base
+    paths = client.get("/openapi.json").json()["paths"]
+    lista = paths["/contratos/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert lista["items"]["$ref"] == "#/components/schemas/ContratoServico"
+    detalhe = paths["/contratos/{contrato_id}"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert detalhe["$ref"] == "#/components/schemas/ContratoServico"
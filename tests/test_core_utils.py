@@ -0,0 +1,157 @@
+# tests/test_core_utils.py
+import asyncio
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import app_models
+import core_utils
+import user_crud
+
+
+class _SessaoFalsa:
+    def __init__(self, origem: str):
+        self.origem = origem
+        self.info = {}
+    def close(self):
+        pass
+
+def _request(cookie: str = None, header: str = None) -> Request:
+    headers = []
+    if cookie is not None:
+        headers.append((b"cookie", f"{core_utils.COOKIE_LEITURA_PRIMARIO}={cookie}".encode()))
+    if header is not None:
+        headers.append((core_utils.HEADER_LEITURA_PRIMARIO.lower().encode(), header.encode()))
+    return Request({"type": "http", "headers": headers})
+
+def _origem_da_sessao_de_leitura(request: Request) -> str:
+    gen = core_utils.get_read_db(request)
+    sessao = next(gen)
+    gen.close()
+    return sessao.origem
+
+def test_get_read_db_usa_replica_e_primario_com_marcador(monkeypatch):
+    monkeypatch.setattr(core_utils, "SessionLocal", lambda: _SessaoFalsa("primario"))
+    monkeypatch.setattr(core_utils, "ReadSessionLocal", lambda: _SessaoFalsa("replica"))
+
+    marcador = core_utils.criar_marcador_leitura_primario()
+    assert _origem_da_sessao_de_leitura(_request()) == "replica"
+    assert _origem_da_sessao_de_leitura(_request(cookie=marcador)) == "primario" # read-your-writes
+    assert _origem_da_sessao_de_leitura(_request(header=marcador)) == "primario" # clientes sem cookies
+    expira_em = marcador.split(".")[0]
+    assert _origem_da_sessao_de_leitura(_request(cookie=f"{expira_em}.forjado")) == "replica"
+
+    monkeypatch.setattr(core_utils.settings, "READ_YOUR_WRITES_SECONDS", -1)
+    assert _origem_da_sessao_de_leitura(_request(cookie=core_utils.criar_marcador_leitura_primario())) == "replica" # janela expirada
+
+def test_get_read_db_sem_replica_usa_primario(monkeypatch):
+    monkeypatch.setattr(core_utils, "SessionLocal", lambda: _SessaoFalsa("primario"))
+    monkeypatch.setattr(core_utils, "ReadSessionLocal", None)
+    assert _origem_da_sessao_de_leitura(_request()) == "primario"
+
+def test_get_async_database_url():
+    assert core_utils.get_async_database_url("postgresql://u:s@db:5432/x") == "postgresql+asyncpg://u:s@db:5432/x"
+    assert core_utils.get_async_database_url("sqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+    assert core_utils.get_async_database_url("sqlite+aiosqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+
+def test_get_async_read_db_usa_replica_e_primario_com_marcador(monkeypatch):
+    class _SessaoAsyncFalsa(_SessaoFalsa):
+        async def __aenter__(self):
+            return self
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(core_utils, "AsyncSessionLocal", lambda: _SessaoAsyncFalsa("primario"))
+    monkeypatch.setattr(core_utils, "AsyncReadSessionLocal", lambda: _SessaoAsyncFalsa("replica"))
+
+    async def _origem(request: Request) -> str:
+        gen = core_utils.get_async_read_db(request)
+        sessao = await gen.__anext__()
+        await gen.aclose()
+        return sessao.origem
+
+    assert asyncio.run(_origem(_request())) == "replica"
+    assert asyncio.run(_origem(_request(cookie=core_utils.criar_marcador_leitura_primario()))) == "primario"
+    monkeypatch.setattr(core_utils, "AsyncReadSessionLocal", None)
+    assert asyncio.run(_origem(_request())) == "primario"
+
+def test_middleware_devolve_marcador_apos_commit(monkeypatch):
+    monkeypatch.setattr(core_utils, "ReadSessionLocal", lambda: _SessaoFalsa("replica"))
+
+    def _escrever(request):
+        core_utils._registrar_escrita_na_requisicao(None) # Mesmo efeito do after_commit de SessionLocal
+        return PlainTextResponse("ok")
+
+    app = Starlette(routes=[Route("/escrita", _escrever, methods=["POST"]), Route("/leitura", lambda r: PlainTextResponse("ok"))])
+    client = TestClient(core_utils.ReadYourWritesMiddleware(app))
+
+    response = client.post("/escrita")
+    marcador = response.headers[core_utils.HEADER_LEITURA_PRIMARIO]
+    assert core_utils.marcador_leitura_primario_valido(marcador)
+    assert response.cookies[core_utils.COOKIE_LEITURA_PRIMARIO] == marcador
+    assert "; Secure" in response.headers["set-cookie"]
+
+    response = client.get("/leitura")
+    assert core_utils.HEADER_LEITURA_PRIMARIO not in response.headers
+
+class _SessaoComUsuario(_SessaoFalsa):
+    def __init__(self, origem: str, usuarios=()):
+        super().__init__(origem)
+        self.usuarios = {u.id_user: u for u in usuarios}
+        self.fechada = False
+    async def __aenter__(self):
+        return self
+    async def __aexit__(self, *exc):
+        self.fechada = True
+        return False
+    def expunge(self, obj):
+        pass
+
+def _request_com_sessao(sessao=None) -> Request:
+    request = _request()
+    if sessao is not None:
+        core_utils.registrar_sessao_da_requisicao(request, sessao)
+    return request
+
+def _sem_fabrica():
+    raise AssertionError("get_current_user abriu outra sessão")
+
+def test_marcar_leitura_primario_em_resposta_de_streaming(monkeypatch):
+    resposta = StreamingResponse(iter([b"{}"]))
+    monkeypatch.setattr(core_utils, "ReadSessionLocal", None)
+    core_utils.marcar_leitura_primario(resposta)
+    assert core_utils.HEADER_LEITURA_PRIMARIO not in resposta.headers
+
+    monkeypatch.setattr(core_utils, "ReadSessionLocal", lambda: _SessaoFalsa("replica"))
+    core_utils.marcar_leitura_primario(resposta)
+    assert core_utils.marcador_leitura_primario_valido(resposta.headers[core_utils.HEADER_LEITURA_PRIMARIO])
+    assert resposta.headers["set-cookie"].startswith(f"{core_utils.COOKIE_LEITURA_PRIMARIO}=")
+
+def test_get_current_user_reaproveita_a_sessao_da_requisicao(monkeypatch):
+    usuario = app_models.User(id_user=4242, email="op@example.com", is_active=True)
+    monkeypatch.setattr(user_crud, "get_user_by_id", lambda db, user_id: db.usuarios.get(user_id))
+    monkeypatch.setattr(core_utils.settings, "USER_CACHE_ENABLED", False)
+    token = core_utils.create_access_token({"sub": "4242"})
+
+    sessao_do_endpoint = _SessaoComUsuario("primario", [usuario])
+    request = _request_com_sessao(sessao_do_endpoint)
+    assert asyncio.run(core_utils.get_current_user(request=request, fabrica_leitura=_sem_fabrica, token=token)) is usuario
+
+    # Sem sessão do endpoint (ex.: /users/me, importação): uma de leitura só para a consulta, já fechada
+    sessao_leitura = _SessaoComUsuario("replica", [usuario])
+    assert asyncio.run(core_utils.get_current_user(request=_request_com_sessao(), fabrica_leitura=lambda: sessao_leitura, token=token)) is usuario
+    assert sessao_leitura.fechada
+
+def test_get_current_user_busca_no_primario_se_a_replica_nao_tem_o_usuario(monkeypatch):
+    usuario = app_models.User(id_user=4242, email="novo@example.com", is_active=True)
+    monkeypatch.setattr(core_utils, "AsyncSessionLocal", lambda: _SessaoComUsuario("primario", [usuario]))
+    monkeypatch.setattr(user_crud, "get_user_by_id", lambda db, user_id: db.usuarios.get(user_id))
+    monkeypatch.setattr(core_utils.settings, "USER_CACHE_ENABLED", False)
+
+    replica = _SessaoComUsuario("replica")
+    replica.info["replica"] = True
+    token = core_utils.create_access_token({"sub": "4242"})
+    assert asyncio.run(core_utils.get_current_user(request=_request_com_sessao(replica), fabrica_leitura=_sem_fabrica, token=token)) is usuario
@@ -215,4 +215,48 @@ def test_escola_data_isolation_completo(client: TestClient):
     # 5. Operador A ainda consegue ler sua escola (não foi afetada pelas tentativas do Op B)
     response_get_a_for_a = client.get(f"/escolas/{escola_op_a.id_escola}", headers=headers_op_a)
     assert response_get_a_for_a.status_code == 200
-    assert response_get_a_for_a.json()["nome_escola"] == escola_op_a.nome_escola
\ No newline at end of file
+    assert response_get_a_for_a.json()["nome_escola"] == escola_op_a.nome_escola
+
+def test_list_minhas_escolas_query_budget(client: TestClient, operator_token_fixture_factory, assert_max_queries):
+    headers = operator_token_fixture_factory("op_esc_budget")
+    for i in range(3):
+        response = client.post("/escolas", headers=headers, json={
+            "nome_escola": f"Escola Budget {i}", "endereco_completo": "Rua Budget", "cnpj": f"11.222.333/000{i}-99"
+        })
+        assert response.status_code == 201, response.text
+    with assert_max_queries(2): # Versão (ETag) + listagem
+        response = client.get("/escolas/", headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 3
+
+
+def test_list_minhas_escolas_paginacao_por_cursor(client: TestClient, operator_token_fixture_factory):
+    headers = operator_token_fixture_factory("op_esc_cursor")
+    ids_criados = []
+    for i in range(5):
+        response = client.post("/escolas", headers=headers, json={
+            "nome_escola": f"Escola Cursor {i}", "endereco_completo": "Rua Cursor", "cnpj": f"22.333.444/000{i}-11"
+        })
+        assert response.status_code == 201, response.text
+        ids_criados.append(response.json()["id_escola"])
+
+    ids_paginados = []
+    response = client.get("/escolas/?limit=2", headers=headers)
+    while True:
+        assert response.status_code == 200, response.text
+        ids_paginados.extend(escola["id_escola"] for escola in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        assert 'rel="next"' in response.headers["Link"]
+        response = client.get(f"/escolas/?limit=2&cursor={cursor}", headers=headers)
+
+    assert ids_paginados == sorted(ids_criados)
+
+    # skip/limit continuam funcionando, na mesma ordem
+    response = client.get("/escolas/?skip=2&limit=2", headers=headers)
+    assert [e["id_escola"] for e in response.json()] == sorted(ids_criados)[2:4]
+
+    response = client.get("/escolas/?cursor=nao-e-um-cursor", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor de paginação inválido."
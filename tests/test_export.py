@@ -0,0 +1,60 @@
+# tests/test_export.py
+import csv
+import datetime
+import io
+import json
+
+from fastapi.testclient import TestClient
+
+import export_router
+
+
+def _criar_contrato(client: TestClient, headers, aluno, responsavel) -> dict:
+    response = client.post("/contratos", headers=headers, json={
+        "id_aluno": aluno.id_aluno, "id_responsavel_financeiro": responsavel.id_responsavel,
+        "data_inicio_contrato": datetime.date.today().isoformat(), "valor_mensal": "250.75",
+        "dia_vencimento_mensalidade": 10, "tipo_servico_contratado": "Exportação"
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_export_pagamentos_ndjson(client: TestClient, setup_pre_requisitos_contrato_fixture, monkeypatch):
+    headers, aluno, responsavel, _ = setup_pre_requisitos_contrato_fixture
+    contrato = _criar_contrato(client, headers, aluno, responsavel)
+    monkeypatch.setattr(export_router, "TAMANHO_LOTE_EXPORTACAO", 2) # Força vários lotes
+
+    response = client.get("/export/pagamentos", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert 'filename="pagamentos.ndjson"' in response.headers["content-disposition"]
+
+    pagamentos = [json.loads(linha) for linha in response.text.splitlines()]
+    listagem = client.get(f"/pagamentos/por-contrato/{contrato['id_contrato']}?limit=1000", headers=headers).json()
+    assert len(pagamentos) == len(listagem) > 2
+    assert [p["id_pagamento"] for p in pagamentos] == sorted(p["id_pagamento"] for p in listagem)
+    assert pagamentos[0]["valor_nominal"] == "250.75" # Mesmo formato da API
+
+
+def test_export_alunos_csv_e_isolamento(client: TestClient, setup_pre_requisitos_contrato_fixture, operator_token_fixture_factory):
+    headers, aluno, _, _ = setup_pre_requisitos_contrato_fixture
+
+    response = client.get("/export/alunos?formato=csv", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    linhas = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(linhas) == 1
+    assert linhas[0]["id_aluno"] == str(aluno.id_aluno)
+    assert linhas[0]["nome_completo_aluno"] == aluno.nome_completo_aluno
+
+    outro_headers = operator_token_fixture_factory("op_export_outro")
+    response = client.get("/export/alunos?formato=csv", headers=outro_headers)
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 1 # Só o cabeçalho
+
+
+def test_export_formato_invalido(client: TestClient, operator_token_fixture_factory):
+    headers = operator_token_fixture_factory("op_export_fmt")
+    response = client.get("/export/alunos?formato=xlsx", headers=headers)
+    assert response.status_code == 400
+    assert client.get("/export/alunos").status_code == 401
@@ -0,0 +1,45 @@
+# tests/test_fast_json.py
+import asyncio
+import datetime
+import json
+from decimal import Decimal
+from typing import List
+
+from fastapi.routing import serialize_response
+from fastapi.testclient import TestClient
+from fastapi.utils import create_model_field
+
+import app_models
+import fast_json
+import schemas
+
+
+def _serializar_como_fastapi(itens, schema) -> bytes:
+    # Caminho padrão: response_model=List[schema] + JSONResponse (json da stdlib)
+    field = create_model_field(name="Response", type_=List[schema], mode="serialization")
+    conteudo = asyncio.run(serialize_response(field=field, response_content=itens))
+    return fast_json.JSONResponse(conteudo).body
+
+
+def test_serializar_lista_igual_ao_caminho_padrao():
+    pagamentos = [
+        app_models.Pagamento(
+            id_pagamento=i, id_contrato=7, mes_referencia=f"2026-0{i}", ano_referencia=2026,
+            data_vencimento=datetime.date(2026, i, 10), valor_nominal=Decimal("250.75"), valor_desconto=Decimal("0.00"),
+            valor_acrescimo=Decimal("1.5"), status_pagamento="Pendente", observacoes_pagamento="Mensalidade ção",
+            data_geracao=datetime.datetime(2026, 1, 2, 3, 4, 5, 678, tzinfo=datetime.timezone.utc),
+        )
+        for i in range(1, 4)
+    ]
+    rapido = fast_json.serializar_lista(pagamentos, schemas.Pagamento)
+    assert json.loads(rapido) == json.loads(_serializar_como_fastapi(pagamentos, schemas.Pagamento))
+    assert json.loads(rapido)[0]["valor_nominal"] == "250.75"
+
+
+def test_listagem_usa_caminho_rapido(client: TestClient, setup_pre_requisitos_contrato_fixture):
+    headers, aluno, _, _ = setup_pre_requisitos_contrato_fixture
+    response = client.get("/alunos/", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["ETag"] # Headers das dependências preservados
+    assert response.json() == [json.loads(aluno.model_dump_json())]
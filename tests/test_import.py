@@ -0,0 +1,86 @@
+# tests/test_import.py
+import json
+
+from fastapi.testclient import TestClient
+
+import csv_import
+from core_utils import get_session_factory
+from main import app
+
+
+def _importar(client: TestClient, headers, entidade: str, conteudo: str):
+    response = client.post(
+        f"/import/{entidade}", headers=headers,
+        files={"arquivo": (f"{entidade}.csv", conteudo.encode("utf-8"), "text/csv")}
+    )
+    eventos = [json.loads(linha) for linha in response.text.splitlines()] if response.status_code == 200 else []
+    return response, eventos
+
+
+def test_importacao_completa_escolas_responsaveis_alunos(client: TestClient, operator_token_fixture_factory, monkeypatch):
+    headers = operator_token_fixture_factory("op_import")
+    monkeypatch.setattr(csv_import, "TAMANHO_LOTE_IMPORTACAO", 2) # Vários lotes => eventos de progresso
+
+    response, eventos = _importar(client, headers, "escolas", (
+        "nome_escola;endereco_completo;cnpj\n"
+        "Escola Import A;Rua A, 1;11.111.111/0001-11\n"
+        "Escola Import B;Rua B, 2;\n"
+        "Escola Import A;Rua Repetida;\n"
+    ))
+    assert response.status_code == 200, response.text
+    assert eventos[-1]["concluido"] is True
+    assert (eventos[-1]["importadas"], eventos[-1]["rejeitadas"]) == (2, 1)
+    assert eventos[-1]["erros"] == [{"linha": 4, "erro": "Já existe uma escola com o nome 'Escola Import A'."}]
+
+    response, eventos = _importar(client, headers, "responsaveis", (
+        "nome_completo,cpf,email,telefone_principal\n"
+        "Resp Um,10000000001,um@example.com,1111\n"
+        "Resp Dois,10000000002,dois@example.com,2222\n"
+        "Resp Email Ruim,10000000003,nao-e-email,3333\n"
+    ))
+    assert eventos[-1]["importadas"] == 2
+    assert eventos[-1]["erros"][0]["linha"] == 4
+    assert "email" in eventos[-1]["erros"][0]["erro"]
+
+    linhas_alunos = ["nome_completo_aluno,data_nascimento,nome_escola,cpf_responsavel_principal,cpf_responsavel_secundario,endereco_embarque_predeterminado,periodo_escolar"]
+    linhas_alunos += [f"Aluno Import {i},2015-05-0{i % 9 + 1},Escola Import {'AB'[i % 2]},10000000001,10000000002,Rua Embarque {i},Manhã" for i in range(7)]
+    linhas_alunos.append("Aluno Escola Inexistente,2015-01-01,Escola Fantasma,10000000001,,Rua X,Tarde")
+    linhas_alunos.append("Aluno Data Ruim,01/01/2015,Escola Import A,10000000001,,Rua Y,Tarde")
+    response, eventos = _importar(client, headers, "alunos", "\n".join(linhas_alunos) + "\n")
+    assert response.status_code == 200, response.text
+    progresso, resumo = eventos[:-1], eventos[-1]
+    assert [e["linhas_processadas"] for e in progresso] == [2, 4, 6, 8]
+    assert (resumo["linhas_processadas"], resumo["importadas"], resumo["rejeitadas"]) == (9, 7, 2)
+    assert resumo["erros"][0] == {"linha": 9, "erro": "Escola 'Escola Fantasma' não encontrada."}
+    assert resumo["erros"][1]["linha"] == 10
+
+    alunos = client.get("/alunos/?limit=1000", headers=headers).json()
+    assert len(alunos) == 7
+    assert all(aluno["status_aluno"] == "Ativo" and aluno["id_responsavel_secundario"] for aluno in alunos)
+
+
+def test_importacao_colunas_obrigatorias(client: TestClient, operator_token_fixture_factory):
+    headers = operator_token_fixture_factory("op_import_cols")
+    response, _ = _importar(client, headers, "alunos", "nome_completo_aluno,data_nascimento\nFulano,2015-01-01\n")
+    assert response.status_code == 400
+    assert "nome_escola" in response.json()["detail"]
+
+    response = client.post("/import/escolas", files={"arquivo": ("e.csv", b"nome_escola\n", "text/csv")})
+    assert response.status_code == 401
+
+
+def test_importacao_usa_sessao_propria_no_streaming(client: TestClient, operator_token_fixture_factory, db_session_test, monkeypatch):
+    headers = operator_token_fixture_factory("op_import_sessao")
+    abertas, fechadas = [], []
+    fechar_original = db_session_test.close
+
+    def _fabrica():
+        abertas.append(1)
+        monkeypatch.setattr(db_session_test, "close", lambda: (fechadas.append(1), fechar_original()))
+        return db_session_test
+    app.dependency_overrides[get_session_factory] = lambda: _fabrica
+
+    response, eventos = _importar(client, headers, "escolas", "nome_escola;endereco_completo\nEscola Sessao;Rua S, 1\n")
+    assert response.status_code == 200, response.text
+    assert eventos[-1]["importadas"] == 1
+    assert (len(abertas), len(fechadas)) == (1, 1) # Aberta no gerador do corpo e fechada no finally
@@ -0,0 +1,57 @@
+# tests/test_metrics.py
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+import request_metrics
+
+
+def _login(client: TestClient, email: str) -> dict:
+    password = "metricspassword123"
+    client.post("/users/register", json={"email": email, "password": password})
+    login_response = client.post("/token", data={"username": email, "password": password})
+    assert login_response.status_code == 200, login_response.text
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+def test_server_timing_header(client: TestClient):
+    headers = _login(client, "metrics_timing@example.com")
+    response = client.get("/escolas", headers=headers)
+    assert response.status_code == 200, response.text
+    server_timing = response.headers["server-timing"]
+    assert re.search(r"app;dur=\d+(\.\d+)?", server_timing)
+    match = re.search(r'db;dur=\d+(\.\d+)?;desc="(\d+) queries"', server_timing)
+    assert match and int(match.group(2)) >= 1 # Ao menos a listagem de escolas
+
+TOKEN = "token_do_scraper"
+AUTH_SCRAPER = {"Authorization": f"Bearer {TOKEN}"}
+
+@pytest.fixture
+def metrics_token(monkeypatch):
+    from core_utils import settings
+    monkeypatch.setattr(settings, "METRICS_TOKEN", TOKEN)
+
+def test_metrics_prometheus_por_rota(client: TestClient, metrics_token):
+    request_metrics.registry.reset()
+    headers = _login(client, "metrics_rota@example.com")
+    client.get("/escolas", headers=headers)
+    client.get("/escolas/999999", headers=headers)
+
+    response = client.get("/metrics", headers=AUTH_SCRAPER)
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/escolas/"} 1' in body
+    assert 'http_requests_total{method="GET",route="/escolas/{escola_id}",status="404"} 1' in body
+    assert 'http_request_db_queries_total{method="GET",route="/escolas/"}' in body
+    assert "db_pool_checked_out" in body
+
+def test_metrics_com_token(client: TestClient, metrics_token):
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer outro"}).status_code == 403
+    assert client.get("/metrics", headers=AUTH_SCRAPER).status_code == 200
+
+def test_metrics_desligado_sem_token(client: TestClient, monkeypatch):
+    from core_utils import settings
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    assert client.get("/metrics").status_code == 404
@@ -215,4 +215,13 @@ def test_motorista_data_isolation(client: TestClient):
     response_list = client.get("/motoristas", headers=headers_op_b)
     assert response_list.status_code == 200
     motoristas_op_b = response_list.json()
-    assert not any(m["id_motorista"] == id_motorista_op_a for m in motoristas_op_b)
\ No newline at end of file
+    assert not any(m["id_motorista"] == id_motorista_op_a for m in motoristas_op_b)
+
+def test_list_meus_motoristas_query_budget(client: TestClient, operator_token_fixture_factory, create_motorista_fixture_factory, assert_max_queries):
+    headers = operator_token_fixture_factory("op_mot_budget")
+    for i in range(3):
+        create_motorista_fixture_factory(headers, f"88{i}Bud")
+    with assert_max_queries(2): # Versão (ETag) + listagem
+        response = client.get("/motoristas/", headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 3
@@ -3,7 +3,10 @@ import pytest
 from fastapi.testclient import TestClient
 import datetime
 from decimal import Decimal
+from sqlalchemy import select
 import schemas # Seus Pydantic schemas
+import app_models
+import pagamento_crud
 
 # --- Funções Helper ---
 # NOTA: Estas funções helper estão se repetindo. Em um projeto maior,
@@ -78,7 +81,7 @@ def test_create_pagamento_success(client: TestClient, setup_contrato):
     
     pagamento_data = {
         "id_contrato": contrato.id_contrato,
-        "mes_referencia": datetime.date.today().strftime("%Y-%m"), # Ex: "2025-05"
+        "mes_referencia": f"{datetime.date.today().year + 1}-01", # Fora dos meses gerados pelo contrato (até dezembro)
         "data_vencimento": data_vencimento,
         "valor_nominal": str(contrato.valor_mensal), # Enviar como string, Pydantic/Decimal cuidam
     }
@@ -90,6 +93,15 @@ def test_create_pagamento_success(client: TestClient, setup_contrato):
     assert data["status_pagamento"] == "Pendente"
     assert "id_pagamento" in data
 
+def test_create_pagamento_mes_duplicado(client: TestClient, setup_contrato):
+    headers, contrato = setup_contrato
+    # O contrato já gerou o pagamento do mês corrente (ix_pagamentos_contrato_mes é único)
+    response = client.post("/pagamentos", headers=headers, json={
+        "id_contrato": contrato.id_contrato, "mes_referencia": datetime.date.today().strftime("%Y-%m"),
+        "data_vencimento": datetime.date.today().isoformat(), "valor_nominal": str(contrato.valor_mensal)
+    })
+    assert response.status_code == 409, response.text
+
 def test_create_pagamento_unauthenticated(client: TestClient, setup_contrato):
     _, contrato = setup_contrato # Precisamos de um id_contrato válido, mesmo que o teste falhe na auth
     pagamento_data = {
@@ -144,7 +156,7 @@ def test_update_meu_pagamento_marcar_como_pago(client: TestClient, setup_contrat
     headers, contrato = setup_contrato
     data_vencimento = datetime.date.today().isoformat()
     create_pag_response = client.post("/pagamentos", headers=headers, json={
-        "id_contrato": contrato.id_contrato, "mes_referencia": datetime.date.today().strftime("%Y-%m"),
+        "id_contrato": contrato.id_contrato, "mes_referencia": f"{datetime.date.today().year + 1}-01",
         "data_vencimento": data_vencimento, "valor_nominal": "200.00"
     })
     pagamento_id = create_pag_response.json()["id_pagamento"]
@@ -200,4 +212,261 @@ def test_pagamento_data_isolation(client: TestClient, setup_contrato):
     # O CRUD de pagamentos/por-contrato primeiro verifica se o contrato pertence ao usuário.
     # Se não pertence, ele retorna uma string de erro que o router converte para 404.
     assert response_list_contrato_a.status_code == 404
-    assert "Contrato não encontrado ou não pertence a você" in response_list_contrato_a.json()["detail"]
\ No newline at end of file
+    assert "Contrato não encontrado ou não pertence a você" in response_list_contrato_a.json()["detail"]
+
+def test_list_pagamentos_query_budget(client: TestClient, setup_contrato, assert_max_queries):
+    headers, contrato = setup_contrato
+    for mes in ("2024-01", "2024-02", "2024-03"): # Vencidos, também aparecem em /atrasados
+        client.post("/pagamentos", headers=headers, json={
+            "id_contrato": contrato.id_contrato, "mes_referencia": mes,
+            "data_vencimento": f"{mes}-05", "valor_nominal": str(contrato.valor_mensal)
+        })
+    with assert_max_queries(3): # Versão (ETag) + validação do contrato + listagem
+        response = client.get(f"/pagamentos/por-contrato/{contrato.id_contrato}", headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) >= 3
+
+    with assert_max_queries(2): # Versão (ETag) + listagem
+        response = client.get("/pagamentos/atrasados", headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) >= 3
+
+
+def test_pagamentos_guardam_proprietario_sem_join(client: TestClient, setup_contrato, db_session_test, assert_max_queries):
+    headers, contrato = setup_contrato
+    response = client.post("/pagamentos", headers=headers, json={
+        "id_contrato": contrato.id_contrato, "mes_referencia": "2024-01",
+        "data_vencimento": "2024-01-05", "valor_nominal": str(contrato.valor_mensal)
+    })
+    assert response.status_code == 201, response.text
+    # Gerados pelo contrato e criados avulsos recebem o proprietário do contrato
+    proprietarios = set(db_session_test.query(app_models.Pagamento.id_proprietario_user).filter(
+        app_models.Pagamento.id_contrato == contrato.id_contrato
+    ).all())
+    dono_do_contrato = db_session_test.get(app_models.ContratoServico, contrato.id_contrato).id_proprietario_user
+    assert proprietarios == {(dono_do_contrato,)}
+
+    with assert_max_queries(2) as statements: # Versão (ETag) + atrasados
+        response = client.get("/pagamentos/atrasados", headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) >= 1
+    assert not any("JOIN" in statement.upper() for statement in statements)
+
+    with assert_max_queries(2) as statements: # Versão (ETag) + pagamento
+        response = client.get(f"/pagamentos/{response.json()[0]['id_pagamento']}", headers=headers)
+    assert response.status_code == 200, response.text
+    assert not any("JOIN" in statement.upper() for statement in statements)
+
+
+def test_list_pagamentos_ordem_pela_chave_ordenacao(client: TestClient, setup_contrato, db_session_test):
+    headers, contrato = setup_contrato
+    criados = []
+    for mes in ("2024-01", "2024-02", "2024-03", "2024-04"):
+        response = client.post("/pagamentos", headers=headers, json={
+            "id_contrato": contrato.id_contrato, "mes_referencia": mes,
+            "data_vencimento": f"{mes}-05", "valor_nominal": str(contrato.valor_mensal)
+        })
+        assert response.status_code == 201, response.text
+        criados.append(response.json()["id_pagamento"])
+    # A chave é recalculada quando status ou datas mudam
+    for id_pagamento, data_pagamento in ((criados[0], "2024-01-03"), (criados[1], "2024-03-01")):
+        response = client.put(f"/pagamentos/{id_pagamento}", headers=headers, json={
+            "status_pagamento": "Pago", "valor_pago": str(contrato.valor_mensal), "data_pagamento": data_pagamento
+        })
+        assert response.status_code == 200, response.text
+    client.put(f"/pagamentos/{criados[2]}", headers=headers, json={"status_pagamento": "Cancelado"})
+
+    response = client.get(f"/pagamentos/por-contrato/{contrato.id_contrato}", headers=headers)
+    assert response.status_code == 200, response.text
+    pagamentos = response.json()
+
+    def ordem_esperada(p):
+        # Regra da listagem: não pagos por vencimento, pagos do mais recente ao mais antigo, depois os demais
+        if p["status_pagamento"] in ("Pendente", "Atrasado"):
+            return (1, datetime.date.fromisoformat(p["data_vencimento"]).toordinal(), p["id_pagamento"])
+        if p["status_pagamento"] == "Pago":
+            return (2, -datetime.date.fromisoformat(p["data_pagamento"]).toordinal(), p["id_pagamento"])
+        return (3, 0, p["id_pagamento"])
+    assert [p["id_pagamento"] for p in pagamentos] == [p["id_pagamento"] for p in sorted(pagamentos, key=ordem_esperada)]
+    assert [p["id_pagamento"] for p in pagamentos][-3:] == [criados[1], criados[0], criados[2]]
+
+    # A página sai na ordem do índice, sem ordenação em memória
+    stmt = select(app_models.Pagamento).where(app_models.Pagamento.id_contrato == contrato.id_contrato)\
+        .order_by(*pagamento_crud._ordem_listagem_pagamentos()).limit(10)
+    compilado = stmt.compile(db_session_test.get_bind(), compile_kwargs={"literal_binds": True})
+    plano = " ".join(str(linha[-1]) for linha in db_session_test.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compilado}"))
+    assert "ix_pagamentos_contrato_ordenacao" in plano
+    assert "TEMP B-TREE" not in plano
+
+
+def test_list_pagamentos_por_contrato_etag(client: TestClient, setup_contrato):
+    headers, contrato = setup_contrato
+    url = f"/pagamentos/por-contrato/{contrato.id_contrato}"
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+    assert client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    # Baixa de um pagamento muda a versão de 'pagamentos' do proprietário
+    id_pagamento = response.json()[0]["id_pagamento"]
+    response = client.put(f"/pagamentos/{id_pagamento}", headers=headers, json={"status_pagamento": "Pago"})
+    assert response.status_code == 200, response.text
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    # ETag de outro operador nunca coincide
+    outro_headers = get_operator_token(client, "op_pag_etag_outro")
+    assert client.get("/pagamentos/atrasados", headers={**outro_headers, "If-None-Match": "*"}).status_code == 304
+    etag_outro = client.get("/pagamentos/atrasados", headers=outro_headers).headers["ETag"]
+    assert client.get("/pagamentos/atrasados", headers={**headers, "If-None-Match": etag_outro}).status_code == 200
+
+
+def test_status_efetivo_calculado_na_leitura(client: TestClient, setup_contrato):
+    headers, contrato = setup_contrato
+    vencimento_futuro = (datetime.date.today() + datetime.timedelta(days=40)).isoformat()
+    ids = {}
+    for mes, vencimento in (("2024-01", "2024-01-05"), ("2099-01", vencimento_futuro)):
+        response = client.post("/pagamentos", headers=headers, json={
+            "id_contrato": contrato.id_contrato, "mes_referencia": mes,
+            "data_vencimento": vencimento, "valor_nominal": str(contrato.valor_mensal)
+        })
+        assert response.status_code == 201, response.text
+        ids[mes] = response.json()["id_pagamento"]
+
+    # Sem a tarefa de atrasados: o status gravado continua 'Pendente', o efetivo já é 'Atrasado'
+    vencido = client.get(f"/pagamentos/{ids['2024-01']}", headers=headers).json()
+    assert vencido["status_pagamento"] == "Pendente"
+    assert vencido["status_efetivo"] == "Atrasado"
+    assert client.get(f"/pagamentos/{ids['2099-01']}", headers=headers).json()["status_efetivo"] == "Pendente"
+
+    response = client.get(f"/pagamentos/por-contrato/{contrato.id_contrato}?fields=status_efetivo", headers=headers)
+    assert response.status_code == 200, response.text
+    por_id = {item["id_pagamento"]: item for item in response.json()}
+    assert por_id[ids["2024-01"]] == {"id_pagamento": ids["2024-01"], "status_efetivo": "Atrasado"}
+    assert por_id[ids["2099-01"]]["status_efetivo"] == "Pendente"
+
+    atrasados = client.get("/pagamentos/atrasados", headers=headers).json()
+    assert ids["2024-01"] in {item["id_pagamento"] for item in atrasados}
+    assert ids["2099-01"] not in {item["id_pagamento"] for item in atrasados}
+    assert all(item["status_efetivo"] == "Atrasado" for item in atrasados)
+
+
+def test_resumo_mensal(client: TestClient, setup_contrato, assert_max_queries):
+    headers, contrato = setup_contrato
+    hoje = datetime.date.today()
+    mes_atual = hoje.strftime("%Y-%m")
+
+    def _resumo(**params):
+        response = client.get("/pagamentos/resumo-mensal", headers=headers, params=params)
+        assert response.status_code == 200, response.text
+        return {(linha["mes_referencia"], linha["status_pagamento"]): linha for linha in response.json()}
+
+    status_atual = "Atrasado" if hoje.day > 10 else "Pendente" # Contrato vence no dia 10
+
+    # O contrato gerou um pagamento por mês, do mês corrente até dezembro
+    resumo = _resumo(ano=hoje.year)
+    assert set(resumo) == {(mes_atual, status_atual)} | {(f"{hoje.year}-{mes:02d}", "Pendente") for mes in range(hoje.month + 1, 13)}
+    assert resumo[(mes_atual, status_atual)]["quantidade"] == 1
+    assert Decimal(resumo[(mes_atual, status_atual)]["valor_nominal_total"]) == contrato.valor_mensal
+
+    # Baixa do mês corrente: sai de Pendente/Atrasado e entra em Pago com o valor pago
+    pagamento_atual = next(
+        p for p in client.get(f"/pagamentos/por-contrato/{contrato.id_contrato}", headers=headers).json()
+        if p["mes_referencia"] == mes_atual
+    )
+    client.put(f"/pagamentos/{pagamento_atual['id_pagamento']}", headers=headers, json={"status_pagamento": "Pago", "valor_pago": "290.00"})
+    # Pendente vencido (sem a tarefa de atrasados) aparece como Atrasado
+    vencido = client.post("/pagamentos", headers=headers, json={
+        "id_contrato": contrato.id_contrato, "mes_referencia": "2024-01",
+        "data_vencimento": "2024-01-05", "valor_nominal": "100.00"
+    }).json()
+
+    with assert_max_queries(3): # Versão (ETag) + resumo + pendentes vencidos; não percorre os pagamentos
+        resumo = _resumo()
+    assert (mes_atual, status_atual) not in resumo
+    assert resumo[(mes_atual, "Pago")]["quantidade"] == 1
+    assert Decimal(resumo[(mes_atual, "Pago")]["valor_pago_total"]) == Decimal("290.00")
+    assert resumo[("2024-01", "Atrasado")]["quantidade"] == 1
+    assert ("2024-01", "Pendente") not in resumo
+    assert set(_resumo(ano=2024)) == {("2024-01", "Atrasado")}
+
+    client.delete(f"/pagamentos/{vencido['id_pagamento']}", headers=headers)
+    assert ("2024-01", "Atrasado") not in _resumo()
+
+    # Remover o contrato remove os pagamentos (cascade) e os totais
+    assert client.delete(f"/contratos/{contrato.id_contrato}", headers=headers).status_code == 200
+    assert _resumo() == {}
+
+
+def _conciliar(client: TestClient, headers: dict, nome: str, conteudo: str):
+    return client.post("/pagamentos/conciliacao", headers=headers, files={"arquivo": (nome, conteudo.encode("utf-8"), "text/plain")})
+
+def test_conciliacao_csv(client: TestClient, setup_contrato):
+    headers, contrato = setup_contrato
+    mes_atual = datetime.date.today().strftime("%Y-%m")
+    com_transacao = client.post("/pagamentos", headers=headers, json={
+        "id_contrato": contrato.id_contrato, "mes_referencia": "2024-01", "data_vencimento": "2024-01-10",
+        "valor_nominal": "300.50", "id_transacao_gateway": "TX-CSV-1"
+    }).json()
+
+    csv = (
+        "id_transacao_gateway;id_contrato;mes_referencia;valor_pago;data_pagamento;metodo_pagamento\n"
+        "TX-CSV-1;;;300,50;2024-01-09;PIX\n"                            # Pela transação do gateway
+        f";{contrato.id_contrato};{mes_atual};1.300,50;;Boleto\n"       # Pelo contrato + mês (valor em pt-BR)
+        f";{contrato.id_contrato};{mes_atual};300,50;;\n"                # Mesmo pagamento de novo
+        "TX-NAO-EXISTE;;;10,00;;\n"
+        f";999999;{mes_atual};10,00;;\n"                                  # Contrato de outro operador/inexistente
+        "TX-SEM-VALOR;;;;;\n"
+    )
+    response = _conciliar(client, headers, "retorno.csv", csv)
+    assert response.status_code == 200, response.text
+    resultado = response.json()
+    assert [item["linha"] for item in resultado["conciliados"]] == [2, 3]
+    assert [item["linha"] for item in resultado["conflitos"]] == [4]
+    assert "linha 3" in resultado["conflitos"][0]["motivo"]
+    assert [item["linha"] for item in resultado["nao_encontrados"]] == [5, 6]
+    assert [item["linha"] for item in resultado["invalidas"]] == [7]
+
+    pago = client.get(f"/pagamentos/{com_transacao['id_pagamento']}", headers=headers).json()
+    assert (pago["status_pagamento"], pago["valor_pago"], pago["data_pagamento"]) == ("Pago", "300.50", "2024-01-09")
+    assert pago["metodo_pagamento"] == "PIX" and pago["data_baixa"] is not None
+    pago_mes = client.get(f"/pagamentos/{resultado['conciliados'][1]['id_pagamento']}", headers=headers).json()
+    assert (pago_mes["status_pagamento"], pago_mes["valor_pago"]) == ("Pago", "1300.50")
+    assert pago_mes["data_pagamento"] == datetime.date.today().isoformat() # Mesma regra do PUT
+    # O UPDATE em lote também recalcula a chave da listagem: pagos no fim, do mais recente ao mais antigo
+    listagem = client.get(f"/pagamentos/por-contrato/{contrato.id_contrato}", headers=headers).json()
+    assert [p["id_pagamento"] for p in listagem][-2:] == [pago_mes["id_pagamento"], pago["id_pagamento"]]
+
+    resumo = client.get("/pagamentos/resumo-mensal", headers=headers).json()
+    pagos = {linha["mes_referencia"]: linha for linha in resumo if linha["status_pagamento"] == "Pago"}
+    assert Decimal(pagos["2024-01"]["valor_pago_total"]) == Decimal("300.50")
+    assert Decimal(pagos[mes_atual]["valor_pago_total"]) == Decimal("1300.50")
+
+    # Reenviar o mesmo arquivo não baixa de novo
+    resultado = _conciliar(client, headers, "retorno.csv", csv).json()
+    assert resultado["conciliados"] == []
+    assert {item["motivo"] for item in resultado["conflitos"]} >= {"Pagamento já está Pago."}
+
+    response = _conciliar(client, headers, "x.csv", "id_contrato;valor_pago\n1;10\n")
+    assert response.status_code == 400
+
+def test_conciliacao_ofx(client: TestClient, setup_contrato):
+    headers, contrato = setup_contrato
+    pagamento = client.post("/pagamentos", headers=headers, json={
+        "id_contrato": contrato.id_contrato, "mes_referencia": "2024-02", "data_vencimento": "2024-02-10",
+        "valor_nominal": "300.50", "id_transacao_gateway": "OFX-123"
+    }).json()
+    ofx = (
+        "OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+        "<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20240211\n<TRNAMT>-50.00\n<FITID>OFX-DEB\n</STMTTRN>\n"
+        "<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20240212120000[-3:BRT]\n<TRNAMT>300.50\n<FITID>OFX-123\n</STMTTRN>\n"
+        "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+    )
+    response = _conciliar(client, headers, "extrato.ofx", ofx)
+    assert response.status_code == 200, response.text
+    resultado = response.json()
+    assert [item["id_pagamento"] for item in resultado["conciliados"]] == [pagamento["id_pagamento"]]
+    assert resultado["nao_encontrados"] == [] # O débito é ignorado
+    pago = client.get(f"/pagamentos/{pagamento['id_pagamento']}", headers=headers).json()
+    assert (pago["status_pagamento"], pago["data_pagamento"]) == ("Pago", "2024-02-12")
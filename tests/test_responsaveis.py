@@ -232,4 +232,39 @@ def test_responsavel_data_isolation(client: TestClient):
     response_list = client.get("/responsaveis", headers=headers_op_b)
     assert response_list.status_code == 200
     responsaveis_op_b = response_list.json()
-    assert not any(r["id_responsavel"] == id_responsavel_op_a for r in responsaveis_op_b)
\ No newline at end of file
+    assert not any(r["id_responsavel"] == id_responsavel_op_a for r in responsaveis_op_b)
+
+def test_list_meus_responsaveis_query_budget(client: TestClient, operator_token_fixture_factory, create_responsavel_fixture_factory, assert_max_queries):
+    headers = operator_token_fixture_factory("op_resp_budget")
+    for i in range(3):
+        create_responsavel_fixture_factory(headers, f"77{i}Bud")
+    with assert_max_queries(2): # Versão (ETag) + listagem
+        response = client.get("/responsaveis/", headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 3
+
+
+def test_create_responsaveis_bulk(client: TestClient, operator_token_fixture_factory):
+    headers = operator_token_fixture_factory("op_resp_bulk")
+    existente = client.post("/responsaveis", headers=headers, json={
+        "nome_completo": "Resp Existente", "cpf": "90000000000", "email": "existente.bulk@example.com", "telefone_principal": "1111"
+    })
+    assert existente.status_code == 201, existente.text
+
+    payload = [
+        {"nome_completo": f"Resp Bulk {i}", "cpf": f"9100000000{i}", "email": f"bulk{i}@example.com", "telefone_principal": "2222"}
+        for i in range(3)
+    ]
+    payload.append({"nome_completo": "CPF já cadastrado", "cpf": "90000000000", "email": "novo.bulk@example.com", "telefone_principal": "3333"})
+    payload.append({"nome_completo": "Email repetido no lote", "cpf": "92000000000", "email": "bulk0@example.com", "telefone_principal": "4444"})
+
+    response = client.post("/responsaveis/bulk", headers=headers, json=payload)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["criados"] == 3
+    assert data["rejeitados"] == 2
+    assert "CPF '90000000000'" in data["resultados"][3]["erro"]
+    assert "email 'bulk0@example.com'" in data["resultados"][4]["erro"]
+
+    listagem = client.get("/responsaveis/", headers=headers).json()
+    assert {r["cpf"] for r in listagem} == {"90000000000", "91000000000", "91000000001", "91000000002"}
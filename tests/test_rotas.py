@@ -4,6 +4,10 @@ import pytest
 from fastapi.testclient import TestClient
 import datetime
 import schemas # Seus Pydantic schemas
+from sqlalchemy import select
+
+import app_models
+import rota_crud
 
 # --- Funções Helper ---
 # NOTA: Estas funções helper estão se tornando extensas e repetitivas.
@@ -194,6 +198,26 @@ def test_list_minhas_rotas(client: TestClient, setup_rota_completa):
     assert isinstance(data, list)
     assert len(data) >= 1
 
+def test_list_minhas_rotas_filtros_e_ordenacao(client: TestClient, setup_rota_completa):
+    headers, escola, motorista, van = setup_rota_completa
+    outra_escola = create_test_escola_for_operator(client, headers, "EscRotaFiltro")
+    for nome, id_escola, ativa in [("Rota C", escola.id_escola, True), ("Rota A", escola.id_escola, True),
+                                   ("Rota B", escola.id_escola, False), ("Rota D", outra_escola.id_escola, True)]:
+        response = client.post("/rotas", headers=headers, json={
+            "nome_rota": nome, "id_van_designada": van.id_van, "id_motorista_escalado": motorista.id_motorista,
+            "id_escola_atendida": id_escola, "tipo_rota": "Filtro", "ativa": ativa
+        })
+        assert response.status_code == 201, response.text
+
+    response = client.get(f"/rotas/?ativa=true&id_escola_atendida={escola.id_escola}&sort=nome_rota", headers=headers)
+    assert response.status_code == 200, response.text
+    assert [r["nome_rota"] for r in response.json()] == ["Rota A", "Rota C"]
+
+    response = client.get("/rotas/?ativa=false", headers=headers)
+    assert [r["nome_rota"] for r in response.json()] == ["Rota B"]
+
+    assert client.get("/rotas/?sort=tipo_rota", headers=headers).status_code == 400
+
 def test_get_minha_rota_by_id(client: TestClient, setup_rota_completa):
     headers, escola, motorista, van = setup_rota_completa
     nome_rota_get = f"Rota para GET {generate_unique_string()}"
@@ -370,4 +394,72 @@ def test_desativar_aluno_da_rota(client: TestClient, setup_rota_e_aluno_nao_aloc
 
     # Tenta adicionar o mesmo aluno novamente (agora deve ser possível, pois o anterior está inativo)
     response_reativar = client.post(f"/rotas/{rota.id_rota}/alunos", headers=headers, json={"id_aluno": aluno.id_aluno, "status_aluno_na_rota": "Ativo"})
-    assert response_reativar.status_code == 201, response_reativar.text # Deve permitir criar nova associação ATIVA
\ No newline at end of file
+    assert response_reativar.status_code == 201, response_reativar.text # Deve permitir criar nova associação ATIVA
+
+def test_list_rotas_e_alunos_da_rota_query_budget(client: TestClient, setup_rota_e_aluno_fixture_factory, create_aluno_fixture_factory, assert_max_queries):
+    headers, rota, aluno, escola, responsavel, _, _ = setup_rota_e_aluno_fixture_factory("op_rota_budget")
+    alunos = [aluno] + [create_aluno_fixture_factory(headers, escola.id_escola, responsavel.id_responsavel, "AlunoBudget") for _ in range(2)]
+    for a in alunos:
+        response = client.post(f"/rotas/{rota.id_rota}/alunos", headers=headers, json={"id_aluno": a.id_aluno})
+        assert response.status_code == 201, response.text
+
+    with assert_max_queries(2): # Versão (ETag) + listagem
+        response = client.get("/rotas/", headers=headers)
+    assert response.status_code == 200, response.text
+
+    # Versão (ETag) + validação da rota + associações com o aluno no mesmo SELECT (sem N+1)
+    with assert_max_queries(3):
+        response = client.get(f"/rotas/{rota.id_rota}/alunos", headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 3
+
+
+def test_list_rotas_expand(client: TestClient, setup_rota_completa, assert_max_queries):
+    headers, escola, motorista, van = setup_rota_completa
+    for i in range(3):
+        response = client.post("/rotas", headers=headers, json={
+            "nome_rota": f"Rota Expand {i} {generate_unique_string()}", "id_van_designada": van.id_van,
+            "id_motorista_escalado": motorista.id_motorista, "id_escola_atendida": escola.id_escola, "tipo_rota": "Expand"
+        })
+        assert response.status_code == 201, response.text
+
+    with assert_max_queries(2): # Versão (ETag) + listagem com os JOINs, sem N+1
+        response = client.get("/rotas/?expand=van,motorista,escola", headers=headers)
+    assert response.status_code == 200, response.text
+    rotas = response.json()
+    assert len(rotas) == 3
+    for rota in rotas:
+        assert rota["van_designada_obj"]["placa"] == van.placa
+        assert rota["motorista_escalado_obj"]["id_motorista"] == motorista.id_motorista
+        assert rota["escola_atendida_obj"]["nome_escola"] == escola.nome_escola
+
+    with assert_max_queries(2):
+        response = client.get(f"/rotas/{rotas[0]['id_rota']}?expand=van", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["van_designada_obj"]["id_van"] == van.id_van
+    assert "escola_atendida_obj" not in response.json()
+    assert "van_designada_obj" not in client.get(f"/rotas/{rotas[0]['id_rota']}", headers=headers).json()
+
+    response = client.get("/rotas/?expand=alunos", headers=headers)
+    assert response.status_code == 400
+    assert "alunos" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("campo", rota_crud.CAMPOS_ORDENACAO_ROTAS)
+def test_ordenacao_de_rotas_usa_indice(db_session_test, campo):
+    # Cada campo de ?sort= tem índice (id_proprietario_user, campo, pk): a página sai sem ordenação em memória
+    modelo = app_models.Rota
+    stmt = select(modelo).where(modelo.id_proprietario_user == 1)\
+        .order_by(getattr(modelo, campo).desc(), modelo.id_rota.desc()).limit(10)
+    compilado = stmt.compile(db_session_test.get_bind(), compile_kwargs={"literal_binds": True})
+    plano = " ".join(str(linha[-1]) for linha in db_session_test.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compilado}"))
+    assert "TEMP B-TREE" not in plano, plano
+
+
+def test_openapi_rotas_sem_expand_usa_schema_base(client: TestClient):
+    # ?expand= é opcional: o contrato público continua sendo o schema base
+    paths = client.get("/openapi.json").json()["paths"]
+    lista = paths["/rotas/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert lista["items"]["$ref"] == "#/components/schemas/Rota"
+    detalhe = paths["/rotas/{rota_id}"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert detalhe["$ref"] == "#/components/schemas/Rota"
@@ -0,0 +1,107 @@
+# tests/test_scheduler.py
+import asyncio
+import threading
+
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+import scheduler
+import tarefa_crud
+
+
+class _EleicaoFixa:
+    def __init__(self, lider: bool):
+        self.lider = lider
+        self.liberado = False
+
+    def tentar_assumir(self) -> bool:
+        return self.lider
+
+    def ainda_lider(self) -> bool:
+        return self.lider
+
+    def liberar(self) -> None:
+        self.liberado = True
+
+
+def _rodar_ciclos(agendador: scheduler.Agendador, ciclos: int) -> None:
+    async def _executar():
+        for _ in range(ciclos):
+            await agendador._ciclo()
+        await agendador.parar()
+    asyncio.run(_executar())
+
+
+def test_lock_de_arquivo_exclusivo(tmp_path):
+    caminho = str(tmp_path / "agendador.lock")
+    primeiro, segundo = scheduler.LiderArquivo(caminho), scheduler.LiderArquivo(caminho)
+    assert primeiro.tentar_assumir() is True
+    assert segundo.tentar_assumir() is False
+
+    primeiro.liberar()
+    assert segundo.tentar_assumir() is True
+    segundo.liberar()
+
+
+def test_agendador_so_executa_no_lider():
+    execucoes = []
+    tarefa = scheduler.TarefaAgendada("teste", 3600, lambda: execucoes.append(1))
+
+    eleicao = _EleicaoFixa(lider=True)
+    lider = scheduler.Agendador([tarefa], eleicao)
+    _rodar_ciclos(lider, 3)
+    assert execucoes == [1] # Executa ao assumir; o próximo ciclo ainda está dentro do intervalo
+    assert eleicao.liberado is True
+
+    seguidor = scheduler.Agendador([tarefa], _EleicaoFixa(lider=False))
+    _rodar_ciclos(seguidor, 3)
+    assert execucoes == [1]
+
+
+def test_agendador_segue_apos_falha_da_tarefa():
+    def _falhar():
+        raise RuntimeError("falha simulada")
+    agendador = scheduler.Agendador([scheduler.TarefaAgendada("falha", 0, _falhar)], _EleicaoFixa(lider=True))
+    _rodar_ciclos(agendador, 2) # A exceção é registrada no log e não derruba o loop
+
+
+def test_parar_espera_a_tarefa_em_andamento_antes_de_liberar():
+    iniciou, continuar = threading.Event(), threading.Event()
+    ordem = []
+    def _tarefa_lenta():
+        iniciou.set()
+        continuar.wait(5)
+        ordem.append("tarefa")
+
+    eleicao = _EleicaoFixa(lider=True)
+    eleicao.liberar = lambda: ordem.append("liberar")
+    agendador = scheduler.Agendador([scheduler.TarefaAgendada("lenta", 3600, _tarefa_lenta)], eleicao)
+
+    async def _executar():
+        await agendador.iniciar()
+        await asyncio.to_thread(iniciou.wait, 5)
+        parada = asyncio.create_task(agendador.parar())
+        await asyncio.sleep(0.05)
+        assert ordem == [] # A liderança continua presa enquanto a thread da tarefa roda
+        continuar.set()
+        await parada
+    asyncio.run(_executar())
+    assert ordem == ["tarefa", "liberar"]
+
+
+def test_engine_da_eleicao_fora_do_pool_da_aplicacao():
+    engine_lider = scheduler.criar_engine_lider()
+    assert isinstance(engine_lider.pool, NullPool)
+    assert engine_lider is not scheduler.engine
+    engine_lider.dispose()
+
+
+def test_executar_com_historico_sem_sobreposicao(db_session_test: Session):
+    chamadas = []
+    trava = tarefa_crud._travas_tarefas["tarefa_teste"]
+    with trava: # Simula uma execução da mesma tarefa em andamento
+        execucao = tarefa_crud.executar_com_historico(
+            db_session_test, "tarefa_teste", lambda db, ao_concluir_lote: chamadas.append(1)
+        )
+    assert execucao is None
+    assert chamadas == []
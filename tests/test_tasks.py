@@ -0,0 +1,101 @@
+# tests/test_tasks.py
+import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import app_models
+import pagamento_crud
+import task_router
+
+
+def _criar_pagamentos_vencidos(client: TestClient, headers, aluno, responsavel, meses) -> dict:
+    contrato = client.post("/contratos", headers=headers, json={
+        "id_aluno": aluno.id_aluno, "id_responsavel_financeiro": responsavel.id_responsavel,
+        "data_inicio_contrato": datetime.date.today().isoformat(), "valor_mensal": "180.00",
+        "dia_vencimento_mensalidade": 10, "tipo_servico_contratado": "Tarefa"
+    }).json()
+    for mes in meses:
+        response = client.post("/pagamentos", headers=headers, json={
+            "id_contrato": contrato["id_contrato"], "mes_referencia": mes,
+            "data_vencimento": f"{mes}-05", "valor_nominal": "180.00"
+        })
+        assert response.status_code == 201, response.text
+    return contrato
+
+
+def _pendentes_vencidos(db: Session) -> int:
+    return db.scalar(select(func.count()).select_from(app_models.Pagamento).where(
+        app_models.Pagamento.status_pagamento == "Pendente",
+        app_models.Pagamento.data_vencimento < datetime.date.today(),
+    ))
+
+
+def _resumo_gravado_e_recalculado(db: Session):
+    resumo = app_models.ResumoFinanceiroMensal
+    gravado = {
+        (linha.id_proprietario_user, linha.mes_referencia, linha.status_pagamento): (linha.quantidade, linha.valor_nominal_total)
+        for linha in db.execute(select(resumo).where(resumo.quantidade != 0)).scalars()
+    }
+    recalculado = {
+        (proprietario, mes, status): (quantidade, total)
+        for proprietario, mes, status, quantidade, total in db.execute(
+            select(
+                app_models.ContratoServico.id_proprietario_user, app_models.Pagamento.mes_referencia,
+                app_models.Pagamento.status_pagamento, func.count(), func.sum(app_models.Pagamento.valor_nominal),
+            ).join(app_models.ContratoServico).group_by(
+                app_models.ContratoServico.id_proprietario_user, app_models.Pagamento.mes_referencia,
+                app_models.Pagamento.status_pagamento,
+            )
+        ).all()
+    }
+    return gravado, recalculado
+
+
+def test_atualizar_atrasados_em_lotes(client: TestClient, db_session_test: Session, setup_pre_requisitos_contrato_fixture):
+    headers, aluno, responsavel, _ = setup_pre_requisitos_contrato_fixture
+    _criar_pagamentos_vencidos(client, headers, aluno, responsavel, ["2024-01", "2024-02", "2024-03", "2024-04", "2024-05"])
+    esperados = _pendentes_vencidos(db_session_test)
+    assert esperados >= 5
+
+    lotes = []
+    atualizados = pagamento_crud.atualizar_pagamentos_para_atrasado(
+        db_session_test, tamanho_lote=2, ao_concluir_lote=lambda n, ultimo_id: lotes.append((n, ultimo_id))
+    )
+    assert atualizados == esperados == sum(n for n, _ in lotes)
+    assert len(lotes) == (esperados + 1) // 2
+    assert [ultimo_id for _, ultimo_id in lotes] == sorted(ultimo_id for _, ultimo_id in lotes)
+    assert _pendentes_vencidos(db_session_test) == 0
+    gravado, recalculado = _resumo_gravado_e_recalculado(db_session_test) # O UPDATE em massa também move os totais
+    assert gravado == recalculado
+
+    # Rodar de novo (ex.: após uma interrupção) não tem o que refazer
+    assert pagamento_crud.atualizar_pagamentos_para_atrasado(db_session_test, tamanho_lote=2) == 0
+
+
+def test_tarefa_atrasados_registra_execucao(client: TestClient, setup_pre_requisitos_contrato_fixture, monkeypatch):
+    headers, aluno, responsavel, _ = setup_pre_requisitos_contrato_fixture
+    _criar_pagamentos_vencidos(client, headers, aluno, responsavel, ["2024-06", "2024-07"])
+    monkeypatch.setattr(task_router, "CRON_JOB_SECRET", "segredo-teste")
+
+    assert client.post("/tasks/update-overdue-payments", headers={"X-Cron-Secret": "errado"}).status_code == 403
+    response = client.post("/tasks/update-overdue-payments", headers={"X-Cron-Secret": "segredo-teste"})
+    assert response.status_code == 200, response.text
+    resultado = response.json()
+    assert resultado["atualizados"] >= 2
+
+    password = "adminpassword123"
+    client.post("/users/register", json={"email": "admin_tasks@example.com", "password": password, "is_superuser": True})
+    token = client.post("/token", data={"username": "admin_tasks@example.com", "password": password}).json()["access_token"]
+    response = client.get("/tasks/runs?tarefa=pagamentos_atrasados", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200, response.text
+    execucao = response.json()[0]
+    assert execucao["id_execucao"] == resultado["id_execucao"]
+    assert execucao["status_execucao"] == "Concluída"
+    assert execucao["registros_atualizados"] == resultado["atualizados"]
+    assert execucao["lotes_processados"] >= 1
+    assert execucao["duracao_ms"] is not None and execucao["finalizada_em"]
+
+    assert client.get("/tasks/runs", headers=headers).status_code == 403 # Operador comum
+
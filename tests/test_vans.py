@@ -3,6 +3,10 @@ import pytest
 from fastapi.testclient import TestClient
 import datetime
 import schemas # Seus Pydantic schemas
+from sqlalchemy import select
+
+import app_models
+import van_crud
 
 # --- Funções Helper ---
 # NOTA: Idealmente, estas funções helper estariam em conftest.py.
@@ -204,4 +208,67 @@ def test_van_data_isolation(client: TestClient):
     response_list = client.get("/vans", headers=headers_op_b)
     assert response_list.status_code == 200
     vans_op_b = response_list.json()
-    assert not any(v["id_van"] == id_van_op_a for v in vans_op_b)
\ No newline at end of file
+    assert not any(v["id_van"] == id_van_op_a for v in vans_op_b)
+
+def test_list_minhas_vans_query_budget(client: TestClient, operator_token_fixture_factory, create_van_fixture_factory, assert_max_queries):
+    headers = operator_token_fixture_factory("op_van_budget")
+    for prefixo in ("BUA", "BUB", "BUC"):
+        create_van_fixture_factory(headers, prefixo)
+    with assert_max_queries(2): # Versão (ETag) + listagem
+        response = client.get("/vans/", headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 3
+
+
+def test_list_minhas_vans_filtro_status_e_ordenacao(client: TestClient, operator_token_fixture_factory):
+    headers = operator_token_fixture_factory("op_van_filtro")
+    for placa, ano, status_van in [("FLT0001", 2020, "Ativa"), ("FLT0002", 2018, "Manutenção"), ("FLT0003", 2022, "Ativa")]:
+        response = client.post("/vans", headers=headers, json={
+            "placa": placa, "modelo_veiculo": "Sprinter", "marca_veiculo": "MB", "ano_fabricacao": ano,
+            "capacidade_passageiros": 15, "status_van": status_van
+        })
+        assert response.status_code == 201, response.text
+
+    response = client.get("/vans/?status_van=Ativa&sort=-ano_fabricacao", headers=headers)
+    assert response.status_code == 200, response.text
+    assert [v["placa"] for v in response.json()] == ["FLT0003", "FLT0001"]
+
+    response = client.get("/vans/?sort=-id_van&limit=2", headers=headers)
+    assert [v["placa"] for v in response.json()] == ["FLT0003", "FLT0002"]
+    response = client.get(f"/vans/?sort=-id_van&limit=2&cursor={response.headers['X-Next-Cursor']}", headers=headers)
+    assert [v["placa"] for v in response.json()] == ["FLT0001"]
+
+
+def test_list_minhas_vans_expand_motorista(client: TestClient, operator_token_fixture_factory, create_van_fixture_factory, create_motorista_fixture_factory):
+    headers = operator_token_fixture_factory("op_van_expand")
+    motorista = create_motorista_fixture_factory(headers, "777Exp")
+    van_sem_motorista = create_van_fixture_factory(headers, "EXA")
+    van = create_van_fixture_factory(headers, "EXB")
+    response = client.put(f"/vans/{van.id_van}", headers=headers, json={"id_motorista_padrao": motorista.id_motorista})
+    assert response.status_code == 200, response.text
+
+    response = client.get("/vans/?expand=motorista", headers=headers)
+    assert response.status_code == 200, response.text
+    por_id = {v["id_van"]: v for v in response.json()}
+    assert por_id[van_sem_motorista.id_van]["motorista_padrao_obj"] is None
+    assert por_id[van.id_van]["motorista_padrao_obj"]["cpf"] == motorista.cpf
+
+
+@pytest.mark.parametrize("campo", van_crud.CAMPOS_ORDENACAO_VANS)
+def test_ordenacao_de_vans_usa_indice(db_session_test, campo):
+    # Cada campo de ?sort= tem índice (id_proprietario_user, campo, pk): a página sai sem ordenação em memória
+    modelo = app_models.Van
+    stmt = select(modelo).where(modelo.id_proprietario_user == 1)\
+        .order_by(getattr(modelo, campo).desc(), modelo.id_van.desc()).limit(10)
+    compilado = stmt.compile(db_session_test.get_bind(), compile_kwargs={"literal_binds": True})
+    plano = " ".join(str(linha[-1]) for linha in db_session_test.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compilado}"))
+    assert "TEMP B-TREE" not in plano, plano
+
+
+def test_openapi_vans_sem_expand_usa_schema_base(client: TestClient):
+    # ?expand= é opcional: o contrato público continua sendo o schema base
+    paths = client.get("/openapi.json").json()["paths"]
+    lista = paths["/vans/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert lista["items"]["$ref"] == "#/components/schemas/Van"
+    detalhe = paths["/vans/{van_id}"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert detalhe["$ref"] == "#/components/schemas/Van"
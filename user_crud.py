@@ -1,8 +1,9 @@
 # user_crud.py
 from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import app_models # Importa o pacote app_models
-from core_utils import get_password_hash
+from core_utils import get_password_hash_pooled, invalidate_user_cache
 import schemas # Importa o arquivo schemas.py
 
 def get_user_by_email(db: Session, email: str) -> Optional[app_models.User]:
@@ -11,8 +12,12 @@ def get_user_by_email(db: Session, email: str) -> Optional[app_models.User]:
 def get_user_by_id(db: Session, user_id: int) -> Optional[app_models.User]:
     return db.query(app_models.User).filter(app_models.User.id_user == user_id).first()
 
+async def get_user_by_id_async(db: AsyncSession, user_id: int) -> Optional[app_models.User]:
+    # A mesma consulta pela AsyncSession (get_current_user roda no event loop)
+    return await db.run_sync(get_user_by_id, user_id=user_id)
+
 def create_user(db: Session, user: schemas.UserCreate) -> app_models.User:
-    hashed_password = get_password_hash(user.password)
+    hashed_password = get_password_hash_pooled(user.password)
     db_user = app_models.User(
         email=user.email,
         username=user.username,
@@ -24,4 +29,6 @@ def create_user(db: Session, user: schemas.UserCreate) -> app_models.User:
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    # Um id reaproveitado (ex.: após rollback) não pode devolver um usuário antigo do cache
+    invalidate_user_cache(db_user.id_user)
     return db_user
\ No newline at end of file
@@ -1,9 +1,12 @@
 # van_crud.py
 from sqlalchemy.orm import Session
-from typing import List, Optional, Union
+from typing import Any, List, Optional, Union
 
 import app_models # Seu módulo de modelos SQLAlchemy
 import schemas # Seu módulo de schemas Pydantic
+from expand import Expansao, aplicar_expand
+from fieldsets import aplicar_campos
+from pagination import Ordenacao, SEM_ORDENACAO, paginar_ordenado
 import motorista_crud # Para validar o id_motorista_padrao
 
 def create_van(db: Session, van: schemas.VanCreate, proprietario_id: int) -> Union[app_models.Van, str]:
@@ -24,14 +27,37 @@ def create_van(db: Session, van: schemas.VanCreate, proprietario_id: int) -> Uni
     db.refresh(db_van)
     return db_van
 
-def get_vans_por_proprietario(db: Session, proprietario_id: int, skip: int = 0, limit: int = 100) -> List[app_models.Van]:
-    return db.query(app_models.Van).filter(app_models.Van.id_proprietario_user == proprietario_id).offset(skip).limit(limit).all()
+# Relações aceitas em `?expand=` (ver expand.py)
+EXPANSOES_VAN = {
+    "motorista": Expansao("motorista_padrao", "motorista_padrao_obj", "motoristas"),
+}
 
-def get_van_por_id_e_proprietario(db: Session, van_id: int, proprietario_id: int) -> Optional[app_models.Van]:
-    return db.query(app_models.Van).filter(
+# Campos aceitos em `?sort=` (todos NOT NULL, ver pagination.paginar_ordenado)
+CAMPOS_ORDENACAO_VANS = ("id_van", "placa", "ano_fabricacao")
+
+def get_vans_por_proprietario(
+    db: Session, proprietario_id: int, skip: int = 0, limit: int = 100, after_id: Optional[int] = None,
+    campos: Optional[List[str]] = None, status_van: Optional[str] = None,
+    ordenacao: Ordenacao = SEM_ORDENACAO, after_valor: Any = None, expandir: Optional[List[str]] = None
+) -> List[app_models.Van]:
+    query = db.query(app_models.Van).filter(app_models.Van.id_proprietario_user == proprietario_id)
+    if status_van is not None:
+        query = query.filter(app_models.Van.status_van == status_van)
+    if campos and ordenacao.campo and ordenacao.campo not in campos:
+        campos = campos + [ordenacao.campo] # O valor do último item vai para o cursor
+    query = aplicar_campos(query, app_models.Van, campos)
+    query = aplicar_expand(query, app_models.Van, EXPANSOES_VAN, expandir)
+    apos = (after_valor, after_id) if after_id is not None else None
+    return paginar_ordenado(query, app_models.Van, app_models.Van.id_van, ordenacao, skip=skip, limit=limit, apos=apos).all()
+
+def get_van_por_id_e_proprietario(
+    db: Session, van_id: int, proprietario_id: int, expandir: Optional[List[str]] = None
+) -> Optional[app_models.Van]:
+    query = db.query(app_models.Van).filter(
         app_models.Van.id_van == van_id,
         app_models.Van.id_proprietario_user == proprietario_id
-    ).first()
+    )
+    return aplicar_expand(query, app_models.Van, EXPANSOES_VAN, expandir).first()
 
 def get_van_by_placa_e_proprietario(db: Session, placa: str, proprietario_id: int) -> Optional[app_models.Van]:
     return db.query(app_models.Van).filter(
@@ -77,4 +103,4 @@ def delete_van(db: Session, van_id: int, proprietario_id: int) -> Optional[app_m
     
     db.delete(db_van)
     db.commit()
-    return db_van
\ No newline at end of file
+    return db_van
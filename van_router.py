@@ -1,12 +1,16 @@
 # van_router.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 import schemas
 import van_crud # NOVO
 import app_models
-from core_utils import get_db, get_current_active_user
+from core_utils import get_db, get_read_db, get_current_active_user
+from entity_versions import etag_condicional
+from expand import item_expandido, parse_expand, resposta_expandida
+from fieldsets import parse_fields, resposta_com_campos
+from pagination import decode_cursor_ordenado, parse_sort, set_next_cursor
 
 router = APIRouter(
     prefix="/vans",
@@ -41,29 +45,44 @@ def create_nova_van(
     return created_van
 
 
-@router.get("/", response_model=List[schemas.Van])
+@router.get("/", response_model=List[schemas.Van], dependencies=[Depends(etag_condicional("vans", expansoes=van_crud.EXPANSOES_VAN))])
 def read_minhas_vans(
-    skip: int = 0, limit: int = 100,
-    db: Session = Depends(get_db),
+    request: Request, response: Response,
+    skip: int = 0, limit: int = 100, cursor: Optional[str] = None, fields: Optional[str] = None,
+    status_van: Optional[str] = None,
+    sort: Optional[str] = Query(None, description="Campo de ordenação (prefixo '-' para decrescente): " + ", ".join(van_crud.CAMPOS_ORDENACAO_VANS)),
+    expand: Optional[str] = Query(None, description="Objetos relacionados a incluir: motorista (resposta no formato VanExpandida)"),
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
+    campos = parse_fields(fields, schemas.Van, "id_van")
+    expandir = parse_expand(expand, van_crud.EXPANSOES_VAN, campos)
+    ordenacao = parse_sort(sort, van_crud.CAMPOS_ORDENACAO_VANS)
+    after_valor, after_id = decode_cursor_ordenado(cursor, ordenacao, app_models.Van) or (None, None)
     vans = van_crud.get_vans_por_proprietario(
-        db, proprietario_id=current_user.id_user, skip=skip, limit=limit
+        db, proprietario_id=current_user.id_user, skip=skip, limit=limit, after_id=after_id, campos=campos,
+        status_van=status_van, ordenacao=ordenacao, after_valor=after_valor, expandir=expandir
     )
-    return vans
+    set_next_cursor(request, response, vans, "id_van", limit, ordenacao)
+    if expandir:
+        return resposta_expandida(vans, schemas.VanExpandida, van_crud.EXPANSOES_VAN, expandir, response)
+    return resposta_com_campos(vans, schemas.Van, campos, response)
 
-@router.get("/{van_id}", response_model=schemas.Van)
+@router.get("/{van_id}", response_model=schemas.Van, dependencies=[Depends(etag_condicional("vans", expansoes=van_crud.EXPANSOES_VAN))])
 def read_minha_van_especifica(
     van_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    expand: Optional[str] = Query(None, description="Objetos relacionados a incluir: motorista (resposta no formato VanExpandida)"),
+    db: Session = Depends(get_read_db),
     current_user: app_models.User = Depends(get_current_active_user)
 ):
+    expandir = parse_expand(expand, van_crud.EXPANSOES_VAN)
     db_van = van_crud.get_van_por_id_e_proprietario(
-        db, van_id=van_id, proprietario_id=current_user.id_user
+        db, van_id=van_id, proprietario_id=current_user.id_user, expandir=expandir
     )
     if db_van is None:
         raise HTTPException(status_code=404, detail="Van não encontrada ou não pertence a você")
-    return db_van
+    return item_expandido(db_van, schemas.Van, schemas.VanExpandida, van_crud.EXPANSOES_VAN, expandir, response)
 
 @router.put("/{van_id}", response_model=schemas.Van)
 def update_minha_van(